@@ -0,0 +1,8 @@
+from django.contrib import admin
+from .models import Announcement
+
+@admin.register(Announcement)
+class AnnouncementAdmin(admin.ModelAdmin):
+    list_display = ('title', 'audience', 'course', 'author', 'created_at')
+    list_filter = ('audience',)
+    raw_id_fields = ('author', 'course')
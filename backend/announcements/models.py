@@ -0,0 +1,92 @@
+# backend/announcements/models.py
+
+from django.conf import settings
+from django.db import models
+
+from courses.models import Course
+
+
+class Announcement(models.Model):
+    """
+    Объявление. Для курса раскладывается по InboxEntry при публикации,
+    рассылки на всю школу (students, everyone) хранятся одной строкой и
+    подмешиваются во входящие при чтении.
+    """
+    AUDIENCE_CHOICES = (
+        ('course', 'Ученики курса'),
+        ('students', 'Все ученики'),
+        ('everyone', 'Все пользователи'),
+    )
+    BROADCAST_AUDIENCES = ('students', 'everyone')
+
+    author = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name='announcements',
+        verbose_name='Автор'
+    )
+    audience = models.CharField(max_length=10, choices=AUDIENCE_CHOICES, verbose_name='Кому')
+    course = models.ForeignKey(
+        Course,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='announcements',
+        verbose_name='Курс'
+    )
+    title = models.CharField(max_length=255, verbose_name='Заголовок')
+    body = models.TextField(verbose_name='Текст')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='Опубликовано')
+
+    class Meta:
+        verbose_name = 'Объявление'
+        verbose_name_plural = 'Объявления'
+        ordering = ['-created_at']
+        indexes = [
+            # Рассылки читаются и считаются по (audience, id)
+            models.Index(fields=['audience', 'id'], name='announcement_audience_idx'),
+        ]
+
+    def __str__(self):
+        return self.title
+
+    @property
+    def is_broadcast(self):
+        return self.audience in self.BROADCAST_AUDIENCES
+
+    @classmethod
+    def broadcast_audiences_for(cls, user):
+        return ('students', 'everyone') if user.role == 'student' and not user.is_staff else ('everyone',)
+
+
+class InboxEntry(models.Model):
+    """Объявление курса во входящих конкретного получателя (fan-out on write)."""
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='inbox_entries')
+    announcement = models.ForeignKey(Announcement, on_delete=models.CASCADE, related_name='inbox_entries')
+    # Копия announcement.created_at: лента строится по индексу (user, created_at)
+    created_at = models.DateTimeField()
+    read_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'announcement'], name='inbox_entry_user_announcement'),
+        ]
+        indexes = [
+            models.Index(fields=['user', '-created_at'], name='inbox_entry_feed_idx'),
+        ]
+
+
+class InboxState(models.Model):
+    """
+    Компактное состояние входящих пользователя: счетчик непрочитанных
+    объявлений курсов и отметка «рассылки прочитаны до ID включительно».
+    """
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='inbox_state'
+    )
+    unread_count = models.PositiveIntegerField(default=0)
+    broadcast_read_id = models.BigIntegerField(default=0)
@@ -0,0 +1,30 @@
+from rest_framework import serializers
+from .models import Announcement
+
+
+class AnnouncementSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Announcement
+        fields = ('id', 'audience', 'course', 'title', 'body', 'author', 'created_at')
+        read_only_fields = ('author', 'created_at')
+
+    def validate(self, data):
+        if data['audience'] == 'course' and not data.get('course'):
+            raise serializers.ValidationError({'course': 'Для объявления курса нужен курс.'})
+        if data['audience'] != 'course':
+            data['course'] = None
+        return data
+
+
+class InboxItemSerializer(serializers.Serializer):
+    id = serializers.IntegerField(source='announcement.pk')
+    audience = serializers.CharField(source='announcement.audience')
+    course = serializers.IntegerField(source='announcement.course_id', allow_null=True)
+    title = serializers.CharField(source='announcement.title')
+    body = serializers.CharField(source='announcement.body')
+    created_at = serializers.DateTimeField(source='announcement.created_at')
+    is_read = serializers.BooleanField()
+
+
+class MarkReadSerializer(serializers.Serializer):
+    ids = serializers.ListField(child=serializers.IntegerField(), allow_empty=False, max_length=500)
@@ -0,0 +1,147 @@
+# backend/announcements/services.py
+"""
+Входящие объявления.
+
+Объявление курса раскладывается при публикации: строка InboxEntry на каждого
+записанного ученика и +1 к InboxState.unread_count одним UPDATE на пачку.
+Рассылка на всю школу записывается одной строкой и подмешивается в ленту
+при чтении; прочитанность рассылок - одна отметка broadcast_read_id на
+пользователя (прочитано все до этого ID), поэтому общешкольная рассылка
+не порождает ни одной строки на получателя. При удалении объявления курса
+(в том числе вместе с курсом) его непрочитанные строки снимаются со
+счетчиков - release_unread().
+"""
+
+from django.db import transaction
+from django.db.models import F, Func, Max, OuterRef, Subquery
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from backend.events import publish
+from courses.scheduling import course_students
+from .models import Announcement, InboxEntry, InboxState
+
+FANOUT_BATCH_SIZE = 1000
+
+
+def _batches(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def create_announcement(author, audience, title, body, course=None):
+    with transaction.atomic():
+        announcement = Announcement.objects.create(
+            author=author, audience=audience, course=course, title=title, body=body,
+        )
+        if audience == 'course':
+            recipients = sorted(course_students([course.pk]).get(course.pk, ()))
+            for batch in _batches(recipients, FANOUT_BATCH_SIZE):
+                InboxState.objects.bulk_create([InboxState(user_id=user_id) for user_id in batch], ignore_conflicts=True)
+                InboxEntry.objects.bulk_create([
+                    InboxEntry(user_id=user_id, announcement=announcement, created_at=announcement.created_at)
+                    for user_id in batch
+                ])
+                InboxState.objects.filter(user_id__in=batch).update(unread_count=F('unread_count') + 1)
+            publish(['course:%s' % course.pk], 'announcement.created',
+                    id=announcement.pk, course=course.pk, title=title)
+    return announcement
+
+
+def release_unread(announcement):
+    """
+    Снимает со счетчиков непрочитанные строки удаляемого объявления курса.
+    Вызывается до удаления (announcements.signals), в его транзакции: строки
+    блокируются, и параллельный mark_read не вычтет их второй раз.
+    """
+    user_ids = list(
+        InboxEntry.objects.select_for_update()
+        .filter(announcement=announcement, read_at__isnull=True)
+        .order_by('user_id')
+        .values_list('user_id', flat=True)
+    )
+    for batch in _batches(user_ids, FANOUT_BATCH_SIZE):
+        InboxState.objects.filter(user_id__in=batch).update(unread_count=Greatest(F('unread_count') - 1, 0))
+
+
+class _Count(Func):
+    # COUNT без GROUP BY для подзапроса
+    function = 'COUNT'
+
+
+def unread_count(user):
+    """Непрочитанные объявления одним запросом: счетчик курсов + число рассылок новее отметки."""
+    audiences = Announcement.broadcast_audiences_for(user)
+    unread_broadcasts = (
+        Announcement.objects
+        .filter(audience__in=audiences, pk__gt=OuterRef('broadcast_read_id'))
+        .order_by()
+        .annotate(total=_Count('pk'))
+        .values('total')
+    )
+    row = (
+        InboxState.objects.filter(user_id=user.pk)
+        .annotate(unread_broadcasts=Subquery(unread_broadcasts))
+        .values_list('unread_count', 'unread_broadcasts')
+        .first()
+    )
+    if row is None:
+        # Пользователю еще ничего не раскладывали - непрочитаны все рассылки
+        return Announcement.objects.filter(audience__in=audiences).count()
+    return row[0] + (row[1] or 0)
+
+
+def inbox(user, before=None, limit=20):
+    """
+    Лента входящих, новые сверху: объявления курсов из InboxEntry и рассылки,
+    слитые по времени. before - курсор (created_at последнего элемента прошлой страницы).
+    """
+    entries = InboxEntry.objects.filter(user_id=user.pk).select_related('announcement')
+    broadcasts = Announcement.objects.filter(audience__in=Announcement.broadcast_audiences_for(user))
+    if before is not None:
+        entries = entries.filter(created_at__lt=before)
+        broadcasts = broadcasts.filter(created_at__lt=before)
+    entries = list(entries.order_by('-created_at')[:limit])
+    broadcasts = list(broadcasts.order_by('-created_at')[:limit])
+    read_id = InboxState.objects.filter(user_id=user.pk).values_list('broadcast_read_id', flat=True).first() or 0
+
+    items = [(entry.announcement, entry.read_at is not None) for entry in entries]
+    items += [(announcement, announcement.pk <= read_id) for announcement in broadcasts]
+    items.sort(key=lambda item: item[0].created_at, reverse=True)
+    items = items[:limit]
+    next_cursor = items[-1][0].created_at if len(items) == limit else None
+    return items, next_cursor
+
+
+def mark_read(user, announcement_ids):
+    """
+    Отмечает объявления прочитанными. Для рассылок сдвигается отметка:
+    прочитанная рассылка делает прочитанными и все более старые.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        InboxState.objects.get_or_create(user_id=user.pk)
+        marked = InboxEntry.objects.filter(
+            user_id=user.pk, announcement_id__in=announcement_ids, read_at__isnull=True,
+        ).update(read_at=now)
+        latest_broadcast = Announcement.objects.filter(
+            pk__in=announcement_ids, audience__in=Announcement.broadcast_audiences_for(user),
+        ).aggregate(latest=Max('pk'))['latest'] or 0
+        InboxState.objects.filter(user_id=user.pk).update(
+            unread_count=Greatest(F('unread_count') - marked, 0),
+            broadcast_read_id=Greatest(F('broadcast_read_id'), latest_broadcast),
+        )
+
+
+def mark_all_read(user):
+    now = timezone.now()
+    with transaction.atomic():
+        InboxState.objects.get_or_create(user_id=user.pk)
+        InboxEntry.objects.filter(user_id=user.pk, read_at__isnull=True).update(read_at=now)
+        latest_broadcast = Announcement.objects.filter(
+            audience__in=Announcement.broadcast_audiences_for(user),
+        ).aggregate(latest=Max('pk'))['latest'] or 0
+        InboxState.objects.filter(user_id=user.pk).update(
+            unread_count=0,
+            broadcast_read_id=Greatest(F('broadcast_read_id'), latest_broadcast),
+        )
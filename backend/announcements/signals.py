@@ -0,0 +1,14 @@
+# backend/announcements/signals.py
+
+from django.db.models.signals import pre_delete
+from django.dispatch import receiver
+
+from .models import Announcement
+from .services import release_unread
+
+
+@receiver(pre_delete, sender=Announcement)
+def announcement_deleted(sender, instance, **kwargs):
+    # До каскадного удаления InboxEntry: после него счетчик уже не исправить
+    if instance.audience == 'course':
+        release_unread(instance)
@@ -0,0 +1,86 @@
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from courses.models import Course
+from users.models import User
+from .models import Announcement, InboxEntry
+from .services import create_announcement, mark_all_read, mark_read, unread_count
+
+
+class InboxTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user('admin', password='pw', is_staff=True, role='admin')
+        cls.teacher = User.objects.create_user('teacher', password='pw', role='teacher')
+        cls.first = User.objects.create_user('first', password='pw')
+        cls.second = User.objects.create_user('second', password='pw')
+        cls.outsider = User.objects.create_user('outsider', password='pw')
+        cls.course = Course.objects.create(title='Математика', subject='math', price=1000, teacher=cls.teacher)
+        cls.course.students.add(cls.first, cls.second)
+
+    def announce(self, title='Контрольная'):
+        return create_announcement(self.teacher, 'course', title, 'В пятницу', self.course)
+
+    def test_course_announcement_fans_out_to_students(self):
+        announcement = self.announce()
+        self.assertEqual(
+            set(InboxEntry.objects.filter(announcement=announcement).values_list('user_id', flat=True)),
+            {self.first.pk, self.second.pk},
+        )
+        self.assertEqual((unread_count(self.first), unread_count(self.outsider)), (1, 0))
+
+    def test_broadcast_counted_without_rows(self):
+        create_announcement(self.admin, 'students', 'Каникулы', 'С понедельника')
+        create_announcement(self.admin, 'everyone', 'Собрание', 'В среду')
+        self.assertFalse(InboxEntry.objects.exists())
+        self.assertEqual(unread_count(self.first), 2)
+        # Рассылка для учеников преподавателю не видна
+        self.assertEqual(unread_count(self.teacher), 1)
+
+    def test_mark_read(self):
+        course_announcement = self.announce()
+        older = create_announcement(self.admin, 'everyone', 'Собрание', 'В среду')
+        newer = create_announcement(self.admin, 'everyone', 'Перенос', 'На четверг')
+        self.assertEqual(unread_count(self.first), 3)
+
+        mark_read(self.first, [course_announcement.pk, course_announcement.pk])
+        self.assertEqual(unread_count(self.first), 2)
+        # Прочитанная рассылка делает прочитанными и более старые
+        mark_read(self.first, [newer.pk])
+        self.assertEqual(unread_count(self.first), 0)
+        self.assertEqual(self.inbox(self.first), {course_announcement.pk: True, older.pk: True, newer.pk: True})
+        self.assertEqual(unread_count(self.second), 3)
+
+    def test_mark_all_read(self):
+        self.announce()
+        self.announce('Домашнее задание')
+        create_announcement(self.admin, 'everyone', 'Собрание', 'В среду')
+        mark_all_read(self.first)
+        self.assertEqual(unread_count(self.first), 0)
+        self.assertEqual(unread_count(self.second), 3)
+
+    def test_delete_releases_unread(self):
+        kept = self.announce()
+        deleted = self.announce('Отменено')
+        mark_read(self.second, [deleted.pk])
+
+        client = APIClient()
+        client.force_authenticate(self.teacher)
+        self.assertEqual(client.delete('/api/announcements/%d/' % deleted.pk).status_code, 204)
+
+        self.assertEqual((unread_count(self.first), unread_count(self.second)), (1, 1))
+        mark_read(self.first, [kept.pk])
+        self.assertEqual(unread_count(self.first), 0)
+
+    def test_course_delete_releases_unread(self):
+        self.announce()
+        self.course.delete()
+        self.assertFalse(Announcement.objects.exists())
+        self.assertEqual(unread_count(self.first), 0)
+
+    def inbox(self, user):
+        client = APIClient()
+        client.force_authenticate(user)
+        response = client.get('/api/inbox/')
+        self.assertEqual(response.status_code, 200)
+        return {item['id']: item['is_read'] for item in response.data['results']}
@@ -0,0 +1,9 @@
+from django.urls import path
+from .views import inbox_view, mark_all_read_view, mark_read_view, unread_count_view
+
+urlpatterns = [
+    path('inbox/', inbox_view, name='inbox'),
+    path('inbox/unread-count/', unread_count_view, name='inbox-unread-count'),
+    path('inbox/read/', mark_read_view, name='inbox-read'),
+    path('inbox/read-all/', mark_all_read_view, name='inbox-read-all'),
+]
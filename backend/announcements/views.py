@@ -0,0 +1,75 @@
+from django.utils.dateparse import parse_datetime
+from rest_framework import mixins, status, viewsets
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.exceptions import PermissionDenied, ValidationError
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from .models import Announcement
+from .serializers import AnnouncementSerializer, InboxItemSerializer, MarkReadSerializer
+from .services import create_announcement, inbox, mark_all_read, mark_read, unread_count
+
+
+class AnnouncementViewSet(mixins.CreateModelMixin,
+                          mixins.ListModelMixin,
+                          mixins.RetrieveModelMixin,
+                          mixins.DestroyModelMixin,
+                          viewsets.GenericViewSet):
+    """
+    Объявления, опубликованные пользователем (администратор видит все).
+    Объявление курса публикует его преподаватель или администратор, рассылки - только администратор.
+    """
+    serializer_class = AnnouncementSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        announcements = Announcement.objects.all()
+        if not self.request.user.is_staff:
+            announcements = announcements.filter(author_id=self.request.user.pk)
+        return announcements
+
+    def perform_create(self, serializer):
+        user = self.request.user
+        data = serializer.validated_data
+        if not user.is_staff:
+            if data['audience'] != 'course' or data['course'].teacher_id != user.pk:
+                raise PermissionDenied('Можно публиковать объявления только для своих курсов.')
+        serializer.instance = create_announcement(user, data['audience'], data['title'], data['body'], data.get('course'))
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def inbox_view(request):
+    # ?before=<created_at последнего элемента> - следующая страница
+    before = request.query_params.get('before')
+    if before:
+        before = parse_datetime(before)
+        if before is None:
+            raise ValidationError({'before': ['Ожидается дата и время в формате ISO 8601.']})
+    items, next_cursor = inbox(request.user, before=before)
+    return Response({
+        'results': InboxItemSerializer([{'announcement': a, 'is_read': r} for a, r in items], many=True).data,
+        'next': next_cursor,
+    })
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def unread_count_view(request):
+    return Response({'unread': unread_count(request.user)})
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def mark_read_view(request):
+    serializer = MarkReadSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    mark_read(request.user, serializer.validated_data['ids'])
+    return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def mark_all_read_view(request):
+    mark_all_read(request.user)
+    return Response(status=status.HTTP_204_NO_CONTENT)
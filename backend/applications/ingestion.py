@@ -0,0 +1,262 @@
+# backend/applications/ingestion.py
+"""
+Прием заявок с сайта.
+
+1. Телефон нормализуется, повтор с того же номера в пределах окна
+   DEDUP_WINDOW отсекается через cache.add() еще до обращения к БД. Пока
+   заявка не записана, ключ живет только CLAIM_TIMEOUT и снимается при
+   ошибке записи, так что повтор после сбоя принимается.
+   В БД окно скользящее: перед записью ищется заявка с того же номера за
+   последние DEDUP_WINDOW секунд в текущем и предыдущем dedup_bucket.
+   Уникальный индекс (phone_normalized, dedup_bucket) страхует от гонок:
+   одиночная запись ловит IntegrityError, пачки пишутся с ignore_conflicts.
+2. Пока одновременных записей немного, заявка пишется сразу (ответ 201).
+   Во время всплеска (больше SYNC_WRITERS одновременных записей в воркере)
+   заявки складываются в буфер и фоновый поток пишет их пачками через
+   bulk_create. Запрос ждет записи своей пачки (не дольше WRITE_TIMEOUT,
+   потом пишет сам) и отвечает 202 только после коммита; если пачку
+   записать не удалось - IngestionFailed. Буфер ограничен BUFFER_LIMIT.
+"""
+
+import atexit
+import logging
+import os
+import threading
+import time
+from collections import deque
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, connection, transaction
+from django.utils import timezone
+
+from backend.events import publish
+from backend.metrics import set_queue_depth
+from sync.services import record
+from .models import Application, normalize_phone
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'DEDUP_WINDOW': 15 * 60,   # секунд
+    'CLAIM_TIMEOUT': 60,       # секунд держится ключ дедупликации, пока заявка не записана
+    'SYNC_WRITERS': 4,         # одновременных синхронных записей до включения буфера
+    'BATCH_SIZE': 200,
+    'FLUSH_INTERVAL': 0.5,     # секунд между сбросами буфера
+    'BUFFER_LIMIT': 10000,
+    'WRITE_TIMEOUT': 5,        # секунд ожидания записи пачки, потом запрос пишет заявку сам
+}
+
+CREATED, BUFFERED, DUPLICATE = 'created', 'buffered', 'duplicate'
+
+
+def get_ingestion_setting(name):
+    return getattr(settings, 'APPLICATION_INGESTION', {}).get(name, DEFAULTS[name])
+
+
+class BufferFull(Exception):
+    pass
+
+
+class IngestionFailed(Exception):
+    """Заявку записать не удалось; ключ дедупликации снят, повтор будет принят."""
+
+
+class _Pending:
+    """Заявка в буфере; запрос, принявший ее, ждет done."""
+
+    def __init__(self, application):
+        self.application = application
+        self.done = threading.Event()
+        self.result = None          # BUFFERED или DUPLICATE; None - запись не удалась
+
+
+class _WriteBuffer:
+    def __init__(self):
+        self._items = deque()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._pid = None
+        self._sync_writers = 0
+
+    def __len__(self):
+        return len(self._items)
+
+    def begin_sync_write(self):
+        """Разрешает синхронную запись, если буфер пуст и всплеска нет."""
+        with self._lock:
+            if self._items or self._sync_writers >= get_ingestion_setting('SYNC_WRITERS'):
+                return False
+            self._sync_writers += 1
+            return True
+
+    def end_sync_write(self):
+        with self._lock:
+            self._sync_writers -= 1
+
+    def add(self, pending):
+        with self._lock:
+            if len(self._items) >= get_ingestion_setting('BUFFER_LIMIT'):
+                raise BufferFull
+            self._items.append(pending)
+            self._ensure_thread()
+            depth = len(self._items)
+        set_queue_depth('applications_ingest', depth)
+        if depth >= get_ingestion_setting('BATCH_SIZE'):
+            self._wakeup.set()
+
+    def withdraw(self, pending):
+        """Забирает заявку из буфера, если фоновый поток еще не взял ее в пачку."""
+        with self._lock:
+            try:
+                self._items.remove(pending)
+            except ValueError:
+                return False
+        return True
+
+    def flush(self):
+        while True:
+            with self._lock:
+                batch = [self._items.popleft() for _ in range(min(len(self._items), get_ingestion_setting('BATCH_SIZE')))]
+            if not batch:
+                break
+            try:
+                with transaction.atomic():
+                    written = _write_batch(batch)
+            except Exception:
+                logger.exception('Не удалось записать пачку из %d заявок', len(batch))
+                for pending in batch:
+                    pending.result = None
+            else:
+                # bulk_create не шлет post_save: дашборду сообщаем о пачке целиком
+                if written:
+                    publish(['admin'], 'applications.received', count=written)
+            for pending in batch:
+                pending.done.set()
+        set_queue_depth('applications_ingest', len(self._items))
+
+    def _ensure_thread(self):
+        # Поток не переживает fork, поэтому в каждом воркере запускаем свой
+        if self._thread is None or self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='applications-ingest', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(get_ingestion_setting('FLUSH_INTERVAL'))
+            self._wakeup.clear()
+            try:
+                self.flush()
+            finally:
+                # Соединение этого потока возвращаем в пул между сбросами
+                connection.close()
+
+
+def _recent_phones(phones, bucket):
+    """Номера из phones, с которых заявка уже была за последние DEDUP_WINDOW секунд."""
+    window = get_ingestion_setting('DEDUP_WINDOW')
+    return set(
+        Application.objects.filter(
+            phone_normalized__in=phones,
+            # Окна фиксированные: заявка секундой раньше могла попасть в предыдущее
+            dedup_bucket__gte=bucket - 1,
+            created_at__gte=timezone.now() - timedelta(seconds=window),
+        ).values_list('phone_normalized', flat=True)
+    )
+
+
+def _write_batch(batch):
+    """Пишет пачку и проставляет результат каждой заявке; возвращает число новых."""
+    seen = _recent_phones(
+        {pending.application.phone_normalized for pending in batch},
+        min(pending.application.dedup_bucket for pending in batch),
+    )
+    fresh = []
+    for pending in batch:
+        phone = pending.application.phone_normalized
+        if phone in seen:
+            pending.result = DUPLICATE
+        else:
+            seen.add(phone)
+            pending.result = BUFFERED
+            fresh.append(pending.application)
+    Application.objects.bulk_create(fresh, ignore_conflicts=True)
+    _record_batch(fresh)
+    return len(fresh)
+
+
+def _record_batch(batch):
+    if not batch:
+        return
+    # С ignore_conflicts ID не возвращаются: записанные заявки находим по уникальной паре телефон+окно
+    keys = {(application.phone_normalized, application.dedup_bucket) for application in batch}
+    rows = Application.objects.filter(
+        phone_normalized__in={phone for phone, _ in keys},
+        dedup_bucket__in={bucket for _, bucket in keys},
+    ).values_list('pk', 'phone_normalized', 'dedup_bucket')
+    record('applications', [pk for pk, phone, bucket in rows if (phone, bucket) in keys])
+
+
+_buffer = _WriteBuffer()
+atexit.register(_buffer.flush)
+
+
+def _save(application):
+    try:
+        with transaction.atomic():
+            if _recent_phones([application.phone_normalized], application.dedup_bucket):
+                return DUPLICATE, None
+            application.save()
+    except IntegrityError:
+        # Уникальный индекс: такая заявка в этом окне уже есть
+        return DUPLICATE, None
+    return CREATED, application
+
+
+def _write(application):
+    if _buffer.begin_sync_write():
+        try:
+            return _save(application)
+        finally:
+            _buffer.end_sync_write()
+
+    pending = _Pending(application)
+    try:
+        _buffer.add(pending)
+    except BufferFull:
+        # Буфер переполнен - пишем синхронно, заявку не теряем
+        return _save(application)
+    if not pending.done.wait(get_ingestion_setting('WRITE_TIMEOUT')):
+        if _buffer.withdraw(pending):
+            return _save(application)
+        # Пачка с заявкой уже пишется - дожидаемся ее
+        pending.done.wait()
+    if pending.result is None:
+        raise IngestionFailed
+    return pending.result, None
+
+
+def ingest(validated_data):
+    """
+    Принимает проверенные сериализатором данные заявки.
+    Возвращает (статус, заявка) - заявка есть только для статуса CREATED.
+    Статус возвращается только после того, как заявка записана в БД.
+    """
+    window = get_ingestion_setting('DEDUP_WINDOW')
+    phone = normalize_phone(validated_data.get('phone'))
+    key = 'application-dedup:%s' % phone
+    # До записи ключ короткий: если воркер упадет, повтор примется через CLAIM_TIMEOUT
+    if not cache.add(key, True, get_ingestion_setting('CLAIM_TIMEOUT')):
+        return DUPLICATE, None
+
+    application = Application(**validated_data, phone_normalized=phone, dedup_bucket=int(time.time() // window))
+    try:
+        result, application = _write(application)
+    except Exception:
+        cache.delete(key)
+        raise
+    cache.set(key, True, window)
+    return result, application
@@ -0,0 +1,49 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:49
+
+import re
+
+from django.db import migrations, models
+
+
+def normalize_existing_phones(apps, schema_editor):
+    # Копия applications.models.normalize_phone: миграции не импортируют код приложения.
+    # dedup_bucket у старых заявок остается NULL, поэтому индекс их не затрагивает.
+    Application = apps.get_model('applications', 'Application')
+    batch = []
+    for application in Application.objects.only('id', 'phone').iterator(chunk_size=2000):
+        digits = re.sub(r'\D', '', application.phone or '')
+        if len(digits) == 11 and digits[0] == '8':
+            digits = '7' + digits[1:]
+        elif len(digits) == 10:
+            digits = '7' + digits
+        application.phone_normalized = '+' + digits if digits else ''
+        batch.append(application)
+        if len(batch) >= 2000:
+            Application.objects.bulk_update(batch, ['phone_normalized'])
+            batch = []
+    Application.objects.bulk_update(batch, ['phone_normalized'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('applications', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='application',
+            name='dedup_bucket',
+            field=models.BigIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='application',
+            name='phone_normalized',
+            field=models.CharField(blank=True, max_length=20, verbose_name='Телефон (нормализованный)'),
+        ),
+        migrations.RunPython(normalize_existing_phones, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='application',
+            constraint=models.UniqueConstraint(fields=('phone_normalized', 'dedup_bucket'), name='application_phone_dedup'),
+        ),
+    ]
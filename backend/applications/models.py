@@ -1,7 +1,23 @@
 # backend/applications/models.py
 
+import re
+
 from django.db import models
 
+
+def normalize_phone(phone):
+    """
+    Приводит номер к виду +7XXXXXXXXXX: 8 (777) 123-45-67, +7 777 1234567
+    и 7771234567 дают один и тот же результат. Прочие номера - '+' и цифры.
+    """
+    digits = re.sub(r'\D', '', phone or '')
+    if len(digits) == 11 and digits[0] == '8':
+        digits = '7' + digits[1:]
+    elif len(digits) == 10:
+        digits = '7' + digits
+    return '+' + digits if digits else ''
+
+
 class Application(models.Model):
     """Модель заявки с сайта"""
     STATUS_CHOICES = (
@@ -12,6 +28,10 @@ class Application(models.Model):
     )
     name = models.CharField(max_length=100, verbose_name='Имя')
     phone = models.CharField(max_length=20, verbose_name='Телефон')
+    phone_normalized = models.CharField(max_length=20, blank=True, verbose_name='Телефон (нормализованный)')
+    # Номер окна дедупликации (время подачи // окно). Пара телефон+окно уникальна,
+    # так что повторная заявка с того же номера в пределах окна не создает строку.
+    dedup_bucket = models.BigIntegerField(null=True, blank=True, editable=False)
     student_class = models.CharField(max_length=50, blank=True, verbose_name='Класс ученика')
     subject = models.CharField(max_length=100, blank=True, verbose_name='Предмет')
     comment = models.TextField(blank=True, verbose_name='Комментарий')
@@ -22,6 +42,13 @@ class Application(models.Model):
         verbose_name = 'Заявка'
         verbose_name_plural = 'Заявки'
         ordering = ['-created_at']
+        constraints = [
+            models.UniqueConstraint(fields=['phone_normalized', 'dedup_bucket'], name='application_phone_dedup'),
+        ]
+
+    def save(self, *args, **kwargs):
+        self.phone_normalized = normalize_phone(self.phone)
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return f'Заявка от {self.name} ({self.created_at.strftime("%d.%m.%Y")})'
\ No newline at end of file
@@ -1,9 +1,16 @@
 # backend/applications/serializers.py
 
 from rest_framework import serializers
-from .models import Application
+from .models import Application, normalize_phone
 
 class ApplicationSerializer(serializers.ModelSerializer):
     class Meta:
         model = Application
-        fields = '__all__'
\ No newline at end of file
+        exclude = ('dedup_bucket',)
+        read_only_fields = ('phone_normalized',)
+
+    def validate_phone(self, value):
+        # Без цифр все такие номера свелись бы к одному '' и считались дублями друг друга
+        if not normalize_phone(value):
+            raise serializers.ValidationError('Укажите номер телефона.')
+        return value
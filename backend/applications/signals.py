@@ -0,0 +1,21 @@
+# backend/applications/signals.py
+"""События о заявках для дашборда администратора (backend/events.py)."""
+
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from backend.bulk import bulk_updated
+from backend.events import publish
+from .models import Application
+
+
+@receiver(post_save, sender=Application)
+def application_saved(sender, instance, created, **kwargs):
+    publish(['admin'], 'application.created' if created else 'application.updated',
+            id=instance.pk, name=instance.name, subject=instance.subject,
+            status=instance.status, created_at=instance.created_at)
+
+
+@receiver(bulk_updated, sender=Application)
+def applications_bulk_updated(sender, pks, changes, **kwargs):
+    publish(['admin'], 'application.updated', ids=pks, **changes)
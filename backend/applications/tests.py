@@ -1,3 +1,112 @@
+import time
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import DatabaseError
 from django.test import TestCase
+from rest_framework.test import APIClient
+
+from backend.read_path import get_read_path
+from users.models import User
+from . import ingestion
+from .models import Application
+from .serializers import ApplicationSerializer
+
+
+class ApplicationReadPathTests(TestCase):
+    """Быстрый путь чтения (FastListMixin) должен отдавать то же, что ApplicationSerializer."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user('admin', password='pw', role='admin', is_staff=True)
+        Application.objects.create(
+            name='Иван', phone='8 (777) 123-45-67', student_class='9', subject='Математика',
+            comment='Перезвоните вечером', status='contacted',
+        )
+        # Пустые необязательные поля и номер, который не нормализуется
+        Application.objects.create(name='Без данных', phone='')
+
+    def test_read_path_matches_serializer(self):
+        queryset = Application.objects.order_by('-created_at', 'id')
+        self.assertEqual(
+            get_read_path(ApplicationSerializer).serialize(queryset),
+            ApplicationSerializer(queryset, many=True).data,
+        )
+
+    def test_list_endpoint_matches_serializer(self):
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        response = client.get('/api/applications/')
+        self.assertEqual(response.status_code, 200)
+        reference = ApplicationSerializer(Application.objects.all(), many=True).data
+        by_id = lambda rows: sorted(rows, key=lambda row: row['id'])
+        self.assertEqual(by_id(response.data['results']), by_id(reference))
+
+
+class IngestionTests(TestCase):
+    DATA = {'name': 'Иван', 'phone': '8 (777) 123-45-67'}
+
+    def setUp(self):
+        cache.clear()
+
+    def test_failed_write_releases_dedup_key(self):
+        with mock.patch.object(ingestion, '_save', side_effect=DatabaseError):
+            with self.assertRaises(DatabaseError):
+                ingestion.ingest(dict(self.DATA))
+        # Повтор после сбоя не считается дублем
+        result, application = ingestion.ingest(dict(self.DATA))
+        self.assertEqual(result, ingestion.CREATED)
+        self.assertEqual(application.phone_normalized, '+77771234567')
+
+    def test_failed_batch_is_reported_to_waiting_request(self):
+        buffer = ingestion._WriteBuffer()
+        pending = ingestion._Pending(Application(**self.DATA, dedup_bucket=1))
+        buffer._items.append(pending)
+        with mock.patch.object(ingestion, '_write_batch', side_effect=DatabaseError), self.assertLogs(ingestion.logger):
+            buffer.flush()
+        self.assertTrue(pending.done.is_set())
+        self.assertIsNone(pending.result)
+
+    def test_duplicate_in_previous_bucket(self):
+        window = ingestion.get_ingestion_setting('DEDUP_WINDOW')
+        # Заявка в конце предыдущего окна, ключ в кэше другого воркера
+        Application.objects.create(**self.DATA, dedup_bucket=int(time.time() // window) - 1)
+        result, application = ingestion.ingest(dict(self.DATA))
+        self.assertEqual(result, ingestion.DUPLICATE)
+        self.assertEqual(Application.objects.count(), 1)
+
+    def test_batch_skips_recent_and_repeated_phones(self):
+        bucket = int(time.time() // ingestion.get_ingestion_setting('DEDUP_WINDOW'))
+        Application.objects.create(name='Было', phone='+77770000001', dedup_bucket=bucket - 1)
+        batch = [
+            ingestion._Pending(Application(name=name, phone=phone, phone_normalized=phone, dedup_bucket=bucket))
+            for name, phone in (('Старый', '+77770000001'), ('Новый', '+77770000002'), ('Повтор', '+77770000002'))
+        ]
+        self.assertEqual(ingestion._write_batch(batch), 1)
+        self.assertEqual(
+            [pending.result for pending in batch],
+            [ingestion.DUPLICATE, ingestion.BUFFERED, ingestion.DUPLICATE],
+        )
+        self.assertEqual(Application.objects.filter(phone_normalized='+77770000002').count(), 1)
+
+
+class ApplicationCreateTests(TestCase):
+    def setUp(self):
+        # Ведра троттлинга заявок живут в кэше
+        cache.clear()
+
+    def test_phone_without_digits_rejected(self):
+        for phone in ('n/a', '---'):
+            response = APIClient().post('/api/applications/', {'name': 'Иван', 'phone': phone}, format='json')
+            self.assertEqual(response.status_code, 400)
+            self.assertIn('phone', response.data)
+        self.assertFalse(Application.objects.exists())
 
-# Create your tests here.
+    def test_response_contract(self):
+        client = APIClient()
+        data = {'name': 'Иван', 'phone': '8 (777) 123-45-67'}
+        created = client.post('/api/applications/', data, format='json')
+        self.assertEqual(created.status_code, 201)
+        self.assertEqual(created.data['id'], Application.objects.get().pk)
+        duplicate = client.post('/api/applications/', data, format='json')
+        self.assertEqual((duplicate.status_code, duplicate.data), (200, {'status': 'duplicate'}))
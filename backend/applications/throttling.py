@@ -0,0 +1,16 @@
+# backend/applications/throttling.py
+
+from backend.throttling import TokenBucketThrottle
+
+
+class ApplicationSubmitThrottle(TokenBucketThrottle):
+    """Ограничение отправки заявок с одного IP."""
+    scope = 'applications_submit'
+
+
+class ApplicationSubmitGlobalThrottle(TokenBucketThrottle):
+    """Общий потолок отправки заявок со всех адресов - защищает БД от спам-волны."""
+    scope = 'applications_submit_global'
+
+    def get_bucket_key(self, request, view):
+        return 'all'
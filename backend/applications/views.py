@@ -1,17 +1,74 @@
 # backend/applications/views.py
 
-from rest_framework import viewsets, permissions
+from rest_framework import viewsets, permissions, status
+from rest_framework.decorators import action
+from rest_framework.response import Response
 from .models import Application
 from .serializers import ApplicationSerializer
+from .ingestion import ingest, IngestionFailed, CREATED, BUFFERED
+from .throttling import ApplicationSubmitThrottle, ApplicationSubmitGlobalThrottle
+from backend.read_path import FastListMixin
+from backend.bulk import BulkUpdateMixin
+from exports.services import export_response, APPLICATIONS_EXPORT
+from idempotency.decorators import idempotent
 
-class ApplicationViewSet(viewsets.ModelViewSet):
+class ApplicationViewSet(FastListMixin, BulkUpdateMixin, viewsets.ModelViewSet):
     """ViewSet для заявок. Создание - для всех, управление - для админов."""
     queryset = Application.objects.all()
     serializer_class = ApplicationSerializer
+    bulk_update_fields = ('status',)
+    bulk_filter_fields = ('status',)
 
     def get_permissions(self):
         # Разрешаем любому пользователю создавать заявку (метод POST)
         if self.action == 'create':
             return [permissions.AllowAny()]
         # Все остальные действия (просмотр, редактирование, удаление) - только для админа
-        return [permissions.IsAdminUser()]
\ No newline at end of file
+        return [permissions.IsAdminUser()]
+
+    def get_throttles(self):
+        if self.action == 'create':
+            return [ApplicationSubmitThrottle(), ApplicationSubmitGlobalThrottle()]
+        return super().get_throttles()
+
+    # Без общей транзакции: запрос ждет записи пачки, и транзакция держала бы соединение;
+    # повтор, не заставший сохраненного ответа, отсечет дедупликация по телефону
+    @idempotent(atomic=False)
+    def create(self, request, *args, **kwargs):
+        """
+        POST /api/applications/ отвечает:
+            201 и заявка - записана сразу (обычный режим);
+            202 {'status': 'accepted'} - во время всплеска записана пачкой, без ID в ответе;
+            200 {'status': 'duplicate'} - заявка с этим телефоном уже есть за DEDUP_WINDOW;
+            503 с Retry-After - записать не удалось, отправку нужно повторить.
+        Форма на сайте (request-form-modal.tsx) считает успехом любой 2xx.
+        """
+        # Заявки с сайта идут через ingest(): дедупликация по телефону
+        # и буферизация записи во время всплесков.
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            result, application = ingest(serializer.validated_data)
+        except IngestionFailed:
+            # Заявка не сохранена и ключ дедупликации снят: клиенту нужно повторить отправку
+            return Response(
+                {'detail': 'Не удалось сохранить заявку, повторите попытку.'},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+                headers={'Retry-After': '5'},
+            )
+        if result == CREATED:
+            return Response(self.get_serializer(application).data, status=status.HTTP_201_CREATED)
+        if result == BUFFERED:
+            return Response({'status': 'accepted'}, status=status.HTTP_202_ACCEPTED)
+        return Response({'status': 'duplicate'}, status=status.HTTP_200_OK)
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        status_filter = self.request.query_params.get('status')
+        if status_filter:
+            queryset = queryset.filter(status=status_filter)
+        return queryset
+
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        return export_response(request, APPLICATIONS_EXPORT, self.filter_queryset(self.get_queryset()))
\ No newline at end of file
@@ -0,0 +1,8 @@
+from django.contrib import admin
+from .models import Attendance
+
+@admin.register(Attendance)
+class AttendanceAdmin(admin.ModelAdmin):
+    list_display = ('lesson', 'student', 'status', 'marked_by', 'marked_at')
+    list_filter = ('status',)
+    raw_id_fields = ('lesson', 'course', 'student', 'marked_by')
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:57
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('courses', '0004_lesson_interval'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Attendance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('present', 'Присутствовал'), ('late', 'Опоздал'), ('absent', 'Отсутствовал'), ('excused', 'Уважительная причина')], max_length=10, verbose_name='Отметка')),
+                ('comment', models.CharField(blank=True, default='', max_length=255, verbose_name='Комментарий')),
+                ('marked_at', models.DateTimeField(auto_now=True, verbose_name='Когда отмечено')),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attendance', to='courses.course', verbose_name='Курс')),
+                ('lesson', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attendance', to='courses.lesson', verbose_name='Урок')),
+                ('marked_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Кто отметил')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attendance', to=settings.AUTH_USER_MODEL, verbose_name='Ученик')),
+            ],
+            options={
+                'verbose_name': 'Посещаемость',
+                'verbose_name_plural': 'Посещаемость',
+                'indexes': [models.Index(fields=['course', 'student'], name='attendance_course_student_idx'), models.Index(fields=['student', 'course'], name='attendance_student_course_idx')],
+                'constraints': [models.UniqueConstraint(fields=('lesson', 'student'), name='attendance_lesson_student')],
+            },
+        ),
+    ]
@@ -0,0 +1,46 @@
+from django.conf import settings
+from django.db import models
+from courses.models import Course, Lesson
+
+class Attendance(models.Model):
+    class Status(models.TextChoices):
+        PRESENT = 'present', 'Присутствовал'
+        LATE = 'late', 'Опоздал'
+        ABSENT = 'absent', 'Отсутствовал'
+        EXCUSED = 'excused', 'Уважительная причина'
+
+    lesson = models.ForeignKey(Lesson, on_delete=models.CASCADE, related_name='attendance', verbose_name="Урок")
+    # Копия lesson.course: проценты посещаемости по курсу считаются без JOIN с уроками
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='attendance', verbose_name="Курс")
+    student = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='attendance',
+        verbose_name="Ученик"
+    )
+    status = models.CharField(max_length=10, choices=Status.choices, verbose_name="Отметка")
+    comment = models.CharField(max_length=255, blank=True, default='', verbose_name="Комментарий")
+    marked_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+        verbose_name="Кто отметил"
+    )
+    marked_at = models.DateTimeField(auto_now=True, verbose_name="Когда отмечено")
+
+    class Meta:
+        verbose_name = "Посещаемость"
+        verbose_name_plural = "Посещаемость"
+        constraints = [
+            # Одна отметка на ученика и урок; на нем же держится bulk upsert
+            models.UniqueConstraint(fields=['lesson', 'student'], name='attendance_lesson_student'),
+        ]
+        indexes = [
+            models.Index(fields=['course', 'student'], name='attendance_course_student_idx'),
+            models.Index(fields=['student', 'course'], name='attendance_student_course_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.student_id} - {self.lesson_id}: {self.status}'
@@ -0,0 +1,16 @@
+from rest_framework import serializers
+from .models import Attendance
+
+class AttendanceMarkSerializer(serializers.Serializer):
+    student = serializers.IntegerField()
+    status = serializers.ChoiceField(choices=Attendance.Status.choices)
+    comment = serializers.CharField(max_length=255, required=False, allow_blank=True, default='')
+
+class AttendanceMarksSerializer(serializers.Serializer):
+    marks = AttendanceMarkSerializer(many=True, allow_empty=False)
+
+    def validate_marks(self, marks):
+        students = [mark['student'] for mark in marks]
+        if len(students) != len(set(students)):
+            raise serializers.ValidationError('Ученик указан несколько раз.')
+        return marks
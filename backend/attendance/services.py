@@ -0,0 +1,95 @@
+# backend/attendance/services.py
+
+from django.db.models import Count, Q
+from rest_framework.exceptions import ValidationError
+
+from courses.scheduling import course_students
+from users.models import User
+from .models import Attendance
+
+# Опоздание считается посещением, уважительная причина не входит в знаменатель
+ATTENDED = (Attendance.Status.PRESENT, Attendance.Status.LATE)
+
+COUNTERS = {
+    'total': Count('id'),
+    'attended': Count('id', filter=Q(status__in=ATTENDED)),
+    'excused': Count('id', filter=Q(status=Attendance.Status.EXCUSED)),
+}
+
+RATE_GROUPS = {'course': 'course_id', 'student': 'student_id'}
+
+
+def _with_rate(row):
+    counted = row['total'] - row['excused']
+    row['rate'] = round(row['attended'] / counted, 4) if counted else None
+    return row
+
+
+def lesson_roster(lesson):
+    """
+    Состав группы урока с текущими отметками. Ученики берутся из записи
+    на курс; отметки отчисленных после урока учеников тоже остаются в списке.
+    """
+    marks = {
+        row['student_id']: row
+        for row in Attendance.objects.filter(lesson=lesson).values('student_id', 'status', 'comment', 'marked_at')
+    }
+    student_ids = course_students([lesson.course_id]).get(lesson.course_id, set()) | set(marks)
+    students = User.objects.filter(pk__in=student_ids).order_by('last_name', 'first_name', 'pk')
+    roster = []
+    for student in students.values('id', 'first_name', 'last_name', 'email'):
+        mark = marks.get(student['id'], {})
+        roster.append({
+            'student': student,
+            'status': mark.get('status'),
+            'comment': mark.get('comment', ''),
+            'marked_at': mark.get('marked_at'),
+        })
+    return roster
+
+
+def save_marks(lesson, marks, marked_by):
+    """
+    Сохраняет отметки всей группы одним INSERT ... ON CONFLICT DO UPDATE.
+    marks - проверенные AttendanceMarkSerializer данные.
+    """
+    enrolled = course_students([lesson.course_id]).get(lesson.course_id, set())
+    unknown = sorted({mark['student'] for mark in marks} - enrolled)
+    if unknown:
+        raise ValidationError({'marks': ['Ученики не записаны на курс: %s.' % ', '.join(map(str, unknown))]})
+
+    rows = [
+        Attendance(
+            lesson_id=lesson.pk,
+            course_id=lesson.course_id,
+            student_id=mark['student'],
+            status=mark['status'],
+            comment=mark.get('comment', ''),
+            marked_by=marked_by,
+        )
+        for mark in marks
+    ]
+    Attendance.objects.bulk_create(
+        rows,
+        update_conflicts=True,
+        unique_fields=['lesson', 'student'],
+        update_fields=['status', 'comment', 'marked_by', 'marked_at'],
+    )
+    # bulk_create не шлет сигналов: посещаемость есть на дашборде преподавателя.
+    # Импорт здесь - users.dashboards сам использует attendance_summary
+    from users.dashboards import invalidate_dashboards
+    teacher_id = getattr(lesson, 'course_teacher_id', None) or lesson.course.teacher_id
+    invalidate_dashboards([teacher_id])
+    return len(rows)
+
+
+def attendance_rates(queryset, by):
+    """Посещаемость по курсам или по ученикам (by = 'course' | 'student') одним GROUP BY."""
+    group = RATE_GROUPS[by]
+    rows = queryset.values(group).annotate(**COUNTERS).order_by(group)
+    return [_with_rate({by: row.pop(group), **row}) for row in rows]
+
+
+def attendance_summary(queryset):
+    """Итоговая посещаемость по queryset одним агрегатом."""
+    return _with_rate(queryset.aggregate(**COUNTERS))
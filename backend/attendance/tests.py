@@ -0,0 +1,91 @@
+import datetime
+
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from courses.models import Course, Lesson
+from users.models import User
+from .models import Attendance
+
+
+class AttendanceTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.teacher = User.objects.create_user('teacher', password='pw', role='teacher')
+        cls.first = User.objects.create_user('first', password='pw')
+        cls.second = User.objects.create_user('second', password='pw')
+        cls.math = Course.objects.create(title='Математика', subject='math', price=1000, teacher=cls.teacher)
+        cls.physics = Course.objects.create(title='Физика', subject='physics', price=1000, teacher=cls.teacher)
+        cls.math.students.add(cls.first, cls.second)
+        cls.physics.students.add(cls.first)
+        day = datetime.date(2026, 3, 2)
+        cls.math_lessons = [Lesson.objects.create(course=cls.math, title='Урок %d' % i, date=day) for i in range(2)]
+        cls.physics_lesson = Lesson.objects.create(course=cls.physics, title='Механика', date=day)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.teacher)
+
+    def mark(self, lesson, marks):
+        return self.client.put('/api/attendance/lessons/%d/' % lesson.pk, {'marks': marks}, format='json')
+
+    def test_remarking_updates_existing_row(self):
+        lesson = self.math_lessons[0]
+        self.assertEqual(self.mark(lesson, [{'student': self.first.pk, 'status': 'absent'}]).status_code, 200)
+        response = self.mark(lesson, [
+            {'student': self.first.pk, 'status': 'excused', 'comment': 'Справка'},
+            {'student': self.second.pk, 'status': 'present'},
+        ])
+        self.assertEqual(response.data, {'lesson': lesson.pk, 'saved': 2})
+        self.assertEqual(
+            sorted(Attendance.objects.filter(lesson=lesson).values_list('student_id', 'status', 'comment')),
+            sorted([(self.first.pk, 'excused', 'Справка'), (self.second.pk, 'present', '')]),
+        )
+
+    def test_duplicate_student_rejected(self):
+        response = self.mark(self.math_lessons[0], [
+            {'student': self.first.pk, 'status': 'present'},
+            {'student': self.first.pk, 'status': 'absent'},
+        ])
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('marks', response.data)
+        self.assertFalse(Attendance.objects.exists())
+
+    def test_student_not_enrolled_rejected(self):
+        response = self.mark(self.physics_lesson, [{'student': self.second.pk, 'status': 'present'}])
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Attendance.objects.exists())
+
+    def test_rates(self):
+        self.mark(self.math_lessons[0], [
+            {'student': self.first.pk, 'status': 'present'},
+            {'student': self.second.pk, 'status': 'absent'},
+        ])
+        self.mark(self.math_lessons[1], [
+            {'student': self.first.pk, 'status': 'late'},
+            {'student': self.second.pk, 'status': 'excused'},
+        ])
+        self.mark(self.physics_lesson, [{'student': self.first.pk, 'status': 'absent'}])
+
+        by_course = self.client.get('/api/attendance/rates/').data
+        self.assertEqual(by_course, [
+            {'course': self.math.pk, 'total': 4, 'attended': 2, 'excused': 1, 'rate': round(2 / 3, 4)},
+            {'course': self.physics.pk, 'total': 1, 'attended': 0, 'excused': 0, 'rate': 0.0},
+        ])
+        by_student = self.client.get('/api/attendance/rates/', {'by': 'student', 'course': self.math.pk}).data
+        self.assertEqual(by_student, [
+            {'student': self.first.pk, 'total': 2, 'attended': 2, 'excused': 0, 'rate': 1.0},
+            {'student': self.second.pk, 'total': 2, 'attended': 0, 'excused': 1, 'rate': 0.0},
+        ])
+
+        # Ученик видит только себя
+        student_client = APIClient()
+        student_client.force_authenticate(self.second)
+        self.assertEqual(
+            [row['student'] for row in student_client.get('/api/attendance/rates/', {'by': 'student'}).data],
+            [self.second.pk],
+        )
+
+    def test_only_excused_gives_no_rate(self):
+        self.mark(self.physics_lesson, [{'student': self.first.pk, 'status': 'excused'}])
+        self.assertIsNone(self.client.get('/api/attendance/rates/').data[0]['rate'])
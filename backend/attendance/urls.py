@@ -0,0 +1,7 @@
+from django.urls import path
+from .views import LessonAttendanceView, attendance_rates_view
+
+urlpatterns = [
+    path('lessons/<int:lesson_id>/', LessonAttendanceView.as_view(), name='lesson-attendance'),
+    path('rates/', attendance_rates_view, name='attendance-rates'),
+]
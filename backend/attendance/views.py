@@ -0,0 +1,67 @@
+from django.db.models import F
+from django.shortcuts import get_object_or_404
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from backend.permissions import IsTeacherOfCourseOrAdmin
+from courses.models import Lesson
+from .models import Attendance
+from .serializers import AttendanceMarksSerializer
+from .services import RATE_GROUPS, attendance_rates, lesson_roster, save_marks
+
+class LessonAttendanceView(APIView):
+    """
+    GET - состав группы урока с отметками, PUT - отметки всей группы одним запросом:
+    {"marks": [{"student": 12, "status": "present"}, ...]}
+    Доступно преподавателю курса и администратору.
+    """
+    permission_classes = [IsAuthenticated, IsTeacherOfCourseOrAdmin]
+
+    def get_lesson(self, request, lesson_id):
+        lessons = Lesson.objects.annotate(course_teacher_id=F('course__teacher_id')).only('id', 'course_id')
+        lesson = get_object_or_404(lessons, pk=lesson_id)
+        self.check_object_permissions(request, lesson)
+        return lesson
+
+    def get(self, request, lesson_id):
+        lesson = self.get_lesson(request, lesson_id)
+        return Response({'lesson': lesson.pk, 'roster': lesson_roster(lesson)})
+
+    def put(self, request, lesson_id):
+        lesson = self.get_lesson(request, lesson_id)
+        serializer = AttendanceMarksSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        saved = save_marks(lesson, serializer.validated_data['marks'], request.user)
+        return Response({'lesson': lesson.pk, 'saved': saved}, status=status.HTTP_200_OK)
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def attendance_rates_view(request):
+    """
+    Посещаемость: ?by=course (по умолчанию) или ?by=student, фильтры ?course= и ?student=.
+    Администратор видит все, преподаватель - свои курсы, ученик - только себя.
+    """
+    by = request.query_params.get('by', 'course')
+    if by not in RATE_GROUPS:
+        raise ValidationError({'by': ['Допустимые значения: %s.' % ', '.join(RATE_GROUPS)]})
+
+    user = request.user
+    marks = Attendance.objects.all()
+    if not user.is_staff:
+        if user.role == 'teacher':
+            marks = marks.filter(course__teacher_id=user.pk)
+        else:
+            marks = marks.filter(student_id=user.pk)
+
+    for param in ('course', 'student'):
+        value = request.query_params.get(param)
+        if value:
+            if not value.isdigit():
+                raise ValidationError({param: ['Ожидается числовой ID.']})
+            marks = marks.filter(**{param + '_id': int(value)})
+
+    return Response(attendance_rates(marks, by))
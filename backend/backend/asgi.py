@@ -5,6 +5,14 @@ It exposes the ASGI callable as a module-level variable named ``application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
+
+Поток серверных событий /api/events/ (backend/events.py) держит соединение
+открытым и работает только через ASGI, например:
+    uvicorn backend.asgi:application --workers 4
+При нескольких воркерах нужен EVENT_HUB = 'backend.events.RedisHub'.
+
+Вход (/api/token/) и смена пароля - тоже асинхронные view (users/async_auth.py):
+под ASGI хеширование пароля идет в пуле потоков, не занимая воркер.
 """
 
 import os
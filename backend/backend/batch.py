@@ -0,0 +1,174 @@
+# backend/batch.py
+"""
+Пакетный эндпоинт POST /api/batch/: несколько GET-запросов к API за один
+HTTP-запрос.
+
+    {"requests": [
+        {"id": "me", "url": "/api/users/me/"},
+        {"id": "dashboard", "url": "/api/student-dashboard-summary/"},
+        {"id": "lessons", "url": "/api/courses/upcoming-lessons/?page=2"}
+     ],
+     "parallel": false}
+
+Ответ - {"responses": [{"id", "status", "body"}, ...]} в порядке запросов.
+
+Подзапросы выполняются в этом же процессе теми же view, что и обычные
+запросы: JWT проверяется и пользователь загружается один раз (подзапросы
+получают его через принудительную аутентификацию DRF), последовательные
+подзапросы идут по тому же соединению с БД. С "parallel": true подзапросы
+выполняются в общем для воркера пуле потоков; каждый подзапрос берет свое
+соединение из пула БД и сразу после выполнения возвращает его. Потоков не
+больше MAX_WORKERS и не больше половины POOL['max_size'] (backend/db_pool),
+поэтому пакетные запросы всего воркера вместе не займут пул БД целиком.
+Ошибка одного подзапроса не прерывает остальные.
+"""
+
+import contextvars
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.db import connections
+from django.http import HttpRequest, QueryDict
+from django.urls import Resolver404, resolve
+from rest_framework import permissions, serializers, status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'MAX_REQUESTS': 20,
+    'MAX_WORKERS': 4,
+}
+
+# Служебные эндпоинты, которые нельзя вызывать из пакета
+EXCLUDED_URL_NAMES = {'batch', 'events-stream'}
+
+
+def get_batch_setting(name):
+    return getattr(settings, 'BATCH_API', {}).get(name, DEFAULTS[name])
+
+
+class SubRequestSerializer(serializers.Serializer):
+    id = serializers.CharField(max_length=100)
+    url = serializers.CharField(max_length=2000)
+
+
+class BatchSerializer(serializers.Serializer):
+    requests = SubRequestSerializer(many=True, allow_empty=False)
+    parallel = serializers.BooleanField(default=False)
+
+    def validate_requests(self, value):
+        limit = get_batch_setting('MAX_REQUESTS')
+        if len(value) > limit:
+            raise serializers.ValidationError('Не больше %d подзапросов в пакете.' % limit)
+        ids = [item['id'] for item in value]
+        if len(set(ids)) != len(ids):
+            raise serializers.ValidationError('ID подзапросов должны быть уникальны.')
+        return value
+
+
+def _error(item_id, status_code, detail):
+    return {'id': item_id, 'status': status_code, 'body': {'detail': detail}}
+
+
+def _sub_request(request, url):
+    parts = urlsplit(url)
+    sub = HttpRequest()
+    sub.method = 'GET'
+    sub.path = sub.path_info = parts.path
+    sub.META = {key: value for key, value in request.META.items() if key not in ('CONTENT_LENGTH', 'CONTENT_TYPE')}
+    sub.META.update(REQUEST_METHOD='GET', PATH_INFO=parts.path, QUERY_STRING=parts.query)
+    sub.GET = QueryDict(parts.query)
+    sub.COOKIES = request.COOKIES
+    # Пользователь уже аутентифицирован внешним запросом: DRF возьмет его без повторной проверки JWT
+    sub._force_auth_user = request.user
+    sub._force_auth_token = request.auth
+    return sub
+
+
+def execute(request, item):
+    """Выполняет один подзапрос, возвращает {"id", "status", "body"}."""
+    item_id, url = item['id'], item['url']
+    parts = urlsplit(url)
+    if parts.scheme or parts.netloc or not parts.path.startswith('/api/'):
+        return _error(item_id, status.HTTP_400_BAD_REQUEST, 'Ожидается путь API, начинающийся с /api/.')
+    try:
+        match = resolve(parts.path)
+    except Resolver404:
+        return _error(item_id, status.HTTP_404_NOT_FOUND, 'Не найдено.')
+    view_class = getattr(match.func, 'cls', None)
+    if match.url_name in EXCLUDED_URL_NAMES or view_class is None or not issubclass(view_class, APIView):
+        return _error(item_id, status.HTTP_400_BAD_REQUEST, 'Этот эндпоинт нельзя вызывать в пакете.')
+
+    try:
+        sub = _sub_request(request, url)
+        sub.resolver_match = match
+        response = match.func(sub, *match.args, **match.kwargs)
+    except Exception:
+        # Обычно DRF сам превращает исключения в ответы; сюда попадают только ошибки сервера
+        logger.exception('Ошибка подзапроса пакета %s', url)
+        return _error(item_id, status.HTTP_500_INTERNAL_SERVER_ERROR, 'Внутренняя ошибка сервера.')
+    body = getattr(response, 'data', None)
+    if body is None and response.status_code != status.HTTP_204_NO_CONTENT:
+        # Не DRF-ответ (например, файл): в пакете отдаем только статус
+        body = {'detail': 'Ответ нельзя включить в пакет.'}
+    return {'id': item_id, 'status': response.status_code, 'body': body}
+
+
+def _execute_in_thread(request, item):
+    try:
+        return execute(request, item)
+    finally:
+        # Поток живет дольше подзапроса: соединение возвращаем в пул БД после каждого
+        connections.close_all()
+
+
+def get_parallel_workers():
+    """Потоков для параллельных подзапросов на весь воркер."""
+    workers = get_batch_setting('MAX_WORKERS')
+    pool_size = settings.DATABASES['default'].get('POOL', {}).get('max_size')
+    if pool_size:
+        # Вторая половина пула остается обычным запросам (и самому пакетному)
+        workers = min(workers, pool_size // 2)
+    return max(workers, 1)
+
+
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor, _executor_pid
+    # Потоки не переживают fork, поэтому в каждом воркере свой пул
+    with _executor_lock:
+        if _executor is None or _executor_pid != os.getpid():
+            _executor_pid = os.getpid()
+            _executor = ThreadPoolExecutor(max_workers=get_parallel_workers(), thread_name_prefix='batch')
+        return _executor
+
+
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+def batch_view(request):
+    serializer = BatchSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    items = serializer.validated_data['requests']
+
+    if serializer.validated_data['parallel'] and len(items) > 1:
+        executor = _get_executor()
+        # Контекст копируется, чтобы время сериализации попало в Server-Timing внешнего запроса
+        futures = [
+            executor.submit(contextvars.copy_context().run, _execute_in_thread, request, item)
+            for item in items
+        ]
+        responses = [future.result() for future in futures]
+    else:
+        responses = [execute(request, item) for item in items]
+    return Response({'responses': responses})
@@ -0,0 +1,141 @@
+# backend/backend/bulk.py
+"""
+Массовые изменения через один UPDATE.
+
+BulkUpdateMixin добавляет во ViewSet действие POST .../bulk-update/:
+
+    {"ids": [1, 2, 3], "patch": {"status": "contacted"}}
+    {"filter": {"status": "new"}, "patch": {"status": "archived"}}
+
+Строки выбираются из того же queryset, что и список (get_queryset +
+filter_queryset), права проверяются одним выражением на весь набор
+(get_bulk_permission), значения фильтра приводятся полями модели,
+инварианты, которые обычно проверяет save(), - в validate_bulk_update,
+изменение применяется одним UPDATE в транзакции.
+В ответе - исход по каждому ID: updated, forbidden или not_found.
+"""
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import transaction
+from django.db.models import BooleanField, ExpressionWrapper, Value
+from django.dispatch import Signal
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+# Рассылается в транзакции массового UPDATE сразу после него (save() и post_save при этом
+# не вызываются): журнал sync и счетчики пишутся атомарно с изменением, а события
+# publish() и сброс кэша сами откладываются до коммита.
+# Аргументы: sender - модель, pks - список измененных ID, changes - примененные значения.
+bulk_updated = Signal()
+
+BULK_MAX_ROWS = 5000
+
+UPDATED, FORBIDDEN, NOT_FOUND = 'updated', 'forbidden', 'not_found'
+
+
+class BulkUpdateMixin:
+    # Поля, которые разрешено менять массово
+    bulk_update_fields = ()
+    # Поля, по которым можно выбрать строки вместо списка ID
+    bulk_filter_fields = ()
+
+    def get_bulk_permission(self):
+        """
+        Q-условие, которому должна удовлетворять строка, чтобы текущий
+        пользователь мог ее изменить. None - ограничений сверх прав на view нет.
+        """
+        return None
+
+    def validate_bulk_update(self, pks, changes):
+        """
+        Вызывается в транзакции после блокировки строк pks и до UPDATE.
+        Здесь проверяется то, что при обычном сохранении делает
+        perform_update (например, пересечения в расписании); исключение
+        отменяет изменение целиком.
+        """
+
+    def _get_bulk_filters(self, filters, model):
+        if not isinstance(filters, dict) or not filters:
+            raise ValidationError({'filter': ['Ожидается непустой объект.']})
+        unknown = set(filters) - set(self.bulk_filter_fields)
+        if unknown:
+            raise ValidationError({'filter': ['Нельзя фильтровать по: %s.' % ', '.join(sorted(unknown))]})
+        # Значения приводим полями модели: строка вместо ID или объект вместо значения дают 400, а не 500
+        errors, cleaned = {}, {}
+        for name, value in filters.items():
+            field = model._meta.get_field(name)
+            if value is None and field.null:
+                cleaned[name + '__isnull'] = True
+                continue
+            try:
+                if value is None or isinstance(value, (dict, list)):
+                    raise DjangoValidationError('invalid')
+                cleaned[name] = field.to_python(value)
+            except (DjangoValidationError, TypeError, ValueError):
+                errors[name] = ['Недопустимое значение.']
+        if errors:
+            raise ValidationError({'filter': errors})
+        return cleaned
+
+    def _get_bulk_targets(self, data, queryset):
+        ids = data.get('ids')
+        filters = data.get('filter')
+        if (ids is None) == (filters is None):
+            raise ValidationError({'detail': 'Нужно передать либо "ids", либо "filter".'})
+
+        if ids is not None:
+            if not isinstance(ids, list) or not all(isinstance(pk, int) for pk in ids):
+                raise ValidationError({'ids': ['Ожидается список целых ID.']})
+            if len(ids) > BULK_MAX_ROWS:
+                raise ValidationError({'ids': ['Не больше %d ID за один запрос.' % BULK_MAX_ROWS]})
+            return list(dict.fromkeys(ids)), queryset.filter(pk__in=ids)
+
+        return None, queryset.filter(**self._get_bulk_filters(filters, queryset.model))
+
+    def _get_bulk_changes(self, patch):
+        if not isinstance(patch, dict) or not patch:
+            raise ValidationError({'patch': ['Ожидается непустой объект.']})
+        unknown = set(patch) - set(self.bulk_update_fields)
+        if unknown:
+            raise ValidationError({'patch': ['Нельзя массово менять: %s.' % ', '.join(sorted(unknown))]})
+        # Значения проверяет тот же сериализатор, что и при обычном PATCH
+        serializer = self.get_serializer(data=patch, partial=True)
+        serializer.is_valid(raise_exception=True)
+        return {field: serializer.validated_data[field] for field in patch if field in serializer.validated_data}
+
+    @action(detail=False, methods=['post'], url_path='bulk-update')
+    def bulk_update(self, request, *args, **kwargs):
+        changes = self._get_bulk_changes(request.data.get('patch'))
+        requested_ids, targets = self._get_bulk_targets(request.data, self.filter_queryset(self.get_queryset()))
+
+        permission = self.get_bulk_permission()
+        allowed = Value(True) if permission is None else ExpressionWrapper(permission, output_field=BooleanField())
+
+        with transaction.atomic():
+            # Один SELECT: какие строки нашлись и на какие у пользователя есть права.
+            # Строки блокируются до UPDATE, чтобы исход не разошелся с результатом.
+            rows = list(
+                targets.order_by('pk')
+                .select_for_update(of=('self',))
+                .annotate(bulk_allowed=allowed)
+                .values_list('pk', 'bulk_allowed')[:BULK_MAX_ROWS + 1]
+            )
+            if len(rows) > BULK_MAX_ROWS:
+                raise ValidationError({'filter': ['Фильтр выбирает больше %d строк.' % BULK_MAX_ROWS]})
+
+            allowed_ids = [pk for pk, is_allowed in rows if is_allowed]
+            if allowed_ids:
+                self.validate_bulk_update(allowed_ids, changes)
+                model = targets.model
+                model.objects.filter(pk__in=allowed_ids).update(**changes)
+                bulk_updated.send(sender=model, pks=allowed_ids, changes=changes)
+
+        outcome = {pk: UPDATED if is_allowed else FORBIDDEN for pk, is_allowed in rows}
+        ids = requested_ids if requested_ids is not None else [pk for pk, _ in rows]
+        return Response({
+            'updated': len(allowed_ids),
+            'results': [{'id': pk, 'result': outcome.get(pk, NOT_FOUND)} for pk in ids],
+        }, status=status.HTTP_200_OK)
+
@@ -0,0 +1,19 @@
+# backend/backend/caches.py
+"""
+Общий ли кэш для всех воркеров.
+
+LocMemCache (и InstrumentedLocMemCache из backend/metrics.py) живет в памяти
+процесса: записи одного воркера другие не видят. Функции, которым нужно
+согласованное между воркерами состояние, проверяют кэш через is_shared() и
+без общего кэша (Redis, Memcached, база) выключаются или отказываются
+работать.
+"""
+
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+
+
+def is_shared(alias='default'):
+    # caches[alias], а не django.core.cache.cache: прокси не проходит isinstance
+    return not isinstance(caches[alias], (LocMemCache, DummyCache))
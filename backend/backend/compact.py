@@ -0,0 +1,113 @@
+# backend/compact.py
+"""
+Компактный (нормализованный) формат ответа, включается заголовком
+Accept: application/vnd.schooltester.compact+json (или ?format=compact).
+
+Связанные объекты, перечисленные в Meta.sideload сериализатора, выводятся
+один раз в карте included по типу и ID, а на их месте остаются ID:
+
+    {"data": [{"id": 1, "teacher": 7, "students": [12, 15], ...}, ...],
+     "included": {"users": {"7": {...}, "12": {...}, "15": {...}}}}
+
+Каждый связанный объект сериализуется один раз на ответ, поэтому размер
+и время сериализации уменьшаются пропорционально повторам (преподаватель
+на всех своих курсах, автор на всех постах). Обычный JSON не меняется.
+Сравнение размеров и времени - команда bench_compact.
+"""
+
+from django.db import models
+from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
+from rest_framework.settings import api_settings
+
+COMPACT_MEDIA_TYPE = 'application/vnd.schooltester.compact+json'
+
+
+class CompactJSONRenderer(JSONRenderer):
+    media_type = COMPACT_MEDIA_TYPE
+    format = 'compact'
+
+
+class Included:
+    """Связанные объекты ответа: {тип: {ID: представление}}."""
+
+    def __init__(self):
+        self.objects = {}
+
+    def add(self, type_name, instance, serializer):
+        objects = self.objects.setdefault(type_name, {})
+        if instance.pk not in objects:
+            objects[instance.pk] = serializer.to_representation(instance)
+        return instance.pk
+
+
+class SideloadedField(serializers.Field):
+    """Заменяет вложенный сериализатор (в том числе many=True) на ID, сам объект уходит в included."""
+
+    def __init__(self, type_name, serializer):
+        self.type_name = type_name
+        self.serializer = serializer
+        self.many = isinstance(serializer, serializers.ListSerializer)
+        super().__init__(source=serializer.source, read_only=True)
+
+    def bind(self, field_name, parent):
+        super().bind(field_name, parent)
+        # Вложенный сериализатор видит контекст корня (request для абсолютных URL файлов)
+        self.serializer.bind(field_name, self)
+
+    def to_representation(self, value):
+        included = self.context['included']
+        if not self.many:
+            return included.add(self.type_name, value, self.serializer)
+        instances = value.all() if isinstance(value, models.Manager) else value
+        return [included.add(self.type_name, instance, self.serializer.child) for instance in instances]
+
+
+class SideloadMixin:
+    """
+    Для сериализаторов с Meta.sideload = {поле: тип}: в компактном формате
+    эти вложенные сериализаторы заменяются на SideloadedField.
+    """
+
+    def get_fields(self):
+        fields = super().get_fields()
+        if self.context.get('included') is not None:
+            for name, type_name in self.Meta.sideload.items():
+                fields[name] = SideloadedField(type_name, fields[name])
+        return fields
+
+
+def compact_context(request):
+    """Контекст сериализатора: с included, если клиент запросил компактный формат."""
+    renderer = getattr(request, 'accepted_renderer', None)
+    if renderer is not None and renderer.format == CompactJSONRenderer.format:
+        return {'request': request, 'included': Included()}
+    return {'request': request}
+
+
+def compact_data(data, context):
+    """Обертка ответа {"data", "included"} для компактного формата, иначе data без изменений."""
+    included = context.get('included')
+    if included is None:
+        return data
+    return {'data': data, 'included': included.objects}
+
+
+# Для @renderer_classes функций-view
+COMPACT_RENDERER_CLASSES = [*api_settings.DEFAULT_RENDERER_CLASSES, CompactJSONRenderer]
+
+
+class CompactResponseMixin:
+    """Mixin для ViewSet: поддержка компактного формата во всех ответах с данными."""
+    renderer_classes = COMPACT_RENDERER_CLASSES
+
+    def get_serializer_context(self):
+        if not hasattr(self, '_compact_context'):
+            self._compact_context = compact_context(self.request)
+        return {**super().get_serializer_context(), **self._compact_context}
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        context = getattr(self, '_compact_context', {})
+        if context.get('included') is not None and response.status_code < 400 and response.data is not None:
+            response.data = compact_data(response.data, context)
+        return super().finalize_response(request, response, *args, **kwargs)
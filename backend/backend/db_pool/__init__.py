@@ -0,0 +1 @@
+from .pool import close_pools, pool_stats  # noqa
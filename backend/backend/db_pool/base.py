@@ -0,0 +1,59 @@
+# backend/backend/db_pool/base.py
+"""
+Бэкенд PostgreSQL с пулом соединений внутри воркера.
+
+Подключается через ENGINE = 'backend.db_pool' и ключ 'POOL' в настройках базы.
+Вместо открытия нового соединения (TCP + TLS + аутентификация) на каждый запрос
+Django берет соединение из пула, а при закрытии в конце запроса возвращает его
+обратно. Работает одинаково под WSGI и ASGI: соединения Django привязаны к
+потоку, а пул общий для всех потоков процесса.
+"""
+
+from functools import partial
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.postgresql.base import DatabaseWrapper as PostgresDatabaseWrapper
+from django.db.backends.postgresql.psycopg_any import IsolationLevel
+from django.utils.asyncio import async_unsafe
+
+from .pool import get_pool
+
+
+class DatabaseWrapper(PostgresDatabaseWrapper):
+
+    @property
+    def connection_pool(self):
+        pool_options = self.settings_dict.get('POOL')
+        if not pool_options:
+            return None
+        if self.settings_dict.get('CONN_MAX_AGE', 0) != 0:
+            raise ImproperlyConfigured(
+                "Пул соединений несовместим с CONN_MAX_AGE: соединения и так переиспользуются."
+            )
+        return get_pool(self.alias, {} if pool_options is True else pool_options)
+
+    @async_unsafe
+    def get_new_connection(self, conn_params):
+        pool = self.connection_pool
+        if pool is None:
+            return super().get_new_connection(conn_params)
+
+        # Родитель выставляет isolation_level только при открытии нового соединения,
+        # а соединение из пула могло быть открыто другим потоком.
+        isolation_level = self.settings_dict['OPTIONS'].get('isolation_level')
+        self.isolation_level = (
+            IsolationLevel.READ_COMMITTED if isolation_level is None else IsolationLevel(isolation_level)
+        )
+        return pool.getconn(partial(super().get_new_connection, conn_params))
+
+    def _close(self):
+        pool = self.connection_pool
+        if pool is None or self.connection is None:
+            return super()._close()
+        with self.wrap_database_errors:
+            if self.in_atomic_block:
+                # Обертка продолжит ссылаться на соединение до отката,
+                # поэтому вернуть его другим потокам нельзя.
+                pool.discard(self.connection)
+            else:
+                pool.putconn(self.connection)
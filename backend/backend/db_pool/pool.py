@@ -0,0 +1,237 @@
+# backend/backend/db_pool/pool.py
+
+import atexit
+import os
+import threading
+import time
+from collections import deque
+
+from psycopg2 import Error, OperationalError, extensions
+
+
+class PoolTimeout(OperationalError):
+    """Свободное соединение не появилось за отведенное время."""
+
+
+class ConnectionPool:
+    """
+    Потокобезопасный пул соединений psycopg2 внутри одного процесса (воркера).
+
+    min_size - сколько простаивающих соединений пул держит открытыми всегда,
+    max_size - верхняя граница открытых соединений,
+    timeout - сколько секунд ждать свободное соединение,
+    max_idle - через сколько секунд простоя лишние соединения закрываются,
+    ping_after - после скольких секунд простоя соединение проверяется SELECT 1
+    перед выдачей (0 - проверять всегда).
+    """
+
+    def __init__(self, min_size=1, max_size=10, timeout=5.0, max_idle=300.0, ping_after=30.0):
+        if max_size < 1 or min_size > max_size:
+            raise ValueError('Некорректные размеры пула: min_size=%s, max_size=%s' % (min_size, max_size))
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self.ping_after = ping_after
+
+        self._cond = threading.Condition()
+        # Простаивающие соединения: (соединение, время возврата). Берем с конца (LIFO),
+        # чтобы чаще использовались "теплые" соединения, а лишние дольше простаивали.
+        self._idle = deque()
+        self._size = 0
+        self._closed = False
+        self._counters = {
+            'checkouts': 0,
+            'waits': 0,
+            'timeouts': 0,
+            'wait_time_total': 0.0,
+            'connections_created': 0,
+            'connections_discarded': 0,
+            'ping_failures': 0,
+        }
+
+    def getconn(self, connect):
+        """
+        Выдает соединение из пула. connect - функция, открывающая новое
+        соединение, если свободных нет, а лимит еще не исчерпан.
+        """
+        deadline = time.monotonic() + self.timeout
+        while True:
+            conn, returned_at = self._reserve(deadline)
+            if conn is None:
+                try:
+                    conn = connect()
+                except BaseException:
+                    self._release_slot()
+                    raise
+                with self._cond:
+                    self._counters['connections_created'] += 1
+                    self._counters['checkouts'] += 1
+                return conn
+
+            idle_for = time.monotonic() - returned_at
+            if idle_for >= self.ping_after and not self._ping(conn):
+                with self._cond:
+                    self._counters['ping_failures'] += 1
+                self._discard(conn)
+                continue
+
+            with self._cond:
+                self._counters['checkouts'] += 1
+            return conn
+
+    def putconn(self, conn):
+        """Возвращает соединение в пул, откатывая незавершенную транзакцию."""
+        if conn.closed or self._closed:
+            self._discard(conn)
+            return
+        try:
+            if conn.info.transaction_status != extensions.TRANSACTION_STATUS_IDLE:
+                conn.rollback()
+        except Error:
+            self._discard(conn)
+            return
+
+        with self._cond:
+            self._idle.append((conn, time.monotonic()))
+            self._trim_idle()
+            self._cond.notify()
+
+    def discard(self, conn):
+        """Закрывает соединение, не возвращая его в пул (например, после ошибки)."""
+        self._discard(conn)
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            idle, self._idle = list(self._idle), deque()
+            self._size -= len(idle)
+            self._cond.notify_all()
+        for conn, _ in idle:
+            self._close_quietly(conn)
+
+    def stats(self):
+        with self._cond:
+            idle = len(self._idle)
+            return {
+                'min_size': self.min_size,
+                'max_size': self.max_size,
+                'size': self._size,
+                'idle': idle,
+                'in_use': self._size - idle,
+                **self._counters,
+            }
+
+    def _reserve(self, deadline):
+        # Возвращает (соединение, время возврата) или (None, None), если
+        # вызывающий код должен открыть новое соединение в занятом слоте.
+        with self._cond:
+            waited_since = None
+            while True:
+                if self._closed:
+                    raise OperationalError('Пул соединений закрыт.')
+                if self._idle:
+                    conn, returned_at = self._idle.pop()
+                    break
+                if self._size < self.max_size:
+                    self._size += 1
+                    conn, returned_at = None, None
+                    break
+
+                now = time.monotonic()
+                if waited_since is None:
+                    waited_since = now
+                    self._counters['waits'] += 1
+                remaining = deadline - now
+                if remaining <= 0:
+                    self._counters['timeouts'] += 1
+                    self._counters['wait_time_total'] += now - waited_since
+                    raise PoolTimeout(
+                        'Не удалось получить соединение из пула за %.1f с (max_size=%d).'
+                        % (self.timeout, self.max_size)
+                    )
+                self._cond.wait(remaining)
+
+            if waited_since is not None:
+                self._counters['wait_time_total'] += time.monotonic() - waited_since
+            return conn, returned_at
+
+    def _trim_idle(self):
+        # Вызывается под блокировкой. Самые старые соединения лежат в начале очереди.
+        now = time.monotonic()
+        while len(self._idle) > self.min_size and now - self._idle[0][1] > self.max_idle:
+            conn, _ = self._idle.popleft()
+            self._size -= 1
+            self._counters['connections_discarded'] += 1
+            self._close_quietly(conn)
+
+    def _release_slot(self):
+        with self._cond:
+            self._size -= 1
+            self._cond.notify()
+
+    def _discard(self, conn):
+        self._close_quietly(conn)
+        with self._cond:
+            self._size -= 1
+            self._counters['connections_discarded'] += 1
+            self._cond.notify()
+
+    @staticmethod
+    def _ping(conn):
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            if conn.info.transaction_status != extensions.TRANSACTION_STATUS_IDLE:
+                conn.rollback()
+        except Error:
+            return False
+        return True
+
+    @staticmethod
+    def _close_quietly(conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+
+# --- Реестр пулов процесса: по одному пулу на алиас базы ---
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(alias, options):
+    pool = _pools.get(alias)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(alias)
+            if pool is None:
+                pool = _pools[alias] = ConnectionPool(**options)
+    return pool
+
+
+def pool_stats():
+    """Статистика всех пулов текущего процесса, ключ - алиас базы."""
+    return {alias: pool.stats() for alias, pool in list(_pools.items())}
+
+
+def close_pools():
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close()
+
+
+def _forget_pools_after_fork():
+    # Сокеты, унаследованные от родителя (gunicorn --preload), принадлежат ему:
+    # дочерний воркер не закрывает их, а просто заводит свои пулы.
+    global _pools_lock
+    _pools.clear()
+    _pools_lock = threading.Lock()
+
+
+atexit.register(close_pools)
+os.register_at_fork(after_in_child=_forget_pools_after_fork)
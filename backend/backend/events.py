@@ -0,0 +1,277 @@
+# backend/events.py
+"""
+Серверные события для дашбордов вместо опроса.
+
+Код приложения публикует события в каналы через publish(); клиенты держат
+открытым GET /api/events/ (Server-Sent Events, нужен ASGI-сервер, см.
+backend/asgi.py) и получают события своих каналов:
+
+    admin           - для администраторов: новые заявки, смена статусов, запись на курсы;
+    user:<id>       - личные события пользователя (его запись на курсы);
+    course:<id>     - участникам курса: отмена уроков.
+
+EventSource в браузере не передает заголовки, поэтому браузер сначала
+получает одноразовый билет POST /api/events/ticket/ (с обычным JWT в
+заголовке) и подключается с ?ticket=: в логи и историю попадает билет,
+который живет TICKET_MAX_AGE секунд и годится только для этого потока.
+
+Доставка идет через хаб публикации/подписки (settings.EVENT_HUB):
+InProcessHub работает внутри одного процесса (разработка, тесты, один
+воркер), RedisHub - между процессами и серверами. Пока событий нет,
+открытое соединение не выполняет запросов к БД, только редкие keep-alive.
+"""
+
+import asyncio
+import itertools
+import json
+import logging
+import secrets
+import threading
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.core.cache import cache
+from django.core.handlers.asgi import ASGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils.module_loading import import_string
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+
+from backend.metrics import set_queue_depth
+
+logger = logging.getLogger(__name__)
+
+KEEPALIVE_INTERVAL = 15         # секунд
+SUBSCRIBER_QUEUE_SIZE = 100     # событий; медленный клиент теряет самые старые
+TICKET_MAX_AGE = 30             # секунд на подключение по билету
+TICKET_SALT = 'backend.events.ticket'
+
+
+class InProcessHub:
+    """
+    Подписчики - asyncio-очереди в циклах событий этого процесса. publish()
+    можно вызывать из любого потока (синхронные view, фоновые потоки).
+    """
+
+    def __init__(self):
+        self._subscribers = {}
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+
+    def publish(self, channels, event):
+        message = dict(event, id=next(self._ids))
+        with self._lock:
+            targets = [
+                (loop, queue) for (loop, queue, subscribed) in self._subscribers.values()
+                if subscribed.intersection(channels)
+            ]
+        for loop, queue in targets:
+            try:
+                loop.call_soon_threadsafe(_put_latest, queue, message)
+            except RuntimeError:
+                # Цикл уже закрыт - подписчик отвалился, подписку снимет finally в subscribe()
+                pass
+
+    async def subscribe(self, channels):
+        """Асинхронный итератор событий каналов channels."""
+        queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        key = object()
+        with self._lock:
+            self._subscribers[key] = (asyncio.get_running_loop(), queue, frozenset(channels))
+            set_queue_depth('event_subscribers', len(self._subscribers))
+        try:
+            while True:
+                yield await queue.get()
+        finally:
+            with self._lock:
+                self._subscribers.pop(key, None)
+                set_queue_depth('event_subscribers', len(self._subscribers))
+
+
+class RedisHub:
+    """Хаб на Redis pub/sub для нескольких воркеров; нужен пакет redis."""
+
+    def __init__(self, url=None):
+        import redis
+        import redis.asyncio
+        self.url = url or settings.EVENT_HUB_REDIS_URL
+        self._client = redis.Redis.from_url(self.url)
+        self._async_module = redis.asyncio
+
+    def publish(self, channels, event):
+        payload = json.dumps(event, cls=DjangoJSONEncoder)
+        for channel in channels:
+            self._client.publish('events:' + channel, payload)
+
+    async def subscribe(self, channels):
+        client = self._async_module.Redis.from_url(self.url)
+        pubsub = client.pubsub()
+        await pubsub.subscribe(*['events:' + channel for channel in channels])
+        try:
+            async for message in pubsub.listen():
+                if message['type'] == 'message':
+                    yield json.loads(message['data'])
+        finally:
+            await pubsub.aclose()
+            await client.aclose()
+
+
+def _put_latest(queue, message):
+    if queue.full():
+        queue.get_nowait()
+    queue.put_nowait(message)
+
+
+_hub = None
+_hub_lock = threading.Lock()
+
+
+def get_hub():
+    global _hub
+    if _hub is None:
+        with _hub_lock:
+            if _hub is None:
+                _hub = import_string(getattr(settings, 'EVENT_HUB', 'backend.events.InProcessHub'))()
+    return _hub
+
+
+def publish(channels, event_type, **data):
+    """Публикует событие после коммита текущей транзакции (откат - события нет)."""
+    event = {'type': event_type, 'data': data}
+
+    def send():
+        try:
+            get_hub().publish(list(channels), event)
+        except Exception:
+            # Недоступный брокер не должен ломать запрос, который событие породил
+            logger.exception('Не удалось опубликовать событие %s', event_type)
+
+    transaction.on_commit(send)
+
+
+def _format(message):
+    data = json.dumps(message.get('data', {}), cls=DjangoJSONEncoder, ensure_ascii=False)
+    lines = ['event: %s' % message['type'], 'data: %s' % data]
+    if 'id' in message:
+        lines.insert(0, 'id: %s' % message['id'])
+    return '\n'.join(lines) + '\n\n'
+
+
+def issue_ticket(user):
+    """Подписанный билет на подключение к потоку событий от имени user."""
+    return signing.dumps({'user': user.pk, 'nonce': secrets.token_urlsafe(8)}, salt=TICKET_SALT)
+
+
+def _redeem_ticket(ticket):
+    try:
+        payload = signing.loads(ticket, salt=TICKET_SALT, max_age=TICKET_MAX_AGE)
+    except signing.BadSignature:
+        return None
+    # Билет одноразовый: повтор из лога или истории браузера не пройдет
+    if not cache.add('events-ticket:%s' % payload['nonce'], True, TICKET_MAX_AGE):
+        return None
+    return get_user_model().objects.filter(pk=payload['user']).first()
+
+
+def _authenticate(request):
+    ticket = request.GET.get('ticket')
+    if ticket:
+        return _redeem_ticket(ticket)
+    header = request.headers.get('Authorization', '')
+    if not header.startswith('Bearer '):
+        return None
+    authentication = JWTAuthentication()
+    try:
+        return authentication.get_user(authentication.get_validated_token(header[7:]))
+    except (AuthenticationFailed, InvalidToken, TokenError):
+        return None
+
+
+def _channels_for(user):
+    from courses.models import Course
+    from users.models import Profile
+
+    channels = {'user:%s' % user.pk}
+    if user.is_staff:
+        channels.add('admin')
+    if user.role == 'teacher':
+        course_ids = Course.objects.filter(teacher_id=user.pk).values_list('id', flat=True)
+    else:
+        course_ids = set(Profile.enrolled_courses.through.objects.filter(profile__user_id=user.pk).values_list('course_id', flat=True))
+        course_ids |= set(Course.students.through.objects.filter(user_id=user.pk).values_list('course_id', flat=True))
+    channels.update('course:%s' % course_id for course_id in course_ids)
+    return channels
+
+
+async def _stream(channels):
+    subscription = get_hub().subscribe(channels)
+    # Клиент переподключается через 5 секунд после обрыва
+    yield 'retry: 5000\n\n'
+    pending = None
+    try:
+        while True:
+            if pending is None:
+                pending = asyncio.ensure_future(subscription.__anext__())
+            done, _ = await asyncio.wait({pending}, timeout=KEEPALIVE_INTERVAL)
+            if not done:
+                yield ': keep-alive\n\n'
+                continue
+            message, pending = pending.result(), None
+            yield _format(message)
+    finally:
+        # Клиент отключился: снимаем подписку, иначе хаб продолжит копить для него события
+        if pending is not None:
+            pending.cancel()
+            try:
+                await pending
+            except (asyncio.CancelledError, StopAsyncIteration):
+                pass
+        await subscription.aclose()
+
+
+def _connect(request):
+    """Пользователь и его каналы; None, если подключаться нельзя."""
+    try:
+        user = _authenticate(request)
+        if user is None or not user.is_active:
+            return None
+        return _channels_for(user)
+    finally:
+        # Поток открыт часами, а request_finished придет только при его закрытии:
+        # соединение возвращаем в пул сразу, иначе каждая вкладка держит его все это время
+        connection.close()
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def events_ticket_view(request):
+    """POST /api/events/ticket/ - одноразовый билет для ?ticket= в GET /api/events/."""
+    return Response({'ticket': issue_ticket(request.user), 'expires_in': TICKET_MAX_AGE})
+
+
+async def events_stream_view(request):
+    """GET /api/events/ - поток событий для текущего пользователя (text/event-stream)."""
+    if not isinstance(request, ASGIRequest):
+        # Под WSGI бесконечный асинхронный поток читается синхронно и навсегда занимает поток воркера
+        return JsonResponse(
+            {'detail': 'Поток событий работает только под ASGI: запустите backend.asgi (см. backend/asgi.py).'},
+            status=501,
+        )
+    # Пользователь и его курсы читаются один раз при подключении
+    channels = await sync_to_async(_connect)(request)
+    if channels is None:
+        return JsonResponse({'detail': 'Учетные данные не были предоставлены.'}, status=401)
+
+    response = StreamingHttpResponse(_stream(channels), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # nginx не должен буферизовать поток
+    response['X-Accel-Buffering'] = 'no'
+    return response
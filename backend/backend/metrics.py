@@ -0,0 +1,229 @@
+# backend/backend/metrics.py
+"""
+Метрики приложения в формате Prometheus (эндпоинт /metrics).
+
+Счетчики prometheus_client обновляются без общих блокировок между процессами.
+Если воркеров несколько (gunicorn), задайте переменную окружения
+PROMETHEUS_MULTIPROC_DIR - каждый процесс будет писать значения в свои
+mmap-файлы, а /metrics просуммирует их. В gunicorn.conf.py при этом нужен хук:
+
+    def child_exit(server, worker):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
+"""
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache.backends.db import DatabaseCache
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.cache.backends.memcached import PyMemcacheCache
+from django.core.cache.backends.redis import RedisCache
+from django.http import Http404, HttpResponse
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+from backend.db_pool import pool_stats
+
+REQUEST_LATENCY = Histogram(
+    'http_request_duration_seconds',
+    'Время обработки запроса по view',
+    ['view', 'method'],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+RESPONSES = Counter(
+    'http_responses_total',
+    'Ответы по view и коду статуса',
+    ['view', 'method', 'status'],
+)
+REQUEST_QUERIES = Histogram(
+    'http_request_db_queries',
+    'Число SQL-запросов на один HTTP-запрос',
+    ['view'],
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100, 200),
+)
+REQUEST_DB_TIME = Histogram(
+    'http_request_db_seconds',
+    'Время в БД на один HTTP-запрос',
+    ['view'],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+CACHE_REQUESTS = Counter(
+    'cache_requests_total',
+    'Обращения к кэшу: result=hit|miss',
+    ['cache', 'result'],
+)
+QUEUE_DEPTH = Gauge(
+    'queue_depth',
+    'Текущая длина внутренних очередей',
+    ['queue'],
+    multiprocess_mode='livesum',
+)
+DB_POOL_CONNECTIONS = Gauge(
+    'db_pool_connections',
+    'Соединения в пуле БД по состоянию',
+    ['database', 'state'],
+    multiprocess_mode='livesum',
+)
+DB_POOL_EVENTS = Gauge(
+    'db_pool_events',
+    'Накопленные события пула БД живых воркеров (checkouts, waits, timeouts)',
+    ['database', 'event'],
+    multiprocess_mode='livesum',
+)
+
+
+def set_queue_depth(queue, depth):
+    """Обновляет длину очереди; вызывается кодом, который владеет очередью."""
+    QUEUE_DEPTH.labels(queue).set(depth)
+
+
+def view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return '<unresolved>'
+    # ViewSet.as_view() и @api_view сохраняют класс в func.cls;
+    # для @api_view его имя совпадает с именем функции.
+    func = getattr(match.func, 'cls', match.func)
+    return getattr(func, '__name__', match.view_name or '<unknown>')
+
+
+def _update_pool_gauges():
+    for alias, stats in pool_stats().items():
+        DB_POOL_CONNECTIONS.labels(alias, 'in_use').set(stats['in_use'])
+        DB_POOL_CONNECTIONS.labels(alias, 'idle').set(stats['idle'])
+        for event in ('checkouts', 'waits', 'timeouts'):
+            DB_POOL_EVENTS.labels(alias, event).set(stats[event])
+
+
+class MetricsMiddleware:
+    """
+    Записывает латентность, статус и число SQL-запросов для каждого запроса.
+    Должен стоять перед RequestProfilingMiddleware, чтобы видеть итог его таймеров.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        started = time.perf_counter()
+        response = self.get_response(request)
+        self._record(request, response, time.perf_counter() - started)
+        return response
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        response = await self.get_response(request)
+        self._record(request, response, time.perf_counter() - started)
+        return response
+
+    def _record(self, request, response, duration):
+        name = view_name(request)
+        REQUEST_LATENCY.labels(name, request.method).observe(duration)
+        RESPONSES.labels(name, request.method, str(response.status_code)).inc()
+        timings = getattr(request, 'timings', None)
+        if timings is not None:
+            REQUEST_QUERIES.labels(name).observe(timings.queries)
+            REQUEST_DB_TIME.labels(name).observe(timings.db)
+        _update_pool_gauges()
+
+
+class CacheMetricsMixin:
+    """
+    Примесь к бэкенду кэша: считает попадания и промахи get()/get_many() для
+    cache_requests_total. Бэкенды по-разному реализуют одно через другое
+    (BaseCache.get_many вызывает get(), DatabaseCache.get - get_many()),
+    поэтому считается только внешний вызов.
+
+    Метка cache - ключ METRICS_NAME в настройках кэша (Django пропускает
+    незнакомые ключи), иначе имя бэкенда: LOCATION в метку не попадает,
+    в нем может быть пароль Redis.
+    """
+
+    _missing = object()
+    backend_name = None
+
+    def __init__(self, location, params):
+        super().__init__(location, params)
+        self._metrics_name = params.get('METRICS_NAME') or self.backend_name
+        self._metrics_depth = threading.local()
+
+    def _count(self, hits, misses):
+        if hits:
+            CACHE_REQUESTS.labels(self._metrics_name, 'hit').inc(hits)
+        if misses:
+            CACHE_REQUESTS.labels(self._metrics_name, 'miss').inc(misses)
+
+    @contextmanager
+    def _outer_call(self):
+        depth = getattr(self._metrics_depth, 'value', 0)
+        self._metrics_depth.value = depth + 1
+        try:
+            yield depth == 0
+        finally:
+            self._metrics_depth.value = depth
+
+    def get(self, key, default=None, version=None):
+        with self._outer_call() as outer:
+            value = super().get(key, self._missing, version)
+        hit = value is not self._missing
+        if outer:
+            self._count(int(hit), int(not hit))
+        return value if hit else default
+
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        with self._outer_call() as outer:
+            found = super().get_many(keys, version)
+        if outer:
+            self._count(len(found), len(keys) - len(found))
+        return found
+
+
+def instrumented(backend_class):
+    """Бэкенд кэша backend_class со счетчиками попаданий и промахов."""
+    return type('Instrumented' + backend_class.__name__, (CacheMetricsMixin, backend_class), {
+        '__module__': __name__,
+        'backend_name': backend_class.__name__,
+        '__doc__': '%s, считающий попадания и промахи для cache_requests_total.' % backend_class.__name__,
+    })
+
+
+# Для CACHES[...]['BACKEND']; общий кэш - InstrumentedRedisCache или InstrumentedPyMemcacheCache
+InstrumentedLocMemCache = instrumented(LocMemCache)
+InstrumentedRedisCache = instrumented(RedisCache)
+InstrumentedPyMemcacheCache = instrumented(PyMemcacheCache)
+InstrumentedDatabaseCache = instrumented(DatabaseCache)
+InstrumentedFileBasedCache = instrumented(FileBasedCache)
+
+
+def metrics_view(request):
+    allowed = getattr(settings, 'METRICS_ALLOWED_IPS', None)
+    if allowed is not None and request.META.get('REMOTE_ADDR') not in allowed:
+        raise Http404
+
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return HttpResponse(generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
@@ -1,3 +1,5 @@
+from django.db.models import F, Q
+from rest_framework.filters import BaseFilterBackend
 from rest_framework.permissions import BasePermission, SAFE_METHODS
 
 class IsAdminOrReadOnly(BasePermission):
@@ -11,13 +13,78 @@ class IsTeacherOfCourseOrAdmin(BasePermission):
     def has_object_permission(self, request, view, obj):
         if request.user and request.user.is_staff:
             return True
-        if hasattr(obj, 'course'):
-            return obj.course.teacher == request.user
-        return obj.teacher == request.user
+        # ID преподавателя сравниваем без загрузки курса и пользователя:
+        # CourseAccessFilter уже подтянул его в course_teacher_id тем же запросом
+        if hasattr(obj, 'course_teacher_id'):
+            return obj.course_teacher_id == request.user.pk
+        if hasattr(obj, 'course_id'):
+            return obj.course.teacher_id == request.user.pk
+        return obj.teacher_id == request.user.pk
+
+class IsCourseTeacherOrReadOnly(IsTeacherOfCourseOrAdmin):
+    """
+    Для строк, уже отобранных CourseAccessFilter: читать объект может любой,
+    кого пропустил фильтр (участник курса), менять - преподаватель курса или администратор.
+    """
+    def has_object_permission(self, request, view, obj):
+        if request.method in SAFE_METHODS:
+            return True
+        return super().has_object_permission(request, view, obj)
 
 class IsTeacher(BasePermission):
     """
     Allows access only to users with the 'teacher' role.
     """
     def has_permission(self, request, view):
-        return bool(request.user and request.user.is_authenticated and request.user.role == 'teacher')
\ No newline at end of file
+        return bool(request.user and request.user.is_authenticated and request.user.role == 'teacher')
+
+
+def course_access_q(user, course_lookup='', write=False):
+    """
+    Условие на строки, связанные с курсом, которые доступны пользователю:
+    администратору - все, преподавателю - строки своих курсов, ученику -
+    строки курсов, на которые он записан (только чтение).
+
+    course_lookup - путь от модели до Course ('' для самого курса, 'course' для урока).
+    Возвращает None, если ограничений нет.
+    """
+    from courses.models import Course
+    from users.models import Profile
+
+    if user.is_staff:
+        return None
+    if not user.is_authenticated:
+        return Q(pk__in=[])
+
+    prefix = course_lookup + '__' if course_lookup else ''
+    condition = Q(**{prefix + 'teacher_id': user.pk})
+    if not write:
+        # Запись на курс хранится в двух связях; подзапросы вместо JOIN не плодят дубли строк
+        profile_courses = Profile.enrolled_courses.through.objects.filter(profile__user_id=user.pk).values('course_id')
+        student_courses = Course.students.through.objects.filter(user_id=user.pk).values('course_id')
+        condition |= Q(**{prefix + 'pk__in': profile_courses}) | Q(**{prefix + 'pk__in': student_courses})
+    return condition
+
+
+class CourseAccessFilter(BaseFilterBackend):
+    """
+    Переносит правила доступа к курсу в WHERE запроса: список возвращает
+    только разрешенные строки, а чужой объект на detail-маршруте дает 404.
+    Безопасные методы доступны участникам курса, остальные - его преподавателю.
+
+    Во ViewSet задаются course_lookup (см. course_access_q) и, для публичного
+    каталога, course_access_public_read = True.
+    ID преподавателя добавляется в выборку как course_teacher_id, чтобы
+    IsTeacherOfCourseOrAdmin проверял объект без дополнительных запросов.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        course_lookup = getattr(view, 'course_lookup', '')
+        write = request.method not in SAFE_METHODS
+        if course_lookup:
+            queryset = queryset.annotate(course_teacher_id=F(course_lookup + '__teacher_id'))
+
+        if not write and getattr(view, 'course_access_public_read', False):
+            return queryset
+        condition = course_access_q(request.user, course_lookup, write=write)
+        return queryset if condition is None else queryset.filter(condition)
@@ -0,0 +1,242 @@
+# backend/backend/profiling.py
+"""
+Инструментирование запросов: время в БД и число запросов, время сериализации
+и рендера. Итог отдается в заголовке Server-Timing, медленные запросы пишутся
+в отдельный ротируемый лог вместе с SQL и (для сэмплированных) профилем cProfile.
+"""
+
+import contextvars
+import cProfile
+import io
+import logging
+import pstats
+import random
+import time
+from contextlib import contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from rest_framework import serializers
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+logger = logging.getLogger('backend.slow_requests')
+
+DEFAULTS = {
+    'SERVER_TIMING': True,
+    # Запросы дольше этого порога пишутся в лог медленных запросов
+    'SLOW_REQUEST_MS': 500,
+    # Доля запросов, которые выполняются под cProfile (профиль попадает в лог, если запрос медленный)
+    'PROFILE_SAMPLE_RATE': 0.01,
+    # Заголовок, которым администратор включает полное профилирование одного запроса
+    'PROFILE_HEADER': 'X-Profile',
+    # Сколько SQL-запросов сохранять для лога
+    'MAX_LOGGED_QUERIES': 50,
+    'PROFILE_LINES': 30,
+}
+
+# Таймеры текущего запроса. Сериализаторы DRF пишут сюда свое время (см. _timed_data).
+current_timings = contextvars.ContextVar('request_timings', default=None)
+
+
+def get_profiling_setting(name):
+    return getattr(settings, 'REQUEST_PROFILING', {}).get(name, DEFAULTS[name])
+
+
+class RequestTimings:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.db = 0.0
+        self.queries = 0
+        self.serializer = 0.0
+        self.render = 0.0
+        self.total = 0.0
+        # (длительность, SQL) первых запросов - для лога медленных запросов
+        self.sql = []
+
+    def server_timing(self):
+        return ', '.join([
+            'db;dur=%.1f;desc="%d queries"' % (self.db * 1000, self.queries),
+            'serializer;dur=%.1f' % (self.serializer * 1000),
+            'render;dur=%.1f' % (self.render * 1000),
+            'total;dur=%.1f' % (self.total * 1000),
+        ])
+
+
+def _time_query(execute, sql, params, many, context):
+    """Обертка execute_wrappers: считает время и число SQL-запросов в таймеры текущего запроса."""
+    timings = current_timings.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duration = time.perf_counter() - started
+        timings.db += duration
+        timings.queries += 1
+        if len(timings.sql) < get_profiling_setting('MAX_LOGGED_QUERIES'):
+            timings.sql.append((duration, sql))
+
+
+def _install_query_timer(sender=None, connection=None, **kwargs):
+    # Обертка стоит на соединении постоянно, а запрос находит по current_timings:
+    # под ASGI view выполняется в другом потоке со своими соединениями, но в том же контексте
+    if _time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_time_query)
+
+
+def _instrument_connections():
+    connection_created.connect(_install_query_timer, dispatch_uid='profiling-query-timer')
+    # Соединения, открытые до подключения сигнала
+    for connection in connections.all(initialized_only=True):
+        _install_query_timer(connection=connection)
+
+
+def _timed_data(fget):
+    def data(self):
+        timings = current_timings.get()
+        # Время считаем только для внешнего сериализатора: вложенные
+        # вызываются через to_representation и уже входят в него.
+        if timings is None or hasattr(self, '_data'):
+            return fget(self)
+        started = time.perf_counter()
+        try:
+            return fget(self)
+        finally:
+            timings.serializer += time.perf_counter() - started
+    data._profiled = True
+    return data
+
+
+def _instrument_serializers():
+    fget = serializers.BaseSerializer.data.fget
+    if not getattr(fget, '_profiled', False):
+        serializers.BaseSerializer.data = property(_timed_data(fget))
+
+
+class RequestProfilingMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+        _instrument_serializers()
+        _instrument_connections()
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        forced = self._profiling_requested(request)
+        sampled = forced or random.random() < get_profiling_setting('PROFILE_SAMPLE_RATE')
+        with self._instrumented(request, sampled) as profiler:
+            response = self.get_response(request)
+        return self._finish(request, response, forced, profiler)
+
+    async def __acall__(self, request):
+        forced = False
+        if request.headers.get(get_profiling_setting('PROFILE_HEADER')):
+            # Проверка пользователя читает БД, поэтому только при переданном заголовке
+            forced = await sync_to_async(self._profiling_requested)(request)
+        # Без случайного сэмплирования: в цикле событий профиль смешал бы
+        # параллельные запросы, и даже профиль по заголовку их включает
+        with self._instrumented(request, forced) as profiler:
+            response = await self.get_response(request)
+        return self._finish(request, response, forced, profiler)
+
+    @contextmanager
+    def _instrumented(self, request, sampled):
+        timings = RequestTimings()
+        request.timings = timings
+        token = current_timings.set(timings)
+
+        profiler = self._start_profiler() if sampled else None
+        try:
+            yield profiler
+        finally:
+            if profiler:
+                profiler.disable()
+            current_timings.reset(token)
+
+    def _finish(self, request, response, forced, profiler):
+        timings = request.timings
+        timings.total = time.perf_counter() - timings.started
+        if get_profiling_setting('SERVER_TIMING') or forced:
+            response['Server-Timing'] = timings.server_timing()
+
+        if forced or timings.total * 1000 >= get_profiling_setting('SLOW_REQUEST_MS'):
+            self._log(request, response, timings, profiler)
+        return response
+
+    def process_template_response(self, request, response):
+        # DRF Response рендерится обработчиком Django уже после выхода из view,
+        # поэтому подменяем render() на версию с таймером.
+        timings = getattr(request, 'timings', None)
+        if timings is None:
+            return response
+        render = response.render
+
+        def timed_render():
+            started = time.perf_counter()
+            try:
+                return render()
+            finally:
+                timings.render += time.perf_counter() - started
+
+        response.render = timed_render
+        return response
+
+    @staticmethod
+    def _start_profiler():
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Начиная с Python 3.12 профилировщик один на процесс: если другой
+            # поток уже профилирует свой запрос, этот запрос пропускаем.
+            return None
+        return profiler
+
+    def _profiling_requested(self, request):
+        header = get_profiling_setting('PROFILE_HEADER')
+        if not request.headers.get(header):
+            return False
+        # API аутентифицируется по JWT, который middleware сам не разбирает,
+        # поэтому проверяем токен здесь - только когда заголовок передан.
+        user = getattr(request, 'user', None)
+        if user is None or not user.is_authenticated:
+            try:
+                result = JWTAuthentication().authenticate(request)
+            except AuthenticationFailed:
+                return False
+            user = result[0] if result else None
+        return bool(user and user.is_staff)
+
+    def _log(self, request, response, timings, profiler):
+        lines = [
+            '%s %s -> %s in %.1fms (db %.1fms / %d queries, serializer %.1fms, render %.1fms)' % (
+                request.method,
+                request.get_full_path(),
+                response.status_code,
+                timings.total * 1000,
+                timings.db * 1000,
+                timings.queries,
+                timings.serializer * 1000,
+                timings.render * 1000,
+            )
+        ]
+        for duration, sql in timings.sql:
+            lines.append('  [%.1fms] %s' % (duration * 1000, sql))
+        if timings.queries > len(timings.sql):
+            lines.append('  ... и еще %d запросов' % (timings.queries - len(timings.sql)))
+        if profiler:
+            stream = io.StringIO()
+            pstats.Stats(profiler, stream=stream).sort_stats('cumulative').print_stats(
+                get_profiling_setting('PROFILE_LINES')
+            )
+            lines.append(stream.getvalue())
+        logger.warning('\n'.join(lines))
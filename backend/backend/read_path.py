@@ -0,0 +1,185 @@
+# backend/backend/read_path.py
+"""
+Быстрый путь чтения для больших read-only списков.
+
+ModelSerializer создает экземпляр модели на каждую строку и для каждого поля
+вызывает get_attribute/to_representation через несколько уровней абстракции.
+ReadPath один раз разбирает сериализатор, выбирает из БД только нужные колонки
+через values() и собирает из них обычные dict с теми же ключами и форматами.
+Исходный сериализатор остается эталоном: форматирование значений делают его же
+поля. Совпадение путей проверяют тесты приложений (tests.py), а команда
+bench_read_path сверяет их на реальных данных и сравнивает скорость.
+"""
+
+import time
+
+from django.core.exceptions import FieldDoesNotExist, ImproperlyConfigured
+from rest_framework import serializers
+from rest_framework.relations import ManyRelatedField, PrimaryKeyRelatedField
+from rest_framework.response import Response
+
+from backend.profiling import current_timings
+
+# Поля, значение которых нельзя получить из одной колонки values()
+_UNSUPPORTED_FIELDS = (
+    serializers.SerializerMethodField,
+    serializers.FileField,
+    serializers.HiddenField,
+    serializers.ListSerializer,
+)
+
+
+class _Node:
+    """Скомпилированный сериализатор: модель, префикс lookup'ов и план полей."""
+
+    def __init__(self, serializer, model, prefix=''):
+        self.model = model
+        self.pk_lookup = prefix + 'pk'
+        self.plan = []
+        self.many = []
+
+        for field in serializer.fields.values():
+            if field.write_only:
+                continue
+            name, source = field.field_name, field.source
+            if source == '*' or '.' in source or isinstance(field, _UNSUPPORTED_FIELDS):
+                raise ImproperlyConfigured(
+                    '%s.%s не поддерживается быстрым путем чтения.' % (type(serializer).__name__, name)
+                )
+
+            model_field = self._get_model_field(serializer, source)
+            if isinstance(field, ManyRelatedField):
+                if not isinstance(field.child_relation, PrimaryKeyRelatedField) or not model_field.many_to_many:
+                    raise ImproperlyConfigured(
+                        '%s.%s: поддерживаются только M2M-поля со списком ID.' % (type(serializer).__name__, name)
+                    )
+                self.many.append((name, model_field))
+                self.plan.append(('many', name, model_field))
+            elif isinstance(field, PrimaryKeyRelatedField):
+                self.plan.append(('value', name, prefix + source, None))
+            elif isinstance(field, serializers.BaseSerializer):
+                child = _Node(field, model_field.related_model, prefix + source + '__')
+                self.plan.append(('nested', name, child))
+            else:
+                if model_field.is_relation:
+                    raise ImproperlyConfigured(
+                        '%s.%s: связь без вложенного сериализатора.' % (type(serializer).__name__, name)
+                    )
+                self.plan.append(('value', name, prefix + source, field))
+
+    def _get_model_field(self, serializer, source):
+        try:
+            return self.model._meta.get_field(source)
+        except FieldDoesNotExist:
+            raise ImproperlyConfigured(
+                '%s.%s: у модели %s нет такого поля.' % (type(serializer).__name__, source, self.model.__name__)
+            )
+
+    def lookups(self):
+        result = [self.pk_lookup]
+        for item in self.plan:
+            if item[0] == 'value':
+                result.append(item[2])
+            elif item[0] == 'nested':
+                result.extend(item[2].lookups())
+        return result
+
+    def load_many(self, rows):
+        """
+        Одним запросом на каждое M2M-поле собирает списки ID для всех строк.
+        Возвращает {(узел, имя поля): {pk владельца: [ID, ...]}}.
+        """
+        related = {}
+        if self.many:
+            owner_ids = {row[self.pk_lookup] for row in rows if row[self.pk_lookup] is not None}
+            for name, model_field in self.many:
+                through = model_field.remote_field.through
+                owner_column = model_field.m2m_field_name() + '_id'
+                target_column = model_field.m2m_reverse_field_name() + '_id'
+                ids = {owner_id: [] for owner_id in owner_ids}
+                pairs = (
+                    through.objects.filter(**{owner_column + '__in': owner_ids})
+                    .order_by('pk')
+                    .values_list(owner_column, target_column)
+                )
+                for owner_id, target_id in pairs:
+                    ids[owner_id].append(target_id)
+                related[self, name] = ids
+        for item in self.plan:
+            if item[0] == 'nested':
+                related.update(item[2].load_many(rows))
+        return related
+
+    def build(self, row, related):
+        pk = row[self.pk_lookup]
+        if pk is None:
+            return None
+        data = {}
+        for item in self.plan:
+            kind, name = item[0], item[1]
+            if kind == 'value':
+                value = row[item[2]]
+                field = item[3]
+                data[name] = value if value is None or field is None else field.to_representation(value)
+            elif kind == 'nested':
+                data[name] = item[2].build(row, related)
+            else:
+                data[name] = related[self, name][pk]
+        return data
+
+
+class ReadPath:
+    """
+    Быстрое представление списка для сериализатора serializer_class.
+
+    project(queryset) превращает queryset в values() с нужными колонками
+    (его можно пагинировать как обычно), to_representation(rows) собирает
+    из строк список dict, совпадающий с serializer_class(many=True).data.
+    """
+
+    def __init__(self, serializer_class):
+        self.serializer_class = serializer_class
+        serializer = serializer_class()
+        self._root = _Node(serializer, serializer.Meta.model)
+        self._lookups = list(dict.fromkeys(self._root.lookups()))
+
+    def project(self, queryset):
+        return queryset.select_related(None).prefetch_related(None).values(*self._lookups)
+
+    def to_representation(self, rows):
+        started = time.perf_counter()
+        rows = list(rows)
+        related = self._root.load_many(rows)
+        data = [self._root.build(row, related) for row in rows]
+        timings = current_timings.get()
+        if timings is not None:
+            timings.serializer += time.perf_counter() - started
+        return data
+
+    def serialize(self, queryset):
+        return self.to_representation(self.project(queryset))
+
+
+_read_paths = {}
+
+
+def get_read_path(serializer_class):
+    read_path = _read_paths.get(serializer_class)
+    if read_path is None:
+        read_path = _read_paths[serializer_class] = ReadPath(serializer_class)
+    return read_path
+
+
+class FastListMixin:
+    """
+    Mixin для ViewSet/ListAPIView: list() отдает данные через ReadPath
+    вместо get_serializer(many=True). Фильтры и пагинация работают как прежде.
+    """
+
+    def list(self, request, *args, **kwargs):
+        read_path = get_read_path(self.get_serializer_class())
+        rows = read_path.project(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(read_path.to_representation(page))
+        return Response(read_path.to_representation(rows))
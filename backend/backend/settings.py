@@ -1,6 +1,8 @@
 # backend/backend/settings.py
 from pathlib import Path
 
+from corsheaders.defaults import default_headers
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -21,6 +23,9 @@ CORS_ALLOWED_ORIGINS = [
     "http://127.0.0.1:5173",
     "http://10.0.0.50:5173", # <-- Убедитесь, что эта строка есть
 ]
+# Повторы POST по таймауту передают Idempotency-Key (idempotency/decorators.py)
+CORS_ALLOW_HEADERS = (*default_headers, 'idempotency-key')
+CORS_EXPOSE_HEADERS = ['Idempotent-Replayed']
 
 CSRF_TRUSTED_ORIGINS = [
     'http://localhost:5173',
@@ -52,6 +57,13 @@ INSTALLED_APPS = [
     'applications.apps.ApplicationsConfig',
     'reviews.apps.ReviewsConfig',
     'system_settings.apps.SystemSettingsConfig', 
+    'exports.apps.ExportsConfig',
+    'attendance.apps.AttendanceConfig',
+    'media_files.apps.MediaFilesConfig',
+    'homework.apps.HomeworkConfig',
+    'announcements.apps.AnnouncementsConfig',
+    'sync.apps.SyncConfig',
+    'idempotency.apps.IdempotencyConfig',
 ]
 
 
@@ -62,6 +74,9 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'backend.metrics.MetricsMiddleware', # Метрики Prometheus, должен стоять перед профилированием
+    'backend.profiling.RequestProfilingMiddleware', # Server-Timing и лог медленных запросов
+    'users.activity.ActivityMiddleware', # Отметки активности для last_login, пишутся пачками
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -91,14 +106,40 @@ WSGI_APPLICATION = 'backend.wsgi.application'
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        'ENGINE': 'backend.db_pool', # PostgreSQL с пулом соединений
         'NAME': 'munificenschool',
         'USER': 'schooladmin',
         'PASSWORD': '235689qW#', # Замените на ваш пароль
         'HOST': 'localhost', # Или адрес вашего сервера БД
         'PORT': '5432',      # Стандартный порт PostgreSQL
+        # Соединения берутся из пула воркера и возвращаются в него в конце запроса,
+        # поэтому CONN_MAX_AGE должен оставаться 0 (см. backend/db_pool).
+        'CONN_MAX_AGE': 0,
+        'POOL': {
+            'min_size': 2,       # Сколько простаивающих соединений держать всегда
+            'max_size': 10,      # Не больше стольких соединений на воркер
+            'timeout': 5,        # Секунд ожидания свободного соединения
+            'max_idle': 300,     # Лишние соединения закрываются после простоя
+            'ping_after': 30,    # Проверять соединение SELECT 1 после такого простоя
+        },
+    }
+}
+
+
+# Кэш. Считает попадания/промахи для метрик (см. backend/metrics.py)
+CACHES = {
+    'default': {
+        'BACKEND': 'backend.metrics.InstrumentedLocMemCache',
+        'LOCATION': 'default',
+        'METRICS_NAME': 'default',
     }
 }
+# Кэш в памяти процесса не общий для воркеров: с ним кэш дашбордов выключен
+# (backend/caches.py), а ограничение попыток входа не проходит
+# manage.py check --deploy (users.E001). Для нескольких воркеров нужен общий кэш, например:
+#     'default': {'BACKEND': 'backend.metrics.InstrumentedRedisCache', 'LOCATION': 'redis://localhost:6379/1',
+#                 'METRICS_NAME': 'default'}
+# (Instrumented* - обычные бэкенды Django со счетчиками попаданий, см. backend/metrics.py)
 
 
 # Password validation
@@ -135,6 +176,12 @@ REST_FRAMEWORK = {
     'PAGE_SIZE': 10,
 }
 
+SIMPLE_JWT = {
+    # last_login при выдаче токена отмечает users.activity (запись пачкой в фоне)
+    'UPDATE_LAST_LOGIN': False,
+    'TOKEN_OBTAIN_SERIALIZER': 'users.serializers.ActivityTokenObtainPairSerializer',
+}
+
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
 
@@ -152,9 +199,110 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+# Закрытые файлы (выгрузки и т.п.): не раздаются веб-сервером напрямую,
+# доступ только через API с проверкой прав.
+PRIVATE_MEDIA_ROOT = BASE_DIR / 'private_media'
+EXPORTS_ROOT = PRIVATE_MEDIA_ROOT / 'exports'
+MEDIA_FILES_ROOT = PRIVATE_MEDIA_ROOT / 'media_files'
+HOMEWORK_ROOT = PRIVATE_MEDIA_ROOT / 'homework'
+HOMEWORK_MAX_FILE_SIZE = 50 * 1024 * 1024
+
+# Хаб серверных событий (см. backend/events.py). InProcessHub - только в пределах
+# одного процесса; при нескольких воркерах - 'backend.events.RedisHub'.
+EVENT_HUB = 'backend.events.InProcessHub'
+EVENT_HUB_REDIS_URL = 'redis://localhost:6379/0'
+
+# Файлы уроков (см. media_files/storage.py)
+MEDIA_FILES = {
+    'CHUNK_SIZE': 8 * 1024 * 1024,
+    'MAX_CHUNK_SIZE': 64 * 1024 * 1024,
+    'MAX_FILE_SIZE': 20 * 1024 * 1024 * 1024,
+    # За nginx: 'X-Accel-Redirect' и internal-location ACCEL_REDIRECT_PREFIX с alias на PRIVATE_MEDIA_ROOT
+    'SERVE_HEADER': None,
+    'ACCEL_REDIRECT_PREFIX': '/protected-media/',
+}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
-AUTH_USER_MODEL = 'users.User'
\ No newline at end of file
+AUTH_USER_MODEL = 'users.User'
+
+
+# Профилирование запросов (см. backend/profiling.py)
+REQUEST_PROFILING = {
+    'SERVER_TIMING': True,
+    'SLOW_REQUEST_MS': 500,
+    'PROFILE_SAMPLE_RATE': 0.01,
+    'PROFILE_HEADER': 'X-Profile',  # Только для администраторов
+}
+
+# Троттлинг "ведро с токенами" (см. backend/throttling.py):
+# capacity - размер допустимого всплеска, refill_rate - токенов в секунду
+TOKEN_BUCKETS = {
+    'applications_submit': {'capacity': 5, 'refill_rate': 1 / 60},
+    'applications_submit_global': {'capacity': 200, 'refill_rate': 20},
+    # Вход и смена пароля (users/async_auth.py): с одного IP (за NAT школы бывает много учеников)
+    # и в одну учетную запись; проверяются до хеширования пароля
+    'auth_ip': {'capacity': 200, 'refill_rate': 2},
+    'auth_account': {'capacity': 10, 'refill_rate': 1 / 30},
+}
+
+# Пул хеширования паролей для входа (см. users/async_auth.py)
+AUTH_HASHING = {
+    'WORKERS': None,        # по числу процессоров
+    'MAX_PENDING': None,    # WORKERS * 4; сверх этого - 429 без ожидания
+}
+
+# Прием заявок с сайта (см. applications/ingestion.py)
+APPLICATION_INGESTION = {
+    'DEDUP_WINDOW': 15 * 60,
+    'CLAIM_TIMEOUT': 60,
+    'SYNC_WRITERS': 4,
+    'BATCH_SIZE': 200,
+    'FLUSH_INTERVAL': 0.5,
+    'BUFFER_LIMIT': 10000,
+    'WRITE_TIMEOUT': 5,
+}
+
+# Отметки активности пользователей для last_login (см. users/activity.py)
+USER_ACTIVITY = {
+    'FLUSH_INTERVAL': 30,
+    'MIN_INTERVAL': 300,
+    'BATCH_SIZE': 1000,
+}
+
+# Адреса, с которых Prometheus может забирать /metrics (None - без ограничений)
+METRICS_ALLOWED_IPS = ['127.0.0.1', '10.0.0.50']
+
+LOGS_DIR = BASE_DIR / 'logs'
+LOGS_DIR.mkdir(exist_ok=True)
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'timestamped': {
+            'format': '{asctime} {message}',
+            'style': '{',
+        },
+    },
+    'handlers': {
+        'slow_requests_file': {
+            'class': 'logging.handlers.RotatingFileHandler',
+            'filename': LOGS_DIR / 'slow_requests.log',
+            'maxBytes': 10 * 1024 * 1024,
+            'backupCount': 5,
+            'encoding': 'utf-8',
+            'formatter': 'timestamped',
+        },
+    },
+    'loggers': {
+        'backend.slow_requests': {
+            'handlers': ['slow_requests_file'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+    },
+}
\ No newline at end of file
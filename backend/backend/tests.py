@@ -0,0 +1,54 @@
+import shutil
+import tempfile
+
+from django.core.cache import caches
+from django.test import SimpleTestCase, TestCase, override_settings
+from prometheus_client import REGISTRY
+from rest_framework_simplejwt.tokens import AccessToken
+
+from users.models import User
+
+
+class EventsStreamTests(TestCase):
+    def test_wsgi_request_refused(self):
+        """Под WSGI поток не открывается: бесконечный ответ занял бы поток воркера навсегда."""
+        user = User.objects.create_user('student', password='pw')
+        response = self.client.get('/api/events/', HTTP_AUTHORIZATION='Bearer %s' % AccessToken.for_user(user))
+        self.assertEqual(response.status_code, 501)
+        self.assertFalse(response.streaming)
+
+
+class CacheMetricsTests(SimpleTestCase):
+    """Попадания и промахи считаются на любом бэкенде, каждый ключ - один раз."""
+
+    def counts(self, name):
+        return tuple(
+            REGISTRY.get_sample_value('cache_requests_total', {'cache': name, 'result': result}) or 0
+            for result in ('hit', 'miss')
+        )
+
+    def check_backend(self, name, config):
+        with override_settings(CACHES={'default': dict(config, METRICS_NAME=name)}):
+            cache = caches['default']
+            cache.set('a', 1)
+            cache.set('b', 2)
+            before = self.counts(name)
+            cache.get('a')
+            cache.get('missing')
+            cache.get_many(['a', 'b', 'missing'])
+            hits, misses = self.counts(name)
+            self.assertEqual((hits - before[0], misses - before[1]), (3, 2))
+
+    def test_locmem(self):
+        self.check_backend('test-locmem', {'BACKEND': 'backend.metrics.InstrumentedLocMemCache', 'LOCATION': 'test-locmem'})
+
+    def test_file_based(self):
+        location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, location, ignore_errors=True)
+        self.check_backend('test-file', {'BACKEND': 'backend.metrics.InstrumentedFileBasedCache', 'LOCATION': location})
+
+    def test_default_name_hides_location(self):
+        with override_settings(CACHES={'default': {
+            'BACKEND': 'backend.metrics.InstrumentedRedisCache', 'LOCATION': 'redis://:secret@localhost:6379/1',
+        }}):
+            self.assertEqual(caches['default']._metrics_name, 'RedisCache')
@@ -0,0 +1,62 @@
+# backend/backend/throttling.py
+
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework.throttling import BaseThrottle
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Дешевый троттлинг "ведро с токенами" на общем кэше.
+
+    У каждого ключа есть ведро емкостью capacity, которое пополняется со
+    скоростью refill_rate токенов в секунду; каждый запрос забирает один токен.
+    Короткие всплески до capacity проходят, дальше запросы ограничиваются
+    средней скоростью. Параметры берутся из settings.TOKEN_BUCKETS[scope].
+    Состояние ведра - одна запись кэша: гонка двух воркеров может пропустить
+    лишний запрос, но не требует блокировок.
+    """
+    scope = None
+
+    def __init__(self):
+        try:
+            config = settings.TOKEN_BUCKETS[self.scope]
+        except (AttributeError, KeyError):
+            raise ImproperlyConfigured('Не задан TOKEN_BUCKETS[%r].' % self.scope)
+        self.capacity = config['capacity']
+        self.refill_rate = config['refill_rate']
+        self._wait = None
+
+    def get_bucket_key(self, request, view):
+        """Ключ ведра; None - запрос не ограничивается."""
+        return self.get_ident(request)
+
+    def allow_request(self, request, view):
+        key = self.get_bucket_key(request, view)
+        if key is None:
+            return True
+        return self.consume('token-bucket:%s:%s' % (self.scope, key))
+
+    def consume(self, cache_key, tokens=1):
+        now = time.time()
+        state = cache.get(cache_key)
+        if state is None:
+            available = float(self.capacity)
+        else:
+            available, updated_at = state
+            available = min(self.capacity, available + (now - updated_at) * self.refill_rate)
+
+        if available < tokens:
+            self._wait = (tokens - available) / self.refill_rate
+            return False
+
+        # Запись живет, пока ведро не наполнится заново: дальше она не нужна
+        timeout = int(self.capacity / self.refill_rate) + 1
+        cache.set(cache_key, (available - tokens, now), timeout)
+        return True
+
+    def wait(self):
+        return self._wait
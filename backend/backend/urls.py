@@ -1,14 +1,24 @@
 from django.contrib import admin
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
+from rest_framework_simplejwt.views import TokenRefreshView
 
 # --- Импортируем все необходимые ViewSets ---
 from users.views import UserViewSet, TeacherPublicViewSet
+from users.async_auth import token_obtain_view
 from courses.views import CourseViewSet
 from blog.views import PostViewSet, CategoryViewSet
 from applications.views import ApplicationViewSet
 from reviews.views import ReviewViewSet
+from exports.views import ExportJobViewSet
+from media_files.views import MediaFileViewSet
+from homework.views import SubmissionViewSet
+from announcements.views import AnnouncementViewSet
+from backend.views import db_pool_stats_view
+from backend.metrics import metrics_view
+from backend.events import events_stream_view, events_ticket_view
+from backend.batch import batch_view
+from sync.views import changes_view
 
 # --- Создаем единый роутер для всего API ---
 router = DefaultRouter()
@@ -19,17 +29,32 @@ router.register(r'posts', PostViewSet, basename='post')
 router.register(r'categories', CategoryViewSet, basename='category')
 router.register(r'applications', ApplicationViewSet, basename='application')
 router.register(r'reviews', ReviewViewSet, basename='review')
+router.register(r'exports', ExportJobViewSet, basename='export')
+router.register(r'media-files', MediaFileViewSet, basename='media-file')
+router.register(r'homework/submissions', SubmissionViewSet, basename='submission')
+router.register(r'announcements', AnnouncementViewSet, basename='announcement')
 
 
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('metrics', metrics_view, name='metrics'),
 
     # --- Эндпоинты для аутентификации ---
-    path('api/token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
+    # Асинхронный вход: хеширование пароля в ограниченном пуле (users/async_auth.py)
+    path('api/token/', token_obtain_view, name='token_obtain_pair'),
     path('api/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
 
+    # --- Служебные эндпоинты ---
+    path('api/system/db-pool/', db_pool_stats_view, name='db-pool-stats'),
+    path('api/events/', events_stream_view, name='events-stream'),
+    path('api/events/ticket/', events_ticket_view, name='events-ticket'),
+    path('api/batch/', batch_view, name='batch'),
+
     # --- Подключаем все URL ---
     path('api/blog/', include('blog.urls')),
+    path('api/attendance/', include('attendance.urls')),
+    path('api/changes/', changes_view, name='changes'),
+    path('api/', include('announcements.urls')),
     path('api/', include('users.custom_urls')),
     path('api/', include('courses.nested_urls')),
     path('api/', include('courses.custom_urls')), # <--- ДОБАВЛЕНО
@@ -0,0 +1,15 @@
+# backend/backend/views.py
+# Служебные эндпоинты уровня проекта, не относящиеся к конкретному приложению.
+
+from rest_framework import permissions
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.response import Response
+
+from backend.db_pool import pool_stats
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAdminUser])
+def db_pool_stats_view(request):
+    """Статистика пула соединений текущего воркера (checkouts, waits, timeouts...)."""
+    return Response(pool_stats())
@@ -1,13 +1,14 @@
 from rest_framework import serializers
 from .models import Category, Post
 from users.serializers import UserSerializer # Импортируем для вложенного представления
+from backend.compact import SideloadMixin
 
 class CategorySerializer(serializers.ModelSerializer):
     class Meta:
         model = Category
         fields = ['id', 'name', 'slug']
 
-class PostSerializer(serializers.ModelSerializer):
+class PostSerializer(SideloadMixin, serializers.ModelSerializer):
     # Используем вложенный сериализатор для получения полной информации
     category = CategorySerializer(read_only=True)
     author = UserSerializer(read_only=True)
@@ -23,6 +24,8 @@ class PostSerializer(serializers.ModelSerializer):
             'createdAt', 'updatedAt', 'author', 'category', 'categoryId'
         ]
         read_only_fields = ('createdAt', 'updatedAt', 'author') # Автор будет устанавливаться автоматически
+        # Компактный формат (backend/compact.py): автор и категория - в included
+        sideload = {'author': 'users', 'category': 'categories'}
 
     def create(self, validated_data):
         # Устанавливаем автора из запроса
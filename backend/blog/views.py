@@ -1,10 +1,11 @@
 # backend/blog/views.py
 
 from rest_framework import viewsets, permissions
+from backend.compact import CompactResponseMixin
 from .models import Post, Category
 from .serializers import PostSerializer, CategorySerializer
 
-class PostViewSet(viewsets.ModelViewSet):
+class PostViewSet(CompactResponseMixin, viewsets.ModelViewSet):
     """Показывает посты блога. Доступно всем."""
     queryset = Post.objects.all().select_related('category', 'author')
     serializer_class = PostSerializer
@@ -1,6 +1,7 @@
 from django.contrib import admin
-from .models import Course, Lesson # Убираем импорт Subject и TestQuestion
+from .models import Course, Lesson, WaitlistEntry # Убираем импорт Subject и TestQuestion
 
 # Регистрируем только те модели, которые реально существуют
 admin.site.register(Course)
-admin.site.register(Lesson)
\ No newline at end of file
+admin.site.register(Lesson)
+admin.site.register(WaitlistEntry)
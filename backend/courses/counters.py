@@ -0,0 +1,77 @@
+# backend/courses/counters.py
+"""
+Денормализованные счетчики курса: students_count, lessons_count,
+completed_lessons_count и next_lesson_at.
+
+Счетчики не увеличиваются на единицу, а пересчитываются по исходным таблицам
+для затронутых курсов: ученик может быть записан через обе связи сразу
+(Profile.enrolled_courses и Course.students), и инкремент посчитал бы его
+дважды. Пересчет идет под блокировкой строки курса (select_for_update) в
+транзакции изменения, поэтому параллельные изменения одного курса не
+затирают друг друга.
+
+next_lesson_at устаревает сам, когда урок проходит; его сдвигает
+команда sync_course_counters --stale (запускается по расписанию).
+
+Счетчики входят в карточку курса дельта-синхронизации, а bulk_update не
+шлет post_save: измененные курсы записываются в журнал sync здесь же.
+"""
+
+from django.db import transaction
+from django.db.models import Count, Min, Q
+from django.utils import timezone
+
+from sync.services import record
+from .models import Course, Lesson
+from .scheduling import course_students
+
+COUNTER_FIELDS = Course.COUNTER_FIELDS
+
+
+def compute_counters(course_ids, now=None):
+    """{course_id: {поле: значение}} по исходным таблицам, три запроса на любой набор курсов."""
+    now = now or timezone.now()
+    counters = {
+        course_id: {'students_count': 0, 'lessons_count': 0, 'completed_lessons_count': 0, 'next_lesson_at': None}
+        for course_id in course_ids
+    }
+    for course_id, students in course_students(course_ids).items():
+        counters[course_id]['students_count'] = len(students)
+    lessons = (
+        Lesson.objects.filter(course_id__in=course_ids)
+        .values('course_id')
+        .annotate(
+            lessons_count=Count('pk'),
+            completed_lessons_count=Count('pk', filter=Q(status=Lesson.LessonStatus.COMPLETED)),
+            next_lesson_at=Min('starts_at', filter=Q(status=Lesson.LessonStatus.PLANNED, starts_at__gte=now)),
+        )
+        .order_by()
+    )
+    for row in lessons:
+        counters[row.pop('course_id')].update(row)
+    return counters
+
+
+def refresh_course_counters(course_ids):
+    """
+    Пересчитывает счетчики курсов и сохраняет изменившиеся.
+    Возвращает число обновленных курсов.
+    """
+    course_ids = sorted(set(course_ids) - {None})
+    if not course_ids:
+        return 0
+    with transaction.atomic():
+        # Блокировки берутся в порядке ID, чтобы два пересчета не ждали друг друга по кругу
+        current = {
+            row['pk']: row for row in
+            Course.objects.select_for_update().filter(pk__in=course_ids).order_by('pk').values('pk', *COUNTER_FIELDS)
+        }
+        changed = []
+        for course_id, values in compute_counters(list(current)).items():
+            row = current[course_id]
+            if any(row[field] != values[field] for field in COUNTER_FIELDS):
+                changed.append(Course(pk=course_id, **values))
+        if changed:
+            Course.objects.bulk_update(changed, COUNTER_FIELDS)
+            record('courses', [course.pk for course in changed])
+    return len(changed)
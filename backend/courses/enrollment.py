@@ -0,0 +1,138 @@
+# backend/courses/enrollment.py
+"""
+Запись на курсы с ограничением мест и очередью.
+
+Место выдается условным UPDATE строки курса:
+
+    UPDATE course SET students_count = students_count + 1
+    WHERE id = %s AND (capacity IS NULL OR students_count < capacity)
+
+UPDATE берет блокировку только этой строки, и параллельная запись на тот же
+курс ждет ее, а затем заново проверяет условие по уже увеличенному счетчику
+(на Postgres - перепроверка строки в READ COMMITTED). Поэтому мест не
+выдается больше capacity, а записи на разные курсы друг друга не ждут.
+Если UPDATE не изменил строку, мест нет и ученик встает в очередь
+(WaitlistEntry). +1 - это бронь: добавление связи вызывает пересчет
+счетчиков (courses.counters) в той же транзакции под той же блокировкой,
+и students_count снова равен настоящему числу учеников.
+
+Когда ученик уходит с курса (любой путь удаления связи, см. courses.signals)
+или администратор увеличивает capacity, promote_waitlist() в той же
+транзакции отдает освободившиеся места первым в очереди.
+"""
+
+from django.db import transaction
+from django.db.models import F, Q
+
+from sync.services import record
+from users.models import Profile
+from .models import Course, WaitlistEntry
+from .scheduling import course_students
+
+ENROLLED = 'enrolled'
+ALREADY_ENROLLED = 'already_enrolled'
+WAITLISTED = 'waitlisted'
+DROPPED = 'dropped'
+LEFT_WAITLIST = 'left_waitlist'
+NOT_ENROLLED = 'not_enrolled'
+
+
+def _profile_id(user_id):
+    # У пользователей, созданных не через UserSerializer, профиля может не быть
+    return Profile.objects.get_or_create(user_id=user_id)[0].pk
+
+
+def waitlist_position(course_id, user_id):
+    """Номер ученика в очереди на курс (с 1) или None, если он не в очереди."""
+    entry = WaitlistEntry.objects.filter(course_id=course_id, user_id=user_id).values('pk', 'created_at').first()
+    if entry is None:
+        return None
+    ahead = WaitlistEntry.objects.filter(course_id=course_id).filter(
+        Q(created_at__lt=entry['created_at']) | Q(created_at=entry['created_at'], pk__lt=entry['pk'])
+    )
+    return ahead.count() + 1
+
+
+def enroll(user_id, course_id):
+    """
+    Записывает ученика на курс или ставит в очередь.
+    Возвращает (результат, номер в очереди или None).
+    """
+    with transaction.atomic():
+        if course_students([course_id], [user_id]):
+            return ALREADY_ENROLLED, None
+        seat = (
+            Course.objects.filter(pk=course_id)
+            .filter(Q(capacity__isnull=True) | Q(students_count__lt=F('capacity')))
+            .update(students_count=F('students_count') + 1)
+        )
+        if seat:
+            Course(pk=course_id).enrolled_student_profiles.add(_profile_id(user_id))
+            WaitlistEntry.objects.filter(course_id=course_id, user_id=user_id).delete()
+            # Пересчет после add() совпадает с бронью и курс не пишет: students_count изменил этот UPDATE
+            record('courses', [course_id])
+            return ENROLLED, None
+        WaitlistEntry.objects.get_or_create(course_id=course_id, user_id=user_id)
+        return WAITLISTED, waitlist_position(course_id, user_id)
+
+
+def drop(user_id, course_id):
+    """Убирает ученика с курса (по обеим связям) или из очереди на него."""
+    with transaction.atomic():
+        if course_students([course_id], [user_id]):
+            # Освободившееся место отдают очереди обработчики m2m_changed (courses.signals)
+            Course(pk=course_id).enrolled_student_profiles.remove(*Profile.objects.filter(user_id=user_id))
+            Course(pk=course_id).students.remove(user_id)
+            return DROPPED
+        deleted, _ = WaitlistEntry.objects.filter(course_id=course_id, user_id=user_id).delete()
+        return LEFT_WAITLIST if deleted else NOT_ENROLLED
+
+
+def set_enrollments(user_id, course_ids):
+    """
+    Приводит курсы профиля ученика к набору course_ids: снимает с лишних
+    курсов и очередей на них, на новые записывает или ставит в очередь. Возвращает {course_id: результат}.
+    """
+    current = set(Profile.enrolled_courses.through.objects.filter(profile__user_id=user_id).values_list('course_id', flat=True))
+    waiting = set(WaitlistEntry.objects.filter(user_id=user_id).values_list('course_id', flat=True))
+    wanted = set(Course.objects.filter(pk__in=course_ids).values_list('pk', flat=True))
+    results = {}
+    with transaction.atomic():
+        # Курсы по возрастанию ID: блокировки строк берутся в одном порядке у всех запросов
+        for course_id in sorted((current ^ wanted) | (waiting - wanted)):
+            if course_id in wanted:
+                results[course_id] = enroll(user_id, course_id)[0]
+            else:
+                results[course_id] = drop(user_id, course_id)
+    return results
+
+
+def promote_waitlist(course_ids):
+    """
+    Отдает свободные места курсов первым в очереди.
+    Возвращает список (course_id, user_id) записанных.
+    """
+    promoted = []
+    for course_id in sorted(set(course_ids) - {None}):
+        with transaction.atomic():
+            row = Course.objects.select_for_update().filter(pk=course_id).values_list('capacity', 'students_count').first()
+            if row is None:
+                continue
+            capacity, taken = row
+            if capacity is not None and taken >= capacity:
+                continue
+            queue = WaitlistEntry.objects.filter(course_id=course_id).order_by('created_at', 'pk')
+            if capacity is not None:
+                queue = queue[:capacity - taken]
+            entries = list(queue.values_list('pk', 'user_id'))
+            if not entries:
+                continue
+            # Уже записанных другим путем место не ждет: их запись из очереди просто удаляется
+            enrolled = course_students([course_id], [user_id for _, user_id in entries]).get(course_id, set())
+            user_ids = [user_id for _, user_id in entries if user_id not in enrolled]
+            WaitlistEntry.objects.filter(pk__in=[pk for pk, _ in entries]).delete()
+            if user_ids:
+                # Одно добавление - один пересчет счетчиков и одно событие на всю пачку
+                Course(pk=course_id).enrolled_student_profiles.add(*[_profile_id(user_id) for user_id in user_ids])
+                promoted.extend((course_id, user_id) for user_id in user_ids)
+    return promoted
@@ -0,0 +1,102 @@
+import random
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from courses.enrollment import DROPPED, ENROLLED, WAITLISTED, drop, enroll
+from courses.models import Course, WaitlistEntry
+from courses.scheduling import course_students
+from users.models import Profile, User
+
+
+class Command(BaseCommand):
+    help = ('Stress-tests course enrollment: many students enroll into one limited course concurrently, '
+            'then some drop. Checks that seats are never oversubscribed and the waitlist is promoted '
+            'in order, reports throughput. Creates its own course and students and deletes them afterwards.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, default=500, help='Students rushing the course')
+        parser.add_argument('--capacity', type=int, default=100, help='Seats in the course')
+        parser.add_argument('--workers', type=int, default=32, help='Concurrent enroll requests')
+        parser.add_argument('--drops', type=int, default=20, help='Enrolled students who drop afterwards')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        if options['students'] < 1 or options['capacity'] < 1 or options['workers'] < 1:
+            raise CommandError('--students, --capacity and --workers must be positive.')
+        tag = 'stress-%d' % int(time.time() * 1000)
+        course = Course.objects.create(title=tag, subject='stress', price=0, capacity=options['capacity'])
+        users = User.objects.bulk_create([
+            User(username='%s-%d' % (tag, i), email='%s-%d@example.com' % (tag, i), role='student')
+            for i in range(options['students'])
+        ])
+        Profile.objects.bulk_create([Profile(user=user) for user in users])
+        try:
+            self.run(course, [user.pk for user in users], options)
+        finally:
+            course.delete()
+            User.objects.filter(pk__in=[user.pk for user in users]).delete()
+
+    def concurrently(self, func, user_ids, course_id, workers):
+        def call(user_id):
+            try:
+                return func(user_id, course_id)
+            finally:
+                # Поток пула держал бы свое соединение до конца команды
+                connections.close_all()
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(call, user_ids))
+        return results, time.perf_counter() - started
+
+    def run(self, course, user_ids, options):
+        capacity = options['capacity']
+        rng = random.Random(options['seed'])
+        rng.shuffle(user_ids)
+
+        results, elapsed = self.concurrently(enroll, user_ids, course.pk, options['workers'])
+        outcomes = Counter(result for result, _ in results)
+        self.stdout.write('enroll: %d requests, %d workers, %.2fs, %.0f req/s, %s' % (
+            len(user_ids), options['workers'], elapsed, len(user_ids) / elapsed, dict(outcomes)))
+        enrolled = {user_id for user_id, (result, _) in zip(user_ids, results) if result == ENROLLED}
+        waitlisted = {user_id for user_id, (result, _) in zip(user_ids, results) if result == WAITLISTED}
+        self.check_state(course, enrolled, waitlisted, min(capacity, len(user_ids)))
+
+        queue = list(WaitlistEntry.objects.filter(course=course).order_by('created_at', 'pk').values_list('user_id', flat=True))
+        leaving = rng.sample(sorted(enrolled), min(options['drops'], len(enrolled)))
+        results, elapsed = self.concurrently(drop, leaving, course.pk, options['workers'])
+        if any(result != DROPPED for result in results):
+            raise CommandError('Some drops failed: %s' % dict(Counter(results)))
+        self.stdout.write('drop: %d requests, %.2fs, %.0f req/s' % (len(leaving), elapsed, len(leaving) / elapsed))
+
+        # Места ушедших получают первые в очереди
+        promoted = set(queue[:len(leaving)])
+        self.check_state(course, enrolled - set(leaving) | promoted, set(queue[len(leaving):]),
+                         len(enrolled) - len(leaving) + len(promoted))
+        self.stdout.write(self.style.SUCCESS(
+            'OK: %d seats, %d enrolled, %d waitlisted, %d promoted in queue order' % (
+                capacity, len(enrolled), len(waitlisted), len(promoted))))
+
+    def check_state(self, course, expected_enrolled, expected_waitlist, expected_count):
+        course.refresh_from_db(fields=['students_count'])
+        actual = course_students([course.pk]).get(course.pk, set())
+        queue = set(WaitlistEntry.objects.filter(course=course).values_list('user_id', flat=True))
+        errors = []
+        if len(actual) > course.capacity:
+            errors.append('oversubscribed: %d students for %d seats' % (len(actual), course.capacity))
+        if len(actual) != expected_count:
+            errors.append('%d students enrolled, expected %d' % (len(actual), expected_count))
+        if course.students_count != len(actual):
+            errors.append('students_count is %d, actual %d' % (course.students_count, len(actual)))
+        if actual != expected_enrolled:
+            errors.append('enrolled set differs from the enroll results')
+        if queue != expected_waitlist:
+            errors.append('waitlist differs from the expected one')
+        if actual & queue:
+            errors.append('%d students are both enrolled and waitlisted' % len(actual & queue))
+        if errors:
+            raise CommandError('; '.join(errors))
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from courses.counters import refresh_course_counters
+from courses.models import Course
+
+
+class Command(BaseCommand):
+    help = (
+        'Backfills and reconciles denormalized course counters in batches. '
+        'Each batch is committed separately; rerun with --start-after to resume.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--start-after', type=int, default=0, help='Resume after this course ID')
+        parser.add_argument('--stale', action='store_true',
+                            help='Only courses whose next_lesson_at is in the past (run periodically)')
+
+    def handle(self, *args, **options):
+        courses = Course.objects.order_by('pk')
+        if options['stale']:
+            courses = courses.filter(next_lesson_at__lt=timezone.now())
+
+        last_id = options['start_after']
+        checked = updated = 0
+        while True:
+            batch = list(courses.filter(pk__gt=last_id).values_list('pk', flat=True)[:options['batch_size']])
+            if not batch:
+                break
+            updated += refresh_course_counters(batch)
+            checked += len(batch)
+            last_id = batch[-1]
+            self.stdout.write(f'Checked {checked} courses, updated {updated} (last id {last_id})')
+        self.stdout.write(self.style.SUCCESS(f'Done: checked {checked} courses, updated {updated}'))
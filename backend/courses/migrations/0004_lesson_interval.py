@@ -0,0 +1,71 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:54
+
+import datetime
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def fill_lesson_intervals(apps, schema_editor):
+    # Повторяет Lesson.set_interval: миграции не импортируют код приложения
+    Lesson = apps.get_model('courses', 'Lesson')
+    batch = []
+    lessons = Lesson.objects.filter(date__isnull=False, time__isnull=False).only('id', 'date', 'time', 'duration')
+    for lesson in lessons.iterator(chunk_size=2000):
+        lesson.starts_at = timezone.make_aware(datetime.datetime.combine(lesson.date, lesson.time))
+        lesson.ends_at = lesson.starts_at + datetime.timedelta(minutes=lesson.duration)
+        batch.append(lesson)
+        if len(batch) >= 2000:
+            Lesson.objects.bulk_update(batch, ['starts_at', 'ends_at'])
+            batch = []
+    Lesson.objects.bulk_update(batch, ['starts_at', 'ends_at'])
+
+
+def create_gist_index(apps, schema_editor):
+    # Индекс по диапазону для оператора && (см. courses/scheduling.py); в SQLite его нет
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(
+            'CREATE INDEX IF NOT EXISTS lesson_interval_gist '
+            'ON courses_lesson USING gist (tstzrange(starts_at, ends_at))'
+        )
+
+
+def drop_gist_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS lesson_interval_gist')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0003_course_students_lesson_date_lesson_homework_url_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='lesson',
+            name='duration',
+            field=models.PositiveSmallIntegerField(default=60, verbose_name='Длительность, мин'),
+        ),
+        migrations.AddField(
+            model_name='lesson',
+            name='ends_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='lesson',
+            name='room',
+            field=models.CharField(blank=True, default='', max_length=100, verbose_name='Аудитория'),
+        ),
+        migrations.AddField(
+            model_name='lesson',
+            name='starts_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='lesson',
+            index=models.Index(fields=['starts_at', 'ends_at'], name='lesson_interval_idx'),
+        ),
+        migrations.RunPython(fill_lesson_intervals, migrations.RunPython.noop),
+        migrations.RunPython(create_gist_index, drop_gist_index),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0004_lesson_interval'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='lesson',
+            name='homework_deadline',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Срок сдачи Д/З'),
+        ),
+    ]
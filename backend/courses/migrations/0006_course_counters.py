@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0005_lesson_homework_deadline'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='completed_lessons_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Проведено уроков'),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='lessons_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Уроков'),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='next_lesson_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Ближайший урок'),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='students_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Учеников'),
+        ),
+    ]
@@ -1,7 +1,13 @@
+import datetime
+
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
 
 class Course(models.Model):
+    # Поля, которые пишет только пересчет courses.counters и бронь места (courses.enrollment)
+    COUNTER_FIELDS = ('students_count', 'lessons_count', 'completed_lessons_count', 'next_lesson_at')
+
     title = models.CharField(max_length=255, verbose_name="Название курса")
     description = models.TextField(blank=True, null=True, verbose_name="Описание")
     subject = models.CharField(max_length=100, verbose_name="Предмет")
@@ -21,10 +27,54 @@ class Course(models.Model):
         blank=True,
         limit_choices_to={'role': 'student'}
     )
+    # Счетчики для карточек курса; поддерживает courses.counters, сверяет sync_course_counters
+    students_count = models.PositiveIntegerField(default=0, editable=False, verbose_name="Учеников")
+    lessons_count = models.PositiveIntegerField(default=0, editable=False, verbose_name="Уроков")
+    completed_lessons_count = models.PositiveIntegerField(default=0, editable=False, verbose_name="Проведено уроков")
+    next_lesson_at = models.DateTimeField(null=True, blank=True, editable=False, verbose_name="Ближайший урок")
+    # Число мест; пусто - без ограничения. Места выдает courses.enrollment, лишних учеников ставит в очередь
+    capacity = models.PositiveIntegerField(null=True, blank=True, verbose_name="Мест")
 
     def __str__(self):
         return self.title
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Преподаватель на момент загрузки: по нему users.signals и sync.signals узнают о его смене
+        instance._loaded_teacher_id = instance.__dict__.get('teacher_id')
+        return instance
+
+    def save(self, *args, **kwargs):
+        if not args and kwargs.get('update_fields') is None and not self._state.adding and not kwargs.get('force_insert'):
+            # Обычное сохранение (админка, PATCH) не пишет счетчики, прочитанные вместе с объектом:
+            # иначе оно затерло бы параллельный пересчет или бронь места
+            deferred = self.get_deferred_fields()
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.attname not in deferred and field.name not in self.COUNTER_FIELDS
+            ]
+        super().save(*args, **kwargs)
+        # Обработчики post_save уже сравнили нового преподавателя с прежним
+        self._loaded_teacher_id = self.teacher_id
+
+class WaitlistEntry(models.Model):
+    """Очередь на курс без свободных мест; первым получает место тот, кто раньше встал."""
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='waitlist', verbose_name="Курс")
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='waitlist_entries', verbose_name="Ученик")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['course', 'user'], name='waitlist_course_user_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['course', 'created_at', 'id'], name='waitlist_order_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.user_id} -> {self.course_id}'
+
 class Lesson(models.Model):
     class LessonStatus(models.TextChoices):
         PLANNED = 'planned', 'Запланирован'
@@ -42,8 +92,42 @@ class Lesson(models.Model):
         default=LessonStatus.PLANNED,
         verbose_name="Статус урока"
     )
+    duration = models.PositiveSmallIntegerField(default=60, verbose_name="Длительность, мин")
+    room = models.CharField(max_length=100, blank=True, default='', verbose_name="Аудитория")
     recording_url = models.URLField(blank=True, null=True, verbose_name="Ссылка на запись")
     homework_url = models.URLField(blank=True, null=True, verbose_name="Ссылка на Д/З")
+    homework_deadline = models.DateTimeField(null=True, blank=True, verbose_name="Срок сдачи Д/З")
+    # Интервал урока [starts_at, ends_at) для поиска пересечений, считается из date, time и duration
+    starts_at = models.DateTimeField(null=True, blank=True, editable=False)
+    ends_at = models.DateTimeField(null=True, blank=True, editable=False)
+
+    class Meta:
+        indexes = [
+            # На Postgres дополнительно есть GiST-индекс по tstzrange(starts_at, ends_at), см. миграцию 0004
+            models.Index(fields=['starts_at', 'ends_at'], name='lesson_interval_idx'),
+        ]
 
     def __str__(self):
-        return self.title
\ No newline at end of file
+        return self.title
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Статус на момент загрузки: по нему courses.signals узнает, что урок только что отменили
+        instance._loaded_status = instance.__dict__.get('status')
+        return instance
+
+    def set_interval(self):
+        """Пересчитывает starts_at/ends_at; bulk_create и update() save() не вызывают."""
+        if self.date and self.time:
+            self.starts_at = timezone.make_aware(datetime.datetime.combine(self.date, self.time))
+            self.ends_at = self.starts_at + datetime.timedelta(minutes=self.duration)
+        else:
+            self.starts_at = self.ends_at = None
+
+    def save(self, *args, **kwargs):
+        self.set_interval()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'date', 'time', 'duration'} & set(update_fields):
+            kwargs['update_fields'] = set(update_fields) | {'starts_at', 'ends_at'}
+        super().save(*args, **kwargs)
\ No newline at end of file
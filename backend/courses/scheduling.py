@@ -0,0 +1,257 @@
+# backend/courses/scheduling.py
+"""
+Пересечения уроков в расписании.
+
+Урок занимает интервал [starts_at, ends_at) и три вида ресурсов:
+преподавателя курса, аудиторию (если указана) и каждого записанного ученика.
+Два неотмененных урока конфликтуют, если их интервалы пересекаются и у них
+есть общий ресурс.
+
+find_conflicts() проверяет новые или измененные уроки: одним запросом берет
+уроки тех же ресурсов в окне проверки (на Postgres - оператором && по
+GiST-индексу tstzrange(starts_at, ends_at), на остальных базах - обычным
+сравнением по индексу starts_at/ends_at), а точные пересечения ищет в
+памяти деревом интервалов.
+
+term_conflicts() строит отчет по всем урокам периода за один проход
+заметающей прямой по каждому ресурсу, без попарного сравнения.
+"""
+
+import heapq
+from collections import defaultdict
+
+from django.db import connections
+from django.db.models import F, Func, Q
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from users.models import Profile
+from .models import Course, Lesson
+
+
+class ScheduleConflict(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = 'Урок пересекается с расписанием.'
+    default_code = 'schedule_conflict'
+
+    def __init__(self, conflicts):
+        super().__init__()
+        # ID в ответе остаются числами (ValidationError привел бы их к строкам)
+        self.detail = {'detail': self.default_detail, 'conflicts': conflicts}
+
+
+class IntervalTree:
+    """
+    Статическое центрированное дерево полуоткрытых интервалов [start, end).
+    items - последовательность (start, end, payload).
+    """
+
+    def __init__(self, items):
+        items = list(items)
+        self.center = None
+        self.left = self.right = None
+        if not items:
+            return
+
+        # Центр - медиана начал: интервал с этим началом остается в узле, поэтому рекурсия конечна
+        starts = sorted(item[0] for item in items)
+        self.center = starts[len(starts) // 2]
+        left, right, here = [], [], []
+        for item in items:
+            start, end, _ = item
+            if end <= self.center:
+                left.append(item)
+            elif start > self.center:
+                right.append(item)
+            else:
+                here.append(item)
+        # Интервалы, содержащие центр, в двух порядках: по началу и по убыванию конца
+        self.by_start = sorted(here, key=lambda item: item[0])
+        self.by_end = sorted(here, key=lambda item: item[1], reverse=True)
+        self.left = IntervalTree(left) if left else None
+        self.right = IntervalTree(right) if right else None
+
+    def overlapping(self, start, end):
+        """payload всех интервалов, пересекающихся с [start, end)."""
+        result = []
+        node = [self]
+        while node:
+            tree = node.pop()
+            if tree.center is None:
+                continue
+            if end <= tree.center:
+                for item in tree.by_start:
+                    if item[0] >= end:
+                        break
+                    result.append(item[2])
+                if tree.left:
+                    node.append(tree.left)
+            elif start >= tree.center:
+                for item in tree.by_end:
+                    if item[1] <= start:
+                        break
+                    result.append(item[2])
+                if tree.right:
+                    node.append(tree.right)
+            else:
+                result.extend(item[2] for item in tree.by_start)
+                if tree.left:
+                    node.append(tree.left)
+                if tree.right:
+                    node.append(tree.right)
+        return result
+
+
+class TsTzRange(Func):
+    function = 'TSTZRANGE'
+
+
+def overlapping(queryset, start, end):
+    """Уроки queryset, пересекающиеся с [start, end)."""
+    if connections[queryset.db].vendor == 'postgresql':
+        from django.contrib.postgres.fields import DateTimeRangeField
+        interval = TsTzRange(F('starts_at'), F('ends_at'), output_field=DateTimeRangeField())
+        return queryset.annotate(interval=interval).filter(interval__overlap=(start, end))
+    return queryset.filter(starts_at__lt=end, ends_at__gt=start)
+
+
+def course_students(course_ids, student_ids=None):
+    """
+    {course_id: set(user_id)} по обеим связям записи на курс
+    (Profile.enrolled_courses и Course.students).
+    """
+    result = defaultdict(set)
+    relations = (
+        (Profile.enrolled_courses.through.objects, 'profile__user_id'),
+        (Course.students.through.objects, 'user_id'),
+    )
+    for manager, user_field in relations:
+        rows = manager.filter(course_id__in=course_ids)
+        if student_ids is not None:
+            rows = rows.filter(**{user_field + '__in': student_ids})
+        for course_id, user_id in rows.values_list('course_id', user_field):
+            result[course_id].add(user_id)
+    return result
+
+
+def _resources(teacher_id, room, students):
+    keys = []
+    if teacher_id:
+        keys.append(('teacher', teacher_id))
+    if room:
+        keys.append(('room', room))
+    keys.extend(('student', user_id) for user_id in sorted(students))
+    return keys
+
+
+def _describe(keys):
+    conflict = {'teacher_id': None, 'room': '', 'students': []}
+    for kind, value in keys:
+        if kind == 'teacher':
+            conflict['teacher_id'] = value
+        elif kind == 'room':
+            conflict['room'] = value
+        else:
+            conflict['students'].append(value)
+    conflict['students'].sort()
+    return conflict
+
+
+def find_conflicts(lessons, exclude_ids=()):
+    """
+    Проверяет несохраненные или измененные уроки (у них должен быть вызван
+    set_interval()) на пересечения с расписанием и друг с другом.
+    exclude_ids - уроки, которые проверяемые заменяют (при изменении).
+
+    Возвращает список конфликтов: index - номер урока в lessons, lesson -
+    ID пересекающегося урока (или other_index для урока из того же списка),
+    плюс общие ресурсы (teacher_id, room, students).
+    """
+    candidates = [
+        (index, lesson) for index, lesson in enumerate(lessons)
+        if lesson.starts_at and lesson.status != Lesson.LessonStatus.CANCELLED
+    ]
+    if not candidates:
+        return []
+
+    course_ids = {lesson.course_id for _, lesson in candidates}
+    teachers = dict(Course.objects.filter(pk__in=course_ids).values_list('pk', 'teacher_id'))
+    students = course_students(course_ids)
+    teacher_ids = {teachers.get(course_id) for course_id in course_ids} - {None}
+    rooms = {lesson.room for _, lesson in candidates if lesson.room}
+    student_ids = set().union(*students.values()) if students else set()
+
+    # Один запрос: уроки тех же ресурсов в окне проверки
+    related = Q(course__teacher_id__in=teacher_ids) | Q(room__in=rooms)
+    if student_ids:
+        related |= Q(course_id__in=Profile.enrolled_courses.through.objects.filter(
+            profile__user_id__in=student_ids).values('course_id'))
+        related |= Q(course_id__in=Course.students.through.objects.filter(
+            user_id__in=student_ids).values('course_id'))
+    window_start = min(lesson.starts_at for _, lesson in candidates)
+    window_end = max(lesson.ends_at for _, lesson in candidates)
+    existing = list(
+        overlapping(Lesson.objects.all(), window_start, window_end)
+        .filter(related)
+        .exclude(status=Lesson.LessonStatus.CANCELLED)
+        .exclude(pk__in=exclude_ids)
+        .values_list('pk', 'course_id', 'course__teacher_id', 'room', 'starts_at', 'ends_at')
+    )
+    existing_students = course_students({row[1] for row in existing}, student_ids) if existing else {}
+
+    intervals = defaultdict(list)
+    for pk, course_id, teacher_id, room, starts_at, ends_at in existing:
+        for key in _resources(teacher_id, room, existing_students.get(course_id, ())):
+            intervals[key].append((starts_at, ends_at, ('lesson', pk)))
+    candidate_keys = {}
+    for index, lesson in candidates:
+        keys = _resources(teachers.get(lesson.course_id), lesson.room, students.get(lesson.course_id, ()))
+        candidate_keys[index] = keys
+        for key in keys:
+            intervals[key].append((lesson.starts_at, lesson.ends_at, ('other_index', index)))
+    trees = {key: IntervalTree(items) for key, items in intervals.items()}
+
+    conflicts = []
+    for index, lesson in candidates:
+        shared = defaultdict(list)
+        for key in candidate_keys[index]:
+            for ref in trees[key].overlapping(lesson.starts_at, lesson.ends_at):
+                if ref != ('other_index', index):
+                    shared[ref].append(key)
+        for (kind, value), keys in sorted(shared.items()):
+            conflicts.append({'index': index, kind: value, **_describe(keys)})
+    return conflicts
+
+
+def term_conflicts(date_from, date_to):
+    """
+    Все пересечения неотмененных уроков с date_from по date_to включительно.
+    Каждая пара уроков попадает в отчет один раз со списком общих ресурсов.
+    """
+    lessons = list(
+        Lesson.objects.filter(date__gte=date_from, date__lte=date_to, starts_at__isnull=False)
+        .exclude(status=Lesson.LessonStatus.CANCELLED)
+        .values_list('pk', 'course_id', 'course__teacher_id', 'room', 'starts_at', 'ends_at')
+    )
+    students = course_students({row[1] for row in lessons}) if lessons else {}
+
+    events = []
+    for pk, course_id, teacher_id, room, starts_at, ends_at in lessons:
+        for key in _resources(teacher_id, room, students.get(course_id, ())):
+            events.append((key, starts_at, ends_at, pk))
+    events.sort(key=lambda event: (event[0], event[1]))
+
+    # Заметающая прямая: для каждого ресурса держим кучу уроков, которые еще идут
+    shared = defaultdict(list)
+    active = []
+    current_key = None
+    for key, starts_at, ends_at, pk in events:
+        if key != current_key:
+            current_key, active = key, []
+        while active and active[0][0] <= starts_at:
+            heapq.heappop(active)
+        for _, other_pk in active:
+            shared[tuple(sorted((pk, other_pk)))].append(key)
+        heapq.heappush(active, (ends_at, pk))
+
+    return [{'lessons': list(pair), **_describe(keys)} for pair, keys in sorted(shared.items())]
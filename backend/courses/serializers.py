@@ -1,18 +1,67 @@
+import datetime
+
 from rest_framework import serializers
 from .models import Course, Lesson
 from users.serializers import UserSerializer
+from backend.compact import SideloadMixin
 
 class LessonSerializer(serializers.ModelSerializer):
     class Meta:
         model = Lesson
-        fields = ('id', 'title', 'content', 'course', 'date', 'time', 'status', 'recording_url', 'homework_url')
-        read_only_fields = ('course',)
+        fields = (
+            'id', 'title', 'content', 'course', 'date', 'time', 'duration', 'room',
+            'starts_at', 'ends_at', 'status', 'recording_url', 'homework_url', 'homework_deadline',
+        )
+        read_only_fields = ('course', 'starts_at', 'ends_at')
+
+class LessonSeriesSerializer(serializers.Serializer):
+    """Серия еженедельных уроков курса с start_date по end_date."""
+    MAX_LESSONS = 200
+
+    title = serializers.CharField(max_length=255)
+    content = serializers.CharField(required=False, allow_blank=True, allow_null=True)
+    start_date = serializers.DateField()
+    end_date = serializers.DateField()
+    # Дни недели: 0 - понедельник; по умолчанию день недели start_date
+    weekdays = serializers.ListField(child=serializers.IntegerField(min_value=0, max_value=6), required=False)
+    time = serializers.TimeField()
+    duration = serializers.IntegerField(min_value=1, max_value=24 * 60, default=60)
+    room = serializers.CharField(max_length=100, required=False, allow_blank=True, default='')
 
-class CourseSerializer(serializers.ModelSerializer):
+    def validate(self, data):
+        if data['end_date'] < data['start_date']:
+            raise serializers.ValidationError({'end_date': 'Дата окончания раньше даты начала.'})
+        weekdays = set(data.get('weekdays') or [data['start_date'].weekday()])
+        days = (data['end_date'] - data['start_date']).days + 1
+        data['dates'] = [
+            data['start_date'] + datetime.timedelta(days=offset) for offset in range(days)
+            if (data['start_date'] + datetime.timedelta(days=offset)).weekday() in weekdays
+        ]
+        if len(data['dates']) > self.MAX_LESSONS:
+            raise serializers.ValidationError('Не больше %d уроков в одной серии.' % self.MAX_LESSONS)
+        return data
+
+class CourseSerializer(SideloadMixin, serializers.ModelSerializer):
     teacher = UserSerializer(read_only=True)
     students = UserSerializer(many=True, read_only=True)
     lessons = LessonSerializer(many=True, read_only=True)
 
     class Meta:
         model = Course
-        fields = ('id', 'title', 'description', 'subject', 'price', 'teacher', 'students', 'lessons')
\ No newline at end of file
+        fields = (
+            'id', 'title', 'description', 'subject', 'price', 'capacity', 'teacher', 'students', 'lessons',
+            'students_count', 'lessons_count', 'completed_lessons_count', 'next_lesson_at',
+        )
+        sideload = {'teacher': 'users', 'students': 'users'}
+
+class CourseCardSerializer(SideloadMixin, serializers.ModelSerializer):
+    """Карточка курса для списков: без составов и уроков, только счетчики из строки курса."""
+    teacher = UserSerializer(read_only=True)
+
+    class Meta:
+        model = Course
+        fields = (
+            'id', 'title', 'description', 'subject', 'price', 'capacity', 'teacher',
+            'students_count', 'lessons_count', 'completed_lessons_count', 'next_lesson_at',
+        )
+        sideload = {'teacher': 'users'}
@@ -0,0 +1,130 @@
+# backend/courses/signals.py
+"""
+События для дашбордов (backend/events.py): отмена уроков и изменения записи на курсы.
+Здесь же поддерживаются счетчики курса (courses/counters.py) и очередь
+на курсы без свободных мест (courses/enrollment.py).
+"""
+
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from backend.bulk import bulk_updated
+from backend.events import publish
+from users.models import Profile
+from .counters import refresh_course_counters
+from .enrollment import promote_waitlist
+from .models import Course, Lesson
+
+CANCELLED = Lesson.LessonStatus.CANCELLED
+# Поля урока, от которых зависят счетчики курса
+COUNTED_LESSON_FIELDS = {'course', 'status', 'date', 'time', 'duration', 'starts_at'}
+
+
+def _publish_cancelled(lesson_id, course_id, title, date, time):
+    publish(['course:%s' % course_id], 'lesson.cancelled',
+            id=lesson_id, course=course_id, title=title, date=date, time=time)
+
+
+@receiver(post_save, sender=Lesson)
+def lesson_saved(sender, instance, created, **kwargs):
+    loaded_status = getattr(instance, '_loaded_status', None)
+    if instance.status == CANCELLED and loaded_status != CANCELLED and not created:
+        _publish_cancelled(instance.pk, instance.course_id, instance.title, instance.date, instance.time)
+    instance._loaded_status = instance.status
+
+    update_fields = kwargs.get('update_fields')
+    if created or update_fields is None or COUNTED_LESSON_FIELDS & set(update_fields):
+        refresh_course_counters([instance.course_id])
+
+
+@receiver(post_delete, sender=Lesson)
+def lesson_deleted(sender, instance, **kwargs):
+    refresh_course_counters([instance.course_id])
+
+
+@receiver(bulk_updated, sender=Lesson)
+def lessons_bulk_updated(sender, pks, changes, **kwargs):
+    refresh_course_counters(Lesson.objects.filter(pk__in=pks).values_list('course_id', flat=True).distinct())
+    if changes.get('status') != CANCELLED:
+        return
+    for lesson in Lesson.objects.filter(pk__in=pks).values_list('pk', 'course_id', 'title', 'date', 'time'):
+        _publish_cancelled(*lesson)
+
+
+def _publish_enrollment(user_ids_by_course, action):
+    by_user = {}
+    for course_id, user_ids in user_ids_by_course:
+        for user_id in user_ids:
+            by_user.setdefault(user_id, []).append(course_id)
+    for user_id, course_ids in by_user.items():
+        publish(['admin', 'user:%s' % user_id], 'enrollment.changed',
+                user=user_id, courses=sorted(course_ids), action=action)
+
+
+@receiver(m2m_changed, sender=Profile.enrolled_courses.through)
+def profile_courses_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove') or not pk_set:
+        return
+    if not reverse:
+        # profile.enrolled_courses.add(...): pk_set - ID курсов
+        changes = [(course_id, [instance.user_id]) for course_id in pk_set]
+    else:
+        # course.enrolled_student_profiles.add(...): pk_set - ID профилей
+        user_ids = list(Profile.objects.filter(pk__in=pk_set).values_list('user_id', flat=True))
+        changes = [(instance.pk, user_ids)]
+    _publish_enrollment(changes, 'added' if action == 'post_add' else 'removed')
+
+
+@receiver(m2m_changed, sender=Course.students.through)
+def course_students_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove') or not pk_set:
+        return
+    if not reverse:
+        changes = [(instance.pk, pk_set)]
+    else:
+        changes = [(course_id, [instance.pk]) for course_id in pk_set]
+    _publish_enrollment(changes, 'added' if action == 'post_add' else 'removed')
+
+
+
+ENROLLMENT_ACTIONS = ('post_add', 'post_remove', 'post_clear')
+
+
+def _enrollment_changed(course_ids, action):
+    refresh_course_counters(course_ids)
+    if action != 'post_add':
+        # Ученик ушел - его место по пересчитанному счетчику получает первый в очереди
+        promote_waitlist(course_ids)
+
+
+def _refresh_member_courses(instance, action, pk_set):
+    # profile.enrolled_courses / user.enrolled_courses: pk_set - ID курсов, у clear() его нет
+    if action == 'pre_clear':
+        instance._cleared_course_ids = list(instance.enrolled_courses.values_list('pk', flat=True))
+    elif action == 'post_clear':
+        _enrollment_changed(instance.__dict__.pop('_cleared_course_ids', ()), action)
+    elif action in ENROLLMENT_ACTIONS and pk_set:
+        _enrollment_changed(pk_set, action)
+
+
+@receiver(m2m_changed, sender=Profile.enrolled_courses.through)
+def profile_courses_counters(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        _refresh_member_courses(instance, action, pk_set)
+    elif action in ENROLLMENT_ACTIONS:
+        _enrollment_changed([instance.pk], action)
+
+
+@receiver(m2m_changed, sender=Course.students.through)
+def course_students_counters(sender, instance, action, reverse, pk_set, **kwargs):
+    if reverse:
+        _refresh_member_courses(instance, action, pk_set)
+    elif action in ENROLLMENT_ACTIONS:
+        _enrollment_changed([instance.pk], action)
+
+
+@receiver(post_save, sender=Course)
+def course_capacity_saved(sender, instance, created, update_fields=None, **kwargs):
+    # Администратор мог добавить места (или снять ограничение) - их получает очередь
+    if not created and (update_fields is None or 'capacity' in update_fields):
+        promote_waitlist([instance.pk])
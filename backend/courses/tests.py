@@ -1,3 +1,173 @@
-from django.test import TestCase
+import datetime
+import threading
+import unittest
 
-# Create your tests here.
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from backend.read_path import get_read_path
+from sync.models import Change
+from users.models import User
+from . import enrollment
+from .models import Course, Lesson, WaitlistEntry
+from .serializers import LessonSerializer
+
+
+class LessonReadPathTests(TestCase):
+    """Быстрый путь чтения должен отдавать то же, что LessonSerializer."""
+
+    @classmethod
+    def setUpTestData(cls):
+        course = Course.objects.create(title='Математика', subject='math', price=1000)
+        Lesson.objects.create(
+            course=course, title='Дроби', content='Конспект', date=datetime.date(2026, 3, 2),
+            time=datetime.time(15, 30), duration=90, room='101', status=Lesson.LessonStatus.COMPLETED,
+            recording_url='https://example.com/rec', homework_url='https://example.com/hw',
+            homework_deadline=timezone.now(),
+        )
+        # Урок без даты и времени: starts_at/ends_at и ссылки - null
+        Lesson.objects.create(course=course, title='Без расписания')
+
+    def test_read_path_matches_serializer(self):
+        queryset = Lesson.objects.order_by('date', 'time', 'id')
+        self.assertEqual(
+            get_read_path(LessonSerializer).serialize(queryset),
+            LessonSerializer(queryset, many=True).data,
+        )
+
+
+class LessonBulkUpdateTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.teacher = User.objects.create_user('teacher', password='pw', role='teacher')
+        cls.course = Course.objects.create(title='Математика', subject='math', price=1000, teacher=cls.teacher)
+        other = Course.objects.create(title='Физика', subject='physics', price=1000, teacher=cls.teacher)
+        day, time = datetime.date(2026, 3, 2), datetime.time(15, 0)
+        Lesson.objects.create(course=other, title='Занят', date=day, time=time)
+        cls.cancelled = Lesson.objects.create(
+            course=cls.course, title='Отменен', date=day, time=time, status=Lesson.LessonStatus.CANCELLED,
+        )
+        cls.free = Lesson.objects.create(
+            course=cls.course, title='Свободен', date=day + datetime.timedelta(days=1), time=time,
+            status=Lesson.LessonStatus.CANCELLED,
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.teacher)
+        self.url = '/api/courses/%d/lessons/bulk-update/' % self.course.pk
+
+    def test_reactivation_checks_schedule_conflicts(self):
+        response = self.client.post(
+            self.url, {'ids': [self.cancelled.pk, self.free.pk], 'patch': {'status': 'planned'}}, format='json',
+        )
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual([conflict['id'] for conflict in response.data['conflicts']], [self.cancelled.pk])
+        self.assertEqual(response.data['conflicts'][0]['teacher_id'], self.teacher.pk)
+        # Изменение не применяется ни к одной строке
+        self.assertFalse(Lesson.objects.filter(course=self.course, status='planned').exists())
+
+    def test_invalid_filter_values(self):
+        for value in ('не дата', {'gte': '2026-03-01'}, ['2026-03-02']):
+            response = self.client.post(
+                self.url, {'filter': {'date': value}, 'patch': {'status': 'planned'}}, format='json',
+            )
+            self.assertEqual(response.status_code, 400, value)
+            self.assertIn('date', response.data['filter'])
+
+    def test_filter_value_is_cleaned(self):
+        response = self.client.post(
+            self.url, {'filter': {'date': '2026-03-03'}, 'patch': {'status': 'planned'}}, format='json',
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['results'], [{'id': self.free.pk, 'result': 'updated'}])
+
+    def test_change_log_written_in_update_transaction(self):
+        """Журнал sync пишется в транзакции UPDATE, а не в колбэке после коммита."""
+        Change.objects.all().delete()
+        with self.captureOnCommitCallbacks():
+            response = self.client.post(
+                self.url, {'ids': [self.free.pk], 'patch': {'status': 'planned'}}, format='json',
+            )
+            self.assertEqual(response.status_code, 200)
+            # Колбэки on_commit еще не выполнялись
+            self.assertTrue(Change.objects.filter(model='lessons', object_id=self.free.pk).exists())
+
+
+class EnrollmentCapacityTests(TransactionTestCase):
+    """Мест не выдается больше capacity; освободившееся место получает первый в очереди."""
+
+    def setUp(self):
+        self.course = Course.objects.create(title='Математика', subject='math', price=1000, capacity=2)
+        self.students = [User.objects.create_user('student%d' % i, password='pw') for i in range(6)]
+
+    def enrolled_ids(self):
+        return set(self.course.enrolled_student_profiles.values_list('user_id', flat=True))
+
+    def assertWithinCapacity(self):
+        self.course.refresh_from_db()
+        self.assertLessEqual(len(self.enrolled_ids()), self.course.capacity)
+        self.assertEqual(self.course.students_count, len(self.enrolled_ids()))
+
+    def test_waitlist_promoted_in_order_on_drop(self):
+        first, second, *queue = self.students[:5]
+        results = [enrollment.enroll(student.pk, self.course.pk) for student in self.students[:5]]
+        self.assertEqual(results, [
+            (enrollment.ENROLLED, None), (enrollment.ENROLLED, None),
+            (enrollment.WAITLISTED, 1), (enrollment.WAITLISTED, 2), (enrollment.WAITLISTED, 3),
+        ])
+        self.assertWithinCapacity()
+
+        self.assertEqual(enrollment.drop(first.pk, self.course.pk), enrollment.DROPPED)
+        self.assertEqual(self.enrolled_ids(), {second.pk, queue[0].pk})
+        self.assertWithinCapacity()
+
+        self.assertEqual(enrollment.drop(second.pk, self.course.pk), enrollment.DROPPED)
+        self.assertEqual(self.enrolled_ids(), {queue[0].pk, queue[1].pk})
+        self.assertEqual(enrollment.waitlist_position(self.course.pk, queue[2].pk), 1)
+        self.assertWithinCapacity()
+
+    def test_leaving_waitlist_keeps_order(self):
+        for student in self.students[:5]:
+            enrollment.enroll(student.pk, self.course.pk)
+        self.assertEqual(enrollment.drop(self.students[2].pk, self.course.pk), enrollment.LEFT_WAITLIST)
+        enrollment.drop(self.students[0].pk, self.course.pk)
+        self.assertEqual(self.enrolled_ids(), {self.students[1].pk, self.students[3].pk})
+        self.assertEqual(list(WaitlistEntry.objects.values_list('user_id', flat=True)), [self.students[4].pk])
+
+    @unittest.skipUnless(connection.vendor == 'postgresql', 'параллельная запись проверяется только на Postgres')
+    def test_concurrent_enrollment_within_capacity(self):
+        barrier = threading.Barrier(len(self.students))
+        results = []
+
+        def worker(student):
+            try:
+                barrier.wait()
+                results.append(enrollment.enroll(student.pk, self.course.pk)[0])
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker, args=(student,)) for student in self.students]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(results.count(enrollment.ENROLLED), self.course.capacity)
+        self.assertEqual(results.count(enrollment.WAITLISTED), len(self.students) - self.course.capacity)
+        self.assertWithinCapacity()
+
+
+class CourseSaveTests(TestCase):
+    def test_save_keeps_concurrent_counters(self):
+        """Сохранение курса, прочитанного до брони места, не возвращает старый счетчик."""
+        course = Course.objects.create(title='Математика', subject='math', price=1000, capacity=1)
+        stale = Course.objects.get(pk=course.pk)
+        Course.objects.filter(pk=course.pk).update(students_count=1)
+
+        stale.title = 'Алгебра'
+        stale.save()
+        course.refresh_from_db()
+        self.assertEqual((course.title, course.students_count), ('Алгебра', 1))
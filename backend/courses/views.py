@@ -1,39 +1,204 @@
+import copy
+
 from rest_framework import viewsets, filters, status
 from rest_framework.permissions import IsAdminUser, AllowAny, IsAuthenticated
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import action, api_view, permission_classes, renderer_classes
+from rest_framework.exceptions import NotFound, PermissionDenied, ValidationError
 from rest_framework.response import Response
+from django.db import transaction
 from django.utils import timezone
+from django.utils.dateparse import parse_date
 from .models import Course, Lesson
-from .serializers import CourseSerializer, LessonSerializer
-from backend.permissions import IsAdminOrReadOnly, IsTeacherOfCourseOrAdmin, IsTeacher
+from .counters import refresh_course_counters
+from .enrollment import drop, enroll
+from .serializers import CourseCardSerializer, CourseSerializer, LessonSerializer, LessonSeriesSerializer
+from .scheduling import ScheduleConflict, find_conflicts, term_conflicts
+from backend.permissions import IsAdminOrReadOnly, IsCourseTeacherOrReadOnly, IsTeacher, CourseAccessFilter, course_access_q
+from backend.read_path import get_read_path
+from backend.bulk import BulkUpdateMixin
+from backend.compact import COMPACT_RENDERER_CLASSES, CompactResponseMixin, compact_context, compact_data
+from exports.services import export_response, ENROLLMENTS_EXPORT, LESSONS_EXPORT
+from users.models import Profile
+from users.signals import invalidate_course_dashboards
+from sync.services import record_lessons
+from idempotency.decorators import idempotent
 
-class CourseViewSet(viewsets.ModelViewSet):
+class CourseViewSet(CompactResponseMixin, viewsets.ModelViewSet):
     queryset = Course.objects.select_related('teacher').prefetch_related('students', 'lessons').all()
     serializer_class = CourseSerializer
     permission_classes = [IsAdminOrReadOnly]
-    filter_backends = [filters.SearchFilter]
+    filter_backends = [CourseAccessFilter, filters.SearchFilter]
     search_fields = ['title', 'subject', 'teacher__first_name', 'teacher__last_name']
+    # Каталог курсов открыт для чтения, изменения ограничивает CourseAccessFilter
+    course_access_public_read = True
+
+    def get_queryset(self):
+        if self.action == 'list':
+            # Карточки каталога: счетчики лежат в самой строке курса, составы и уроки не нужны
+            return (
+                Course.objects.select_related('teacher__profile')
+                .prefetch_related('teacher__profile__enrolled_courses')
+                .order_by('pk')
+            )
+        return super().get_queryset()
+
+    def get_serializer_class(self):
+        if self.action == 'list':
+            return CourseCardSerializer
+        return super().get_serializer_class()
+
+    @action(detail=False, methods=['get'], url_path='export-enrollments', permission_classes=[IsAdminUser])
+    def export_enrollments(self, request):
+        # Составы групп по курсам из того же поиска, что и у списка (?search=)
+        courses = self.filter_queryset(self.get_queryset())
+        enrollments = Profile.enrolled_courses.through.objects.filter(course__in=courses).order_by('course_id', 'profile_id')
+        return export_response(request, ENROLLMENTS_EXPORT, enrollments)
+
+    @action(detail=False, methods=['get'], permission_classes=[IsAdminUser])
+    def conflicts(self, request):
+        # Отчет о пересечениях расписания за период: ?date_from=YYYY-MM-DD&date_to=YYYY-MM-DD
+        date_from = parse_date(request.query_params.get('date_from') or '')
+        date_to = parse_date(request.query_params.get('date_to') or '')
+        if not date_from or not date_to:
+            raise ValidationError({'detail': 'Нужны параметры date_from и date_to в формате YYYY-MM-DD.'})
+        return Response(term_conflicts(date_from, date_to))
+
+    def _student_course_id(self):
+        # Записываются ученики на любой курс каталога; строку курса не загружаем, ее блокирует enroll()
+        if self.request.user.role != 'student':
+            raise PermissionDenied('Записаться на курс может только ученик.')
+        if not Course.objects.filter(pk=self.kwargs['pk']).exists():
+            raise NotFound('Курс не найден.')
+        return int(self.kwargs['pk'])
+
+    @action(detail=True, methods=['post'], permission_classes=[IsAuthenticated])
+    def enroll(self, request, pk=None):
+        # Свободное место - запись, иначе очередь: {"status": "waitlisted", "position": 3}
+        result, position = enroll(request.user.pk, self._student_course_id())
+        return Response({'status': result, 'position': position})
+
+    @action(detail=True, methods=['post'], permission_classes=[IsAuthenticated])
+    def leave(self, request, pk=None):
+        # Уход с курса или из очереди; место сразу получает первый в очереди
+        return Response({'status': drop(request.user.pk, self._student_course_id())})
 
-class LessonViewSet(viewsets.ModelViewSet):
+class LessonViewSet(BulkUpdateMixin, viewsets.ModelViewSet):
     serializer_class = LessonSerializer
-    permission_classes = [IsTeacherOfCourseOrAdmin]
+    # Уроки видят участники курса, меняет преподаватель курса или администратор.
+    # Строки отбирает CourseAccessFilter, объект проверяется по course_teacher_id из того же запроса.
+    permission_classes = [IsAuthenticated, IsCourseTeacherOrReadOnly]
+    filter_backends = [CourseAccessFilter]
+    course_lookup = 'course'
+    bulk_update_fields = ('status',)
+    bulk_filter_fields = ('status', 'date')
+
+    def get_bulk_permission(self):
+        return course_access_q(self.request.user, self.course_lookup, write=True)
 
     def get_queryset(self):
         return Lesson.objects.filter(course_id=self.kwargs['course_pk'])
 
+    def check_course_permission(self):
+        """Право менять уроки курса из URL: один запрос за ID преподавателя вместо загрузки курса."""
+        rows = list(Course.objects.filter(pk=self.kwargs['course_pk']).values_list('pk', 'teacher_id'))
+        if not rows:
+            raise NotFound('Курс не найден.')
+        course_id, teacher_id = rows[0]
+        if not self.request.user.is_staff and teacher_id != self.request.user.pk:
+            raise PermissionDenied('Изменять уроки может только преподаватель курса.')
+        return course_id
+
+    def check_schedule(self, lessons, exclude_ids=()):
+        for lesson in lessons:
+            lesson.set_interval()
+        conflicts = find_conflicts(lessons, exclude_ids)
+        if conflicts:
+            raise ScheduleConflict(conflicts)
+
+    def validate_bulk_update(self, pks, changes):
+        # Массовый UPDATE не идет через perform_update: те же проверки расписания для каждой строки
+        if not {'date', 'time', 'duration', 'room', 'status'} & set(changes):
+            return
+        lessons = list(Lesson.objects.filter(pk__in=pks).order_by('pk'))
+        for lesson in lessons:
+            for field, value in changes.items():
+                setattr(lesson, field, value)
+            lesson.set_interval()
+        conflicts = find_conflicts(lessons, exclude_ids=pks)
+        if conflicts:
+            # Номера в списке заменяем на ID уроков из запроса
+            for conflict in conflicts:
+                conflict['id'] = lessons[conflict.pop('index')].pk
+                if 'other_index' in conflict:
+                    conflict['lesson'] = lessons[conflict.pop('other_index')].pk
+            raise ScheduleConflict(conflicts)
+
+    @idempotent
+    def create(self, request, *args, **kwargs):
+        return super().create(request, *args, **kwargs)
+
     def perform_create(self, serializer):
-        course = Course.objects.get(pk=self.kwargs['course_pk'])
-        serializer.save(course=course)
+        course_id = self.check_course_permission()
+        self.check_schedule([Lesson(course_id=course_id, **serializer.validated_data)])
+        serializer.save(course_id=course_id)
+
+    def perform_update(self, serializer):
+        # Проверяем расписание, только если меняется время, аудитория или статус
+        scheduling = {'date', 'time', 'duration', 'room', 'status'}
+        if scheduling & set(serializer.validated_data):
+            lesson = copy.copy(serializer.instance)
+            for field, value in serializer.validated_data.items():
+                setattr(lesson, field, value)
+            self.check_schedule([lesson], exclude_ids=[lesson.pk])
+        serializer.save()
+
+    @action(detail=False, methods=['post'])
+    @idempotent
+    def series(self, request, *args, **kwargs):
+        # Серия уроков по дням недели; создается целиком или не создается при пересечениях
+        course_id = self.check_course_permission()
+        serializer = LessonSeriesSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        lessons = [
+            Lesson(
+                course_id=course_id,
+                title=data['title'],
+                content=data.get('content'),
+                date=date,
+                time=data['time'],
+                duration=data['duration'],
+                room=data['room'],
+            )
+            for date in data['dates']
+        ]
+        self.check_schedule(lessons)
+        with transaction.atomic():
+            lessons = Lesson.objects.bulk_create(lessons)
+            # bulk_create не шлет post_save - счетчики, дашборды и журнал изменений обновляются здесь
+            refresh_course_counters([course_id])
+            invalidate_course_dashboards([course_id])
+            record_lessons([(lesson.pk, course_id) for lesson in lessons])
+        return Response(LessonSerializer(lessons, many=True).data, status=status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=['get'])
+    def export(self, request, *args, **kwargs):
+        # Расписание курса выгружает администратор или преподаватель этого курса
+        self.check_course_permission()
+        lessons = self.filter_queryset(self.get_queryset()).order_by('date', 'time')
+        return export_response(request, LESSONS_EXPORT, lessons)
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@renderer_classes(COMPACT_RENDERER_CLASSES)
 def my_courses(request):
+    context = compact_context(request)
     if not hasattr(request.user, 'profile'):
-        return Response([], status=status.HTTP_200_OK)
+        return Response(compact_data([], context), status=status.HTTP_200_OK)
         
-    enrolled_courses = request.user.profile.enrolled_courses.all()
-    serializer = CourseSerializer(enrolled_courses, many=True)
-    return Response(serializer.data)
+    enrolled_courses = request.user.profile.enrolled_courses.select_related('teacher').prefetch_related('students', 'lessons')
+    serializer = CourseSerializer(enrolled_courses, many=True, context=context)
+    return Response(compact_data(serializer.data, context))
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
@@ -47,12 +212,13 @@ def upcoming_lessons(request):
         date__gte=timezone.now().date()
     ).order_by('date', 'time')
 
-    serializer = LessonSerializer(upcoming, many=True)
-    return Response(serializer.data)
+    return Response(get_read_path(LessonSerializer).serialize(upcoming))
 
 @api_view(['GET'])
 @permission_classes([IsTeacher])
+@renderer_classes(COMPACT_RENDERER_CLASSES)
 def my_teaching_courses(request):
-    courses = Course.objects.filter(teacher=request.user)
-    serializer = CourseSerializer(courses, many=True)
-    return Response(serializer.data)
\ No newline at end of file
+    context = compact_context(request)
+    courses = Course.objects.filter(teacher=request.user).select_related('teacher__profile')
+    serializer = CourseCardSerializer(courses, many=True, context=context)
+    return Response(compact_data(serializer.data, context))
\ No newline at end of file
@@ -0,0 +1,7 @@
+from django.contrib import admin
+from .models import ExportJob
+
+@admin.register(ExportJob)
+class ExportJobAdmin(admin.ModelAdmin):
+    list_display = ('kind', 'export_format', 'status', 'rows', 'created_by', 'created_at', 'finished_at')
+    list_filter = ('kind', 'status')
@@ -0,0 +1,51 @@
+# backend/exports/models.py
+
+from django.conf import settings
+from django.db import models
+
+
+class ExportJob(models.Model):
+    """Фоновая выгрузка большого списка в файл для последующего скачивания."""
+    STATUS_CHOICES = (
+        ('pending', 'В очереди'),
+        ('running', 'Выполняется'),
+        ('done', 'Готово'),
+        ('failed', 'Ошибка'),
+    )
+    FORMAT_CHOICES = (
+        ('csv', 'CSV'),
+        ('xlsx', 'Excel (XLSX)'),
+    )
+    kind = models.CharField(max_length=30, verbose_name='Что выгружается')
+    export_format = models.CharField(max_length=4, choices=FORMAT_CHOICES, default='csv', verbose_name='Формат')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending', verbose_name='Статус')
+    rows = models.PositiveIntegerField(default=0, verbose_name='Строк выгружено')
+    file_name = models.CharField(max_length=255, blank=True, verbose_name='Имя файла')
+    error = models.TextField(blank=True, verbose_name='Ошибка')
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='export_jobs',
+        verbose_name='Кто запустил'
+    )
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='Создана')
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name='Завершена')
+    # Последний признак жизни потока выгрузки; по нему находятся задачи, потерянные при рестарте
+    heartbeat_at = models.DateTimeField(null=True, blank=True, editable=False)
+
+    class Meta:
+        verbose_name = 'Выгрузка'
+        verbose_name_plural = 'Выгрузки'
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f'Выгрузка {self.kind} ({self.get_status_display()})'
+
+    @property
+    def relative_path(self):
+        # Каталог задачи: одноименные выгрузки, начатые в одну секунду, не перезаписывают друг друга
+        return f'{self.pk}/{self.file_name}'
+
+    @property
+    def file_path(self):
+        return settings.EXPORTS_ROOT / self.relative_path
@@ -0,0 +1,8 @@
+from rest_framework import serializers
+from .models import ExportJob
+
+class ExportJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ExportJob
+        fields = ('id', 'kind', 'export_format', 'status', 'rows', 'error', 'created_at', 'finished_at')
+        read_only_fields = fields
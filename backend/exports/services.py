@@ -0,0 +1,236 @@
+# backend/exports/services.py
+
+import datetime
+import logging
+import threading
+import time
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.db import connections, transaction
+from django.db.models import Q
+from django.db.models.functions import Coalesce
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+from applications.models import Application
+from courses.models import Lesson
+from users.models import User
+from .models import ExportJob
+from .serializers import ExportJobSerializer
+from .writers import WRITERS
+
+logger = logging.getLogger(__name__)
+
+# Размер порции серверного курсора: память не растет с размером выгрузки
+CHUNK_SIZE = 2000
+# Сколько кусков файла брать из синхронного писателя за один переход в поток (ASGI)
+ASYNC_BATCH = 16
+# Поток фоновой выгрузки отмечается не реже чем раз в HEARTBEAT_INTERVAL секунд;
+# задача без отметки дольше STALE_AFTER секунд считается потерянной (рестарт, деплой)
+HEARTBEAT_INTERVAL = 10
+STALE_AFTER = 60
+
+
+class ExportSpec:
+    """
+    Описание выгрузки: вид (он же префикс имени файла) и колонки
+    вида (заголовок, lookup для values_list[, функция форматирования]).
+    """
+
+    def __init__(self, kind, columns):
+        self.kind = kind
+        self.columns = columns
+
+    @property
+    def headers(self):
+        return [column[0] for column in self.columns]
+
+    def rows(self, queryset):
+        lookups = [column[1] for column in self.columns]
+        formatters = [column[2] if len(column) > 2 else None for column in self.columns]
+        rows = queryset.select_related(None).prefetch_related(None).values_list(*lookups)
+        for row in rows.iterator(chunk_size=CHUNK_SIZE):
+            yield [value if format_value is None else format_value(value) for value, format_value in zip(row, formatters)]
+
+    def file_name(self, export_format):
+        return '%s-%s.%s' % (self.kind, timezone.now().strftime('%Y%m%d-%H%M%S'), export_format)
+
+
+def _choices(choices):
+    labels = dict(choices)
+    return lambda value: labels.get(value, value)
+
+
+def export_response(request, spec, queryset):
+    """
+    Отдает выгрузку потоком либо, при ?background=1, ставит фоновую задачу
+    и возвращает 202 с ее статусом (файл потом скачивается из /api/exports/<id>/download/).
+    """
+    export_format = request.query_params.get('export_format', 'csv')
+    if export_format not in WRITERS:
+        raise ValidationError({'export_format': ['Допустимые значения: %s.' % ', '.join(WRITERS)]})
+
+    if request.query_params.get('background') in ('1', 'true'):
+        job = ExportJob.objects.create(kind=spec.kind, export_format=export_format, created_by=request.user)
+        transaction.on_commit(lambda: start_export_job(job, spec, queryset))
+        return Response(ExportJobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
+
+    writer, content_type = WRITERS[export_format]
+    chunks = writer(spec.headers, spec.rows(queryset))
+    if isinstance(getattr(request, '_request', request), ASGIRequest):
+        # Синхронный итератор под ASGI Django сначала читает целиком в память
+        chunks = _aiter_chunks(chunks)
+    response = StreamingHttpResponse(chunks, content_type=content_type)
+    response['Content-Disposition'] = 'attachment; filename="%s"' % spec.file_name(export_format)
+    return response
+
+
+def _next_batch(chunks):
+    return [chunk for _, chunk in zip(range(ASYNC_BATCH), chunks)]
+
+
+async def _aiter_chunks(chunks):
+    """
+    Отдает куски синхронного писателя асинхронно. Чтение queryset идет в
+    потоке запроса (thread_sensitive), поэтому серверный курсор остается на
+    одном соединении, а в памяти не больше ASYNC_BATCH кусков.
+    """
+    chunks = iter(chunks)
+    next_batch = sync_to_async(_next_batch, thread_sensitive=True)
+    while True:
+        batch = await next_batch(chunks)
+        if not batch:
+            break
+        for chunk in batch:
+            yield chunk
+
+
+def fail_interrupted_jobs(queryset=None):
+    """
+    Помечает ошибкой выгрузки, чей поток перестал отмечаться: процесс, который
+    их выполнял, перезапущен, и сами они уже не завершатся. Проверка по
+    heartbeat_at, а не "все незавершенные при старте", потому что в других
+    воркерах в это время могут идти живые выгрузки.
+    """
+    queryset = ExportJob.objects.all() if queryset is None else queryset
+    cutoff = timezone.now() - datetime.timedelta(seconds=STALE_AFTER)
+    return (
+        queryset.filter(status__in=('pending', 'running'))
+        .alias(last_seen=Coalesce('heartbeat_at', 'created_at'))
+        .filter(last_seen__lt=cutoff)
+        .update(status='failed', error='Выгрузка прервана перезапуском сервера.', finished_at=timezone.now())
+    )
+
+
+def start_export_job(job, spec, queryset):
+    thread = threading.Thread(
+        target=run_export_job,
+        args=(job.pk, spec, queryset),
+        name='export-%s' % job.pk,
+        daemon=True,
+    )
+    thread.start()
+    return thread
+
+
+def run_export_job(job_id, spec, queryset):
+    """Пишет выгрузку в файл в EXPORTS_ROOT. Выполняется в отдельном потоке."""
+    job = ExportJob.objects.get(pk=job_id)
+    job.status = 'running'
+    job.file_name = spec.file_name(job.export_format)
+    job.heartbeat_at = timezone.now()
+    job.save(update_fields=['status', 'file_name', 'heartbeat_at'])
+
+    writer, _ = WRITERS[job.export_format]
+    counter = _Counter(spec.rows(queryset), job_id)
+    try:
+        job.file_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(job.file_path, 'wb') as output:
+            for chunk in writer(spec.headers, counter):
+                output.write(chunk)
+    except Exception as exc:
+        logger.exception('Export job %s failed', job_id)
+        job.status = 'failed'
+        job.error = str(exc)
+    else:
+        job.status = 'done'
+    finally:
+        job.rows = counter.count
+        job.finished_at = timezone.now()
+        job.save(update_fields=['status', 'error', 'rows', 'finished_at'])
+        # У потока свои соединения с БД; без закрытия они не вернутся в пул
+        connections.close_all()
+
+
+class _Counter:
+    """Считает строки и заодно обновляет heartbeat_at задачи."""
+
+    def __init__(self, rows, job_id):
+        self.rows = rows
+        self.job_id = job_id
+        self.count = 0
+
+    def __iter__(self):
+        beat = time.monotonic()
+        for row in self.rows:
+            self.count += 1
+            if time.monotonic() - beat >= HEARTBEAT_INTERVAL:
+                beat = time.monotonic()
+                ExportJob.objects.filter(pk=self.job_id).update(heartbeat_at=timezone.now())
+            yield row
+
+
+# --- Описания выгрузок ---
+
+USERS_EXPORT = ExportSpec('users', [
+    ('ID', 'id'),
+    ('Email', 'email'),
+    ('Имя', 'first_name'),
+    ('Фамилия', 'last_name'),
+    ('Роль', 'role', _choices(User.ROLE_CHOICES)),
+    ('Активен', 'is_active', lambda value: 'да' if value else 'нет'),
+    ('Последний вход', 'last_login'),
+    ('Телефон', 'profile__phone'),
+    ('Школа', 'profile__school'),
+    ('Класс', 'profile__student_class'),
+    ('Родитель', 'profile__parent_name'),
+    ('Телефон родителя', 'profile__parent_phone'),
+])
+
+APPLICATIONS_EXPORT = ExportSpec('applications', [
+    ('ID', 'id'),
+    ('Имя', 'name'),
+    ('Телефон', 'phone'),
+    ('Класс ученика', 'student_class'),
+    ('Предмет', 'subject'),
+    ('Комментарий', 'comment'),
+    ('Статус', 'status', _choices(Application.STATUS_CHOICES)),
+    ('Дата создания', 'created_at'),
+])
+
+# Запись на курсы хранится в Profile.enrolled_courses (ее меняет enroll_student_to_courses),
+# выгрузка идет по строкам связующей таблицы.
+ENROLLMENTS_EXPORT = ExportSpec('enrollments', [
+    ('ID курса', 'course_id'),
+    ('Курс', 'course__title'),
+    ('ID ученика', 'profile__user_id'),
+    ('Email', 'profile__user__email'),
+    ('Имя', 'profile__user__first_name'),
+    ('Фамилия', 'profile__user__last_name'),
+    ('Класс', 'profile__student_class'),
+    ('Телефон родителя', 'profile__parent_phone'),
+])
+
+LESSONS_EXPORT = ExportSpec('lessons', [
+    ('ID', 'id'),
+    ('Курс', 'course__title'),
+    ('Урок', 'title'),
+    ('Дата', 'date'),
+    ('Время', 'time'),
+    ('Статус', 'status', _choices(Lesson.LessonStatus.choices)),
+    ('Преподаватель', 'course__teacher__email'),
+])
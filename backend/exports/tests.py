@@ -0,0 +1,76 @@
+import datetime
+import shutil
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.test.client import AsyncRequestFactory, RequestFactory
+from django.utils import timezone
+from rest_framework.request import Request
+from rest_framework.test import APIClient
+
+from users.models import User
+from .models import ExportJob
+from .services import STALE_AFTER, USERS_EXPORT, export_response, run_export_job
+
+
+class ExportStreamingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user('admin', email='admin@example.com', password='pw', is_staff=True)
+
+    def test_wsgi_request_streams_sync_iterator(self):
+        response = export_response(Request(RequestFactory().get('/')), USERS_EXPORT, User.objects.all())
+        self.assertFalse(response.is_async)
+        self.assertIn('admin@example.com', b''.join(response.streaming_content).decode('utf-8'))
+
+    async def test_asgi_request_streams_async_iterator(self):
+        request = Request(AsyncRequestFactory().get('/'))
+        response = export_response(request, USERS_EXPORT, User.objects.all())
+        # Синхронный итератор Django под ASGI прочитал бы целиком в память
+        self.assertTrue(response.is_async)
+        content = b''.join([chunk async for chunk in response.streaming_content]).decode('utf-8')
+        self.assertIn('admin@example.com', content)
+
+
+class InterruptedExportJobTests(TestCase):
+    def test_jobs_without_heartbeat_are_failed(self):
+        user = User.objects.create_user('teacher', password='pw')
+        stale = timezone.now() - datetime.timedelta(seconds=STALE_AFTER + 1)
+        lost = ExportJob.objects.create(kind='users', created_by=user, status='running', heartbeat_at=stale)
+        alive = ExportJob.objects.create(kind='users', created_by=user, status='running', heartbeat_at=timezone.now())
+        done = ExportJob.objects.create(kind='users', created_by=user, status='done', heartbeat_at=stale)
+
+        client = APIClient()
+        client.force_authenticate(user)
+        statuses = {job['id']: job['status'] for job in client.get('/api/exports/').data['results']}
+
+        self.assertEqual(statuses, {lost.pk: 'failed', alive.pk: 'running', done.pk: 'done'})
+
+
+class ExportJobFileTests(TestCase):
+    def setUp(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root, ignore_errors=True)
+        override = override_settings(EXPORTS_ROOT=Path(root))
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def test_same_second_jobs_get_own_files(self):
+        """Две выгрузки одного вида, начатые в одну секунду, пишут каждая свой файл."""
+        first_user = User.objects.create_user('first', email='first@example.com', password='pw')
+        second_user = User.objects.create_user('second', email='second@example.com', password='pw')
+        first = ExportJob.objects.create(kind='users', created_by=first_user)
+        second = ExportJob.objects.create(kind='users', created_by=second_user)
+        moment = timezone.now()
+        with mock.patch('exports.services.connections.close_all'), mock.patch('django.utils.timezone.now', return_value=moment):
+            run_export_job(first.pk, USERS_EXPORT, User.objects.filter(pk=first_user.pk))
+            run_export_job(second.pk, USERS_EXPORT, User.objects.filter(pk=second_user.pk))
+
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual(first.file_name, second.file_name)
+        self.assertNotEqual(first.file_path, second.file_path)
+        self.assertIn('first@example.com', first.file_path.read_text(encoding='utf-8-sig'))
+        self.assertNotIn('second@example.com', first.file_path.read_text(encoding='utf-8-sig'))
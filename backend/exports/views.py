@@ -0,0 +1,29 @@
+# backend/exports/views.py
+
+from django.http import FileResponse, Http404
+from rest_framework import viewsets
+from rest_framework.decorators import action
+from rest_framework.permissions import IsAuthenticated
+
+from .models import ExportJob
+from .serializers import ExportJobSerializer
+from .services import fail_interrupted_jobs
+
+
+class ExportJobViewSet(viewsets.ReadOnlyModelViewSet):
+    """Статус фоновых выгрузок пользователя и скачивание готовых файлов."""
+    serializer_class = ExportJobSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        queryset = ExportJob.objects.filter(created_by=self.request.user)
+        # Потерянные при рестарте задачи отдаем как failed, чтобы клиент не опрашивал их вечно
+        fail_interrupted_jobs(queryset)
+        return queryset
+
+    @action(detail=True, methods=['get'])
+    def download(self, request, pk=None):
+        job = self.get_object()
+        if job.status != 'done' or not job.file_path.exists():
+            raise Http404('Файл выгрузки еще не готов.')
+        return FileResponse(open(job.file_path, 'rb'), as_attachment=True, filename=job.file_name)
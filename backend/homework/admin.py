@@ -0,0 +1,8 @@
+from django.contrib import admin
+from .models import Submission
+
+@admin.register(Submission)
+class SubmissionAdmin(admin.ModelAdmin):
+    list_display = ('lesson', 'student', 'status', 'grade', 'is_late', 'submitted_at')
+    list_filter = ('status', 'is_late')
+    raw_id_fields = ('lesson', 'course', 'student', 'graded_by')
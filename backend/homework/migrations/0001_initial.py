@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:01
+
+import django.core.validators
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('courses', '0005_lesson_homework_deadline'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Submission',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('answer', models.TextField(blank=True, verbose_name='Ответ')),
+                ('file_name', models.CharField(blank=True, max_length=255, verbose_name='Имя файла')),
+                ('content_type', models.CharField(blank=True, max_length=100, verbose_name='MIME-тип')),
+                ('size', models.BigIntegerField(default=0, verbose_name='Размер файла, байт')),
+                ('sha256', models.CharField(blank=True, max_length=64, verbose_name='SHA-256 файла')),
+                ('submitted_at', models.DateTimeField(verbose_name='Сдано')),
+                ('is_late', models.BooleanField(default=False, verbose_name='После срока')),
+                ('status', models.CharField(choices=[('submitted', 'На проверке'), ('graded', 'Проверено')], default='submitted', max_length=10, verbose_name='Статус')),
+                ('grade', models.PositiveSmallIntegerField(blank=True, null=True, validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(5)], verbose_name='Оценка')),
+                ('teacher_comment', models.TextField(blank=True, verbose_name='Комментарий преподавателя')),
+                ('graded_at', models.DateTimeField(blank=True, null=True, verbose_name='Проверено')),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='submissions', to='courses.course', verbose_name='Курс')),
+                ('graded_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Кто проверил')),
+                ('lesson', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='submissions', to='courses.lesson', verbose_name='Урок')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='submissions', to=settings.AUTH_USER_MODEL, verbose_name='Ученик')),
+            ],
+            options={
+                'verbose_name': 'Домашняя работа',
+                'verbose_name_plural': 'Домашние работы',
+                'indexes': [models.Index(fields=['course', 'status', 'submitted_at', 'id'], name='submission_queue_idx'), models.Index(fields=['student', 'submitted_at'], name='submission_student_idx')],
+                'constraints': [models.UniqueConstraint(fields=('lesson', 'student'), name='submission_lesson_student')],
+            },
+        ),
+    ]
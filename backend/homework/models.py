@@ -0,0 +1,71 @@
+# backend/homework/models.py
+
+from django.conf import settings
+from django.core.validators import MaxValueValidator, MinValueValidator
+from django.db import models
+
+from courses.models import Course, Lesson
+
+
+class Submission(models.Model):
+    """Сданное учеником Д/З к уроку: текст ответа и/или файл. Одна работа на ученика и урок."""
+    STATUS_CHOICES = (
+        ('submitted', 'На проверке'),
+        ('graded', 'Проверено'),
+    )
+    lesson = models.ForeignKey(Lesson, on_delete=models.CASCADE, related_name='submissions', verbose_name='Урок')
+    # Копия lesson.course: очередь проверки идет по индексу без JOIN с уроками
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='submissions', verbose_name='Курс')
+    student = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='submissions',
+        verbose_name='Ученик'
+    )
+    answer = models.TextField(blank=True, verbose_name='Ответ')
+    file_name = models.CharField(max_length=255, blank=True, verbose_name='Имя файла')
+    content_type = models.CharField(max_length=100, blank=True, verbose_name='MIME-тип')
+    size = models.BigIntegerField(default=0, verbose_name='Размер файла, байт')
+    sha256 = models.CharField(max_length=64, blank=True, verbose_name='SHA-256 файла')
+    submitted_at = models.DateTimeField(verbose_name='Сдано')
+    is_late = models.BooleanField(default=False, verbose_name='После срока')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='submitted', verbose_name='Статус')
+    grade = models.PositiveSmallIntegerField(
+        null=True,
+        blank=True,
+        validators=[MinValueValidator(1), MaxValueValidator(5)],
+        verbose_name='Оценка'
+    )
+    teacher_comment = models.TextField(blank=True, verbose_name='Комментарий преподавателя')
+    graded_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+        verbose_name='Кто проверил'
+    )
+    graded_at = models.DateTimeField(null=True, blank=True, verbose_name='Проверено')
+
+    class Meta:
+        verbose_name = 'Домашняя работа'
+        verbose_name_plural = 'Домашние работы'
+        constraints = [
+            models.UniqueConstraint(fields=['lesson', 'student'], name='submission_lesson_student'),
+        ]
+        indexes = [
+            # Очередь проверки: WHERE course_id IN (...) AND status = ... ORDER BY submitted_at, id
+            models.Index(fields=['course', 'status', 'submitted_at', 'id'], name='submission_queue_idx'),
+            models.Index(fields=['student', 'submitted_at'], name='submission_student_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.student_id} - {self.lesson_id}'
+
+    @property
+    def relative_path(self):
+        return f'{self.pk}/{self.file_name}'
+
+    @property
+    def file_path(self):
+        return settings.HOMEWORK_ROOT / self.relative_path
@@ -0,0 +1,63 @@
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.utils.text import get_valid_filename
+from rest_framework import serializers
+
+from courses.models import Lesson
+from .models import Submission
+
+
+class SubmissionListSerializer(serializers.ModelSerializer):
+    """Строка списка и очереди проверки: без текста ответа и содержимого файла."""
+    lesson_title = serializers.CharField(source='lesson.title', read_only=True)
+    student_name = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Submission
+        fields = (
+            'id', 'lesson', 'lesson_title', 'course', 'student', 'student_name', 'file_name', 'size',
+            'submitted_at', 'is_late', 'status', 'grade', 'graded_at',
+        )
+
+    def get_student_name(self, obj):
+        return f'{obj.student.first_name} {obj.student.last_name}'.strip() or obj.student.email
+
+
+class SubmissionSerializer(SubmissionListSerializer):
+    class Meta(SubmissionListSerializer.Meta):
+        fields = SubmissionListSerializer.Meta.fields + ('answer', 'content_type', 'sha256', 'teacher_comment', 'graded_by')
+
+
+class SubmissionCreateSerializer(serializers.Serializer):
+    lesson = serializers.PrimaryKeyRelatedField(queryset=Lesson.objects.only('id', 'course_id', 'homework_deadline'))
+    answer = serializers.CharField(required=False, allow_blank=True, default='')
+    file = serializers.FileField(required=False)
+
+    def validate_file(self, value):
+        if value.size > settings.HOMEWORK_MAX_FILE_SIZE:
+            raise serializers.ValidationError('Файл больше допустимого размера.')
+        try:
+            value.name = get_valid_filename(value.name)
+        except SuspiciousFileOperation:
+            raise serializers.ValidationError('Недопустимое имя файла.')
+        return value
+
+    def validate(self, data):
+        if not data.get('answer') and not data.get('file'):
+            raise serializers.ValidationError('Нужен текст ответа или файл.')
+        return data
+
+
+class GradeSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    grade = serializers.IntegerField(min_value=1, max_value=5)
+    comment = serializers.CharField(required=False, allow_blank=True, default='')
+
+
+class BulkGradeSerializer(serializers.Serializer):
+    grades = GradeSerializer(many=True, allow_empty=False)
+
+    def validate_grades(self, grades):
+        if len(grades) > 1000:
+            raise serializers.ValidationError('Не больше 1000 работ за один запрос.')
+        return grades
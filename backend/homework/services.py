@@ -0,0 +1,69 @@
+# backend/homework/services.py
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from courses.scheduling import course_students
+from media_files.storage import save_uploaded_file
+from .models import Submission
+
+UPDATED, NOT_FOUND = 'updated', 'not_found'
+
+
+def submit(lesson, student, answer, uploaded_file=None):
+    """
+    Создает или заменяет работу ученика к уроку. Проверенную работу заменить нельзя.
+    Файл переносится в HOMEWORK_ROOT частями, старый файл удаляется.
+    """
+    if student.pk not in course_students([lesson.course_id], [student.pk]).get(lesson.course_id, ()):
+        raise ValidationError({'lesson': ['Вы не записаны на этот курс.']})
+
+    now = timezone.now()
+    try:
+        with transaction.atomic():
+            submission = Submission.objects.select_for_update().filter(lesson=lesson, student=student).first()
+            if submission is not None and submission.status == 'graded':
+                raise ValidationError({'detail': 'Работа уже проверена.'})
+            old_path = submission.file_path if submission is not None and submission.file_name else None
+            if submission is None:
+                submission = Submission(lesson=lesson, course_id=lesson.course_id, student=student)
+
+            submission.answer = answer
+            submission.submitted_at = now
+            submission.is_late = bool(lesson.homework_deadline and now > lesson.homework_deadline)
+            if uploaded_file is not None:
+                submission.file_name = uploaded_file.name
+                submission.content_type = uploaded_file.content_type or ''
+            submission.save()
+
+            if uploaded_file is not None:
+                submission.size, submission.sha256 = save_uploaded_file(uploaded_file, submission.file_path)
+                submission.save(update_fields=['size', 'sha256'])
+                if old_path is not None and old_path != submission.file_path:
+                    old_path.unlink(missing_ok=True)
+    except IntegrityError:
+        # Параллельная первая сдача той же работы
+        raise ValidationError({'detail': 'Работа уже сдается, повторите запрос.'})
+    return submission
+
+
+def grade_submissions(queryset, grades, graded_by):
+    """
+    Выставляет оценки одним UPDATE (bulk_update строит CASE по ID).
+    queryset ограничивает работы теми, что доступны проверяющему.
+    """
+    by_id = {grade['id']: grade for grade in grades}
+    now = timezone.now()
+    submissions = list(queryset.filter(pk__in=by_id).only('id'))
+    for submission in submissions:
+        grade = by_id[submission.pk]
+        submission.grade = grade['grade']
+        submission.teacher_comment = grade.get('comment', '')
+        submission.status = 'graded'
+        submission.graded_by = graded_by
+        submission.graded_at = now
+    Submission.objects.bulk_update(submissions, ['grade', 'teacher_comment', 'status', 'graded_by', 'graded_at'])
+
+    graded = {submission.pk for submission in submissions}
+    return [{'id': pk, 'result': UPDATED if pk in graded else NOT_FOUND} for pk in by_id]
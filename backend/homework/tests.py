@@ -0,0 +1,119 @@
+import datetime
+import shutil
+import tempfile
+from pathlib import Path
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from courses.models import Course, Lesson
+from users.models import User
+from .models import Submission
+
+
+class SubmissionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.teacher = User.objects.create_user('teacher', password='pw', role='teacher')
+        cls.other_teacher = User.objects.create_user('other', password='pw', role='teacher')
+        cls.student = User.objects.create_user('student', password='pw')
+        cls.outsider = User.objects.create_user('outsider', password='pw')
+        cls.course = Course.objects.create(title='Математика', subject='math', price=1000, teacher=cls.teacher)
+        cls.other_course = Course.objects.create(title='Физика', subject='physics', price=1000, teacher=cls.other_teacher)
+        cls.course.students.add(cls.student)
+        cls.other_course.students.add(cls.student)
+        cls.lesson = Lesson.objects.create(
+            course=cls.course, title='Дроби', homework_deadline=timezone.now() + datetime.timedelta(days=1),
+        )
+        cls.other_lesson = Lesson.objects.create(course=cls.other_course, title='Механика')
+
+    def setUp(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root, ignore_errors=True)
+        override = override_settings(HOMEWORK_ROOT=Path(root))
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def client_for(self, user):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client
+
+    def submit(self, user, lesson, **data):
+        return self.client_for(user).post(
+            '/api/homework/submissions/', dict(data, lesson=lesson.pk), format='multipart',
+        )
+
+    def test_submit_and_resubmit(self):
+        response = self.submit(self.student, self.lesson, answer='Ответ')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual((response.data['status'], response.data['is_late']), ('submitted', False))
+
+        upload = SimpleUploadedFile('решение.txt', b'x = 1/2', content_type='text/plain')
+        response = self.submit(self.student, self.lesson, answer='Исправлено', file=upload)
+        self.assertEqual(response.status_code, 201)
+        submission = Submission.objects.get()
+        self.assertEqual((submission.answer, submission.size), ('Исправлено', 7))
+        self.assertEqual(submission.file_path.read_bytes(), b'x = 1/2')
+
+    def test_submit_rejected(self):
+        self.assertEqual(self.submit(self.outsider, self.lesson, answer='Ответ').status_code, 400)
+        self.assertEqual(self.submit(self.student, self.lesson).status_code, 400)
+        self.submit(self.student, self.lesson, answer='Ответ')
+        Submission.objects.update(status='graded', grade=5)
+        # Проверенную работу заменить нельзя
+        self.assertEqual(self.submit(self.student, self.lesson, answer='Еще раз').status_code, 400)
+        self.assertEqual(Submission.objects.get().answer, 'Ответ')
+
+    def test_bulk_grade(self):
+        own = Submission.objects.get(pk=self.submit(self.student, self.lesson, answer='Ответ').data['id'])
+        foreign = Submission.objects.get(pk=self.submit(self.student, self.other_lesson, answer='Ответ').data['id'])
+
+        response = self.client_for(self.teacher).post('/api/homework/submissions/grade/', {'grades': [
+            {'id': own.pk, 'grade': 5, 'comment': 'Отлично'},
+            {'id': foreign.pk, 'grade': 2},
+        ]}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, {'updated': 1, 'results': [
+            {'id': own.pk, 'result': 'updated'}, {'id': foreign.pk, 'result': 'not_found'},
+        ]})
+        own.refresh_from_db()
+        foreign.refresh_from_db()
+        self.assertEqual(
+            (own.status, own.grade, own.teacher_comment, own.graded_by_id),
+            ('graded', 5, 'Отлично', self.teacher.pk),
+        )
+        self.assertEqual((foreign.status, foreign.grade), ('submitted', None))
+
+    def test_bulk_grade_validation(self):
+        for grades in ([{'id': 1, 'grade': 6}], []):
+            response = self.client_for(self.teacher).post('/api/homework/submissions/grade/', {'grades': grades}, format='json')
+            self.assertEqual(response.status_code, 400)
+        response = self.client_for(self.student).post('/api/homework/submissions/grade/', {'grades': [{'id': 1, 'grade': 5}]}, format='json')
+        self.assertEqual(response.status_code, 403)
+
+    def test_review_queue_cursor_is_stable(self):
+        """Курсор не теряет и не повторяет работы, сданные в одну секунду, даже если очередь меняется."""
+        submitted_at = timezone.now()
+        students = [User.objects.create_user('s%d' % i, password='pw') for i in range(5)]
+        submissions = [
+            Submission.objects.create(lesson=self.lesson, course=self.course, student=student, answer='-', submitted_at=submitted_at)
+            for student in students
+        ]
+        client = self.client_for(self.teacher)
+        response = client.get('/api/homework/submissions/review-queue/', {'page_size': 2})
+        seen = [item['id'] for item in response.data['results']]
+
+        # Во время обхода одну работу проверили, а новая встала в конец очереди
+        Submission.objects.filter(pk=submissions[0].pk).update(status='graded', grade=4)
+        late = Submission.objects.create(
+            lesson=self.lesson, course=self.course, student=self.student, answer='-',
+            submitted_at=submitted_at + datetime.timedelta(seconds=1),
+        )
+        while response.data['next']:
+            response = client.get(response.data['next'])
+            seen += [item['id'] for item in response.data['results']]
+
+        self.assertEqual(seen, [submission.pk for submission in submissions] + [late.pk])
@@ -0,0 +1,166 @@
+# backend/homework/views.py
+
+from django.db.models import Q
+from django.http import Http404
+from django.utils.dateparse import parse_datetime
+from rest_framework import mixins, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound, PermissionDenied
+from rest_framework.pagination import CursorPagination
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from courses.models import Course
+from media_files.storage import serve_file
+from .models import Submission
+from .serializers import (
+    BulkGradeSerializer,
+    SubmissionCreateSerializer,
+    SubmissionListSerializer,
+    SubmissionSerializer,
+)
+from .services import grade_submissions, submit
+
+# Поля для списков: ни текста ответа, ни содержимого урока
+LIST_FIELDS = (
+    'id', 'lesson', 'course', 'student', 'file_name', 'size', 'submitted_at', 'is_late', 'status',
+    'grade', 'graded_at', 'lesson__title', 'student__first_name', 'student__last_name', 'student__email',
+)
+
+
+class ReviewQueuePagination(CursorPagination):
+    """
+    Курсор по (submitted_at, id) идет по индексу submission_queue_idx без OFFSET.
+
+    CursorPagination DRF сравнивает только первое поле ordering, а строки с
+    равным submitted_at пропускает смещением; если показанную работу за это
+    время проверили, смещение перескакивает через непоказанную. Поэтому
+    позиция курсора здесь - пара (submitted_at, id), а сравнение - по паре.
+    """
+    ordering = ('submitted_at', 'id')
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+
+    def _get_position_from_instance(self, instance, ordering):
+        return '%s|%s' % (instance.submitted_at.isoformat(), instance.pk)
+
+    def _position_filter(self, position, reverse):
+        submitted_at, _, pk = position.partition('|')
+        submitted_at = parse_datetime(submitted_at)
+        if submitted_at is None or not pk.isdigit():
+            raise NotFound(self.invalid_cursor_message)
+        op = 'lt' if reverse else 'gt'
+        return Q(**{'submitted_at__' + op: submitted_at}) | Q(submitted_at=submitted_at, **{'id__' + op: int(pk)})
+
+    def paginate_queryset(self, queryset, request, view=None):
+        # Как CursorPagination.paginate_queryset, но позиция уникальна: смещение всегда 0
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.base_url = request.build_absolute_uri()
+        self.cursor = self.decode_cursor(request)
+        offset, reverse, current_position = self.cursor or (0, False, None)
+
+        ordering = [('-' + field) for field in self.ordering] if reverse else list(self.ordering)
+        queryset = queryset.order_by(*ordering)
+        if current_position is not None:
+            queryset = queryset.filter(self._position_filter(current_position, reverse))
+
+        results = list(queryset[offset:offset + self.page_size + 1])
+        self.page = results[:self.page_size]
+        following_position = (
+            self._get_position_from_instance(results[-1], self.ordering) if len(results) > len(self.page) else None
+        )
+        if reverse:
+            self.page.reverse()
+            self.has_next = current_position is not None or offset > 0
+            self.has_previous = following_position is not None
+            self.next_position, self.previous_position = current_position, following_position
+        else:
+            self.has_next = following_position is not None
+            self.has_previous = current_position is not None or offset > 0
+            self.next_position, self.previous_position = following_position, current_position
+        return self.page
+
+
+class SubmissionViewSet(mixins.ListModelMixin, mixins.RetrieveModelMixin, viewsets.GenericViewSet):
+    """
+    Домашние работы. Ученик сдает (POST multipart: lesson, answer, file) и видит свои работы,
+    преподаватель - работы по своим курсам, очередь проверки и массовое выставление оценок.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        user = self.request.user
+        submissions = Submission.objects.select_related('lesson', 'student')
+        if not user.is_staff:
+            submissions = submissions.filter(Q(student_id=user.pk) | Q(course__teacher_id=user.pk))
+        if self.action != 'retrieve':
+            submissions = submissions.only(*LIST_FIELDS)
+
+        for param in ('lesson', 'course'):
+            value = self.request.query_params.get(param)
+            if value and value.isdigit():
+                submissions = submissions.filter(**{param + '_id': int(value)})
+        status_filter = self.request.query_params.get('status')
+        if status_filter:
+            submissions = submissions.filter(status=status_filter)
+        return submissions.order_by('-submitted_at', '-id')
+
+    def get_serializer_class(self):
+        if self.action == 'retrieve':
+            return SubmissionSerializer
+        return SubmissionListSerializer
+
+    def create(self, request):
+        serializer = SubmissionCreateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        submission = submit(data['lesson'], request.user, data['answer'], data.get('file'))
+        submission = self.get_queryset().get(pk=submission.pk)
+        return Response(SubmissionListSerializer(submission).data, status=status.HTTP_201_CREATED)
+
+    def get_reviewer_queryset(self):
+        user = self.request.user
+        if user.is_staff:
+            return Submission.objects.all()
+        if user.role != 'teacher':
+            raise PermissionDenied('Доступно только преподавателям.')
+        return Submission.objects.filter(course_id__in=Course.objects.filter(teacher_id=user.pk).values('id'))
+
+    @action(detail=False, methods=['get'], url_path='review-queue')
+    def review_queue(self, request):
+        # ?status=submitted (по умолчанию) | graded, ?course=<id>
+        submissions = self.get_reviewer_queryset().filter(status=request.query_params.get('status', 'submitted'))
+        course = request.query_params.get('course')
+        if course and course.isdigit():
+            submissions = submissions.filter(course_id=int(course))
+        submissions = submissions.select_related('lesson', 'student').only(*LIST_FIELDS)
+
+        paginator = ReviewQueuePagination()
+        page = paginator.paginate_queryset(submissions, request, view=self)
+        return paginator.get_paginated_response(SubmissionListSerializer(page, many=True).data)
+
+    @action(detail=False, methods=['post'])
+    def grade(self, request):
+        # {"grades": [{"id": 1, "grade": 5, "comment": "..."}, ...]}
+        serializer = BulkGradeSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        results = grade_submissions(self.get_reviewer_queryset(), serializer.validated_data['grades'], request.user)
+        return Response({
+            'updated': sum(result['result'] == 'updated' for result in results),
+            'results': results,
+        })
+
+    @action(detail=True, methods=['get'])
+    def download(self, request, pk=None):
+        submission = self.get_object()
+        if not submission.file_name or not submission.file_path.exists():
+            raise Http404('К работе не приложен файл.')
+        return serve_file(
+            request,
+            submission.file_path,
+            submission.file_name,
+            submission.content_type,
+            as_attachment=True,
+        )
@@ -0,0 +1,7 @@
+from django.contrib import admin
+from .models import IdempotencyKey
+
+@admin.register(IdempotencyKey)
+class IdempotencyKeyAdmin(admin.ModelAdmin):
+    list_display = ('key', 'scope', 'endpoint', 'response_status', 'created_at', 'expires_at')
+    search_fields = ('key', 'scope')
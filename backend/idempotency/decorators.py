@@ -0,0 +1,149 @@
+# backend/idempotency/decorators.py
+"""
+Поддержка заголовка Idempotency-Key для POST-эндпоинтов.
+
+Клиент, повторяющий запрос по таймауту, передает тот же ключ (UUID на
+операцию). Первый запрос с ключом вставляет строку IdempotencyKey и
+выполняется в одной транзакции с ней; ответ сохраняется в ту же строку.
+Повтор получает сохраненный ответ с заголовком Idempotent-Replayed: true,
+не выполняя операцию еще раз.
+
+Параллельный дубликат (повтор пришел, пока первый запрос еще идет)
+блокируется уникальным индексом на вставке той же строки до коммита
+первого запроса и затем получает его ответ. Если первый запрос упал и
+откатился, строки нет, и дубликат выполняется сам.
+
+Ответы 5xx и исключения не сохраняются. Ключи живут IDEMPOTENCY_KEY_TTL
+секунд, просроченные удаляет команда purge_idempotency_keys.
+
+Ключи пользователя видны только ему, анонимные - только запросам с того же
+адреса (scope по хешу IP), чтобы ключ одного посетителя не повторил ответ
+другому.
+
+@idempotent(atomic=False) - для view, которые нельзя держать в одной
+транзакции (буферизованный прием заявок, applications/ingestion.py): ключ
+проверяется до выполнения, а строка с ответом пишется после, только для
+окончательного ответа. Параллельный дубликат тогда может выполниться дважды,
+поэтому такой view должен сам отсекать дубли.
+"""
+
+import datetime
+import functools
+import hashlib
+import json
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.throttling import BaseThrottle
+
+from .models import IdempotencyKey
+
+HEADER = 'Idempotency-Key'
+REPLAYED_HEADER = 'Idempotent-Replayed'
+DEFAULT_TTL = 24 * 60 * 60
+
+
+def _replay(record, endpoint, request_hash):
+    if record.endpoint != endpoint or record.request_hash != request_hash:
+        return Response(
+            {'detail': 'Ключ идемпотентности уже использован для другого запроса.'},
+            status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+        )
+    return Response(record.response_body, status=record.response_status, headers={REPLAYED_HEADER: 'true'})
+
+
+def _scope(request):
+    if request.user.is_authenticated:
+        return 'user:%s' % request.user.pk
+    # Адрес клиента определяется так же, как в троттлинге (X-Forwarded-For с учетом NUM_PROXIES)
+    ident = BaseThrottle().get_ident(request) or ''
+    return 'anonymous:%s' % hashlib.sha256(ident.encode()).hexdigest()[:32]
+
+
+def _response_body(response):
+    return json.loads(JSONRenderer().render(response.data)) if response.data is not None else None
+
+
+def _run_without_transaction(view, args, kwargs, scope, key, endpoint, request_hash, now, expires_at):
+    existing = IdempotencyKey.objects.filter(scope=scope, key=key, expires_at__gt=now).first()
+    if existing is not None:
+        return _replay(existing, endpoint, request_hash)
+    response = view(*args, **kwargs)
+    # 202 - результат не окончательный; к тому же запись ключа на каждый ответ
+    # во время всплеска свела бы буферизацию записи на нет
+    if response.status_code >= 500 or response.status_code == status.HTTP_202_ACCEPTED:
+        return response
+    try:
+        with transaction.atomic():
+            IdempotencyKey.objects.filter(scope=scope, key=key, expires_at__lte=now).delete()
+            IdempotencyKey.objects.create(
+                scope=scope, key=key, endpoint=endpoint, request_hash=request_hash,
+                response_status=response.status_code, response_body=_response_body(response),
+                expires_at=expires_at,
+            )
+    except IntegrityError:
+        # Параллельный дубликат уже сохранил свой ответ
+        pass
+    return response
+
+
+def idempotent(view=None, *, atomic=True):
+    """
+    Декоратор метода ViewSet (self, request, ...) или функции-view под @api_view (request, ...):
+    @idempotent или @idempotent(atomic=False).
+    """
+    if view is None:
+        return functools.partial(idempotent, atomic=atomic)
+
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        request = args[1] if len(args) > 1 and isinstance(args[1], Request) else args[0]
+        key = request.headers.get(HEADER)
+        if key is None:
+            return view(*args, **kwargs)
+        if not key or len(key) > 255:
+            return Response({'detail': 'Некорректный Idempotency-Key.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        scope = _scope(request)
+        endpoint = '%s %s' % (request.method, request.path)
+        request_hash = hashlib.sha256(request.body).hexdigest()
+        now = timezone.now()
+        expires_at = now + datetime.timedelta(seconds=getattr(settings, 'IDEMPOTENCY_KEY_TTL', DEFAULT_TTL))
+
+        if not atomic:
+            return _run_without_transaction(view, args, kwargs, scope, key, endpoint, request_hash, now, expires_at)
+
+        with transaction.atomic():
+            for attempt in range(2):
+                try:
+                    # Вставка ждет на уникальном индексе, пока не завершится параллельный запрос с тем же ключом
+                    with transaction.atomic():
+                        record = IdempotencyKey.objects.create(
+                            scope=scope, key=key, endpoint=endpoint, request_hash=request_hash,
+                            response_status=0, expires_at=expires_at,
+                        )
+                    break
+                except IntegrityError:
+                    existing = IdempotencyKey.objects.filter(scope=scope, key=key).first()
+                    if existing is not None and existing.expires_at > now:
+                        return _replay(existing, endpoint, request_hash)
+                    # Просроченный ключ, который еще не удалила чистка, можно занять заново
+                    IdempotencyKey.objects.filter(scope=scope, key=key, expires_at__lte=now).delete()
+            else:
+                return Response({'detail': 'Запрос с этим ключом уже выполняется.'}, status=status.HTTP_409_CONFLICT)
+
+            response = view(*args, **kwargs)
+            if response.status_code >= 500:
+                record.delete()
+                return response
+            record.response_status = response.status_code
+            record.response_body = _response_body(response)
+            record.save(update_fields=['response_status', 'response_body'])
+        return response
+
+    return wrapper
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from idempotency.models import IdempotencyKey
+
+
+class Command(BaseCommand):
+    help = 'Deletes expired idempotency keys in small batches (short transactions, no long table locks)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        expired = IdempotencyKey.objects.filter(expires_at__lt=now).order_by('expires_at')
+        total = 0
+        while True:
+            # Пачка ID по индексу expires_at, затем удаление по первичному ключу
+            batch = list(expired.values_list('pk', flat=True)[:options['batch_size']])
+            if not batch:
+                break
+            deleted, _ = IdempotencyKey.objects.filter(pk__in=batch).delete()
+            total += deleted
+        self.stdout.write(f'Deleted {total} expired idempotency keys')
@@ -0,0 +1,26 @@
+# backend/idempotency/models.py
+
+from django.db import models
+
+
+class IdempotencyKey(models.Model):
+    """Ответ на POST с заголовком Idempotency-Key, повторяется для того же ключа (idempotency/decorators.py)."""
+    # user:<id> или anonymous:<хеш IP> - ключи разных пользователей не пересекаются
+    scope = models.CharField(max_length=50)
+    key = models.CharField(max_length=255)
+    # Метод и путь: один ключ нельзя использовать для разных эндпоинтов
+    endpoint = models.CharField(max_length=255)
+    # SHA-256 тела запроса: тот же ключ с другим телом - ошибка клиента
+    request_hash = models.CharField(max_length=64)
+    response_status = models.PositiveSmallIntegerField()
+    response_body = models.JSONField(null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['scope', 'key'], name='idempotency_scope_key'),
+        ]
+
+    def __str__(self):
+        return f'{self.scope} {self.key} -> {self.response_status}'
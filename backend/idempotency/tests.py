@@ -0,0 +1,60 @@
+from django.test import TestCase
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory
+
+from .decorators import REPLAYED_HEADER, idempotent
+from .models import IdempotencyKey
+
+
+def _make_view(status_code, atomic=True):
+    calls = []
+
+    @api_view(['POST'])
+    @permission_classes([AllowAny])
+    @idempotent(atomic=atomic)
+    def view(request):
+        calls.append(request.data)
+        return Response({'n': len(calls)}, status=status_code)
+
+    return view, calls
+
+
+class IdempotentTests(TestCase):
+    def setUp(self):
+        self.factory = APIRequestFactory()
+
+    def post(self, view, key='k-1', ip='10.0.0.1'):
+        request = self.factory.post('/x/', {'a': 1}, format='json', REMOTE_ADDR=ip, HTTP_IDEMPOTENCY_KEY=key)
+        return view(request)
+
+    def test_anonymous_keys_scoped_by_address(self):
+        """Один ключ с разных адресов - разные операции, с того же адреса - повтор."""
+        view, calls = _make_view(status.HTTP_201_CREATED)
+        first = self.post(view, ip='10.0.0.1')
+        other = self.post(view, ip='10.0.0.2')
+        replay = self.post(view, ip='10.0.0.1')
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(other.data, {'n': 2})
+        self.assertEqual(replay.data, first.data)
+        self.assertEqual(replay[REPLAYED_HEADER], 'true')
+        self.assertTrue(all(s.startswith('anonymous:') for s in IdempotencyKey.objects.values_list('scope', flat=True)))
+
+    def test_non_atomic_stores_final_response(self):
+        view, calls = _make_view(status.HTTP_201_CREATED, atomic=False)
+        self.post(view)
+        replay = self.post(view)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(replay.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(replay[REPLAYED_HEADER], 'true')
+
+    def test_non_atomic_skips_accepted_and_errors(self):
+        """202 и 5xx не сохраняются: повтор выполняется заново."""
+        for code in (status.HTTP_202_ACCEPTED, status.HTTP_503_SERVICE_UNAVAILABLE):
+            view, calls = _make_view(code, atomic=False)
+            self.post(view, key='k-%s' % code)
+            self.post(view, key='k-%s' % code)
+            self.assertEqual(len(calls), 2)
+        self.assertFalse(IdempotencyKey.objects.exists())
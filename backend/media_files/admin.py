@@ -0,0 +1,8 @@
+from django.contrib import admin
+from .models import MediaFile
+
+@admin.register(MediaFile)
+class MediaFileAdmin(admin.ModelAdmin):
+    list_display = ('file_name', 'lesson', 'kind', 'status', 'size', 'uploaded_by', 'created_at')
+    list_filter = ('kind', 'status')
+    raw_id_fields = ('lesson', 'uploaded_by')
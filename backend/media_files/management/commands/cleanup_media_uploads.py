@@ -0,0 +1,27 @@
+import datetime
+import shutil
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from media_files.models import MediaFile
+
+
+class Command(BaseCommand):
+    help = 'Deletes media uploads that were started but not completed within --days days'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=7)
+        parser.add_argument('--dry-run', action='store_true')
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - datetime.timedelta(days=options['days'])
+        stale = MediaFile.objects.filter(status='uploading', created_at__lt=cutoff)
+        count = 0
+        for media_file in stale.iterator():
+            count += 1
+            if not options['dry_run']:
+                shutil.rmtree(media_file.file_path.parent, ignore_errors=True)
+                media_file.delete()
+        verb = 'Would delete' if options['dry_run'] else 'Deleted'
+        self.stdout.write(f'{verb} {count} stale uploads')
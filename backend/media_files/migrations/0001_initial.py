@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:59
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('courses', '0004_lesson_interval'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MediaFile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('recording', 'Запись урока'), ('homework', 'Домашнее задание')], max_length=10, verbose_name='Тип')),
+                ('status', models.CharField(choices=[('uploading', 'Загружается'), ('ready', 'Готов')], default='uploading', max_length=10, verbose_name='Статус')),
+                ('file_name', models.CharField(max_length=255, verbose_name='Имя файла')),
+                ('content_type', models.CharField(default='application/octet-stream', max_length=100, verbose_name='MIME-тип')),
+                ('size', models.BigIntegerField(verbose_name='Размер, байт')),
+                ('received', models.BigIntegerField(default=0, verbose_name='Принято, байт')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Создан')),
+                ('completed_at', models.DateTimeField(blank=True, null=True, verbose_name='Загружен')),
+                ('lesson', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='media_files', to='courses.lesson', verbose_name='Урок')),
+                ('uploaded_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='uploaded_media_files', to=settings.AUTH_USER_MODEL, verbose_name='Кто загрузил')),
+            ],
+            options={
+                'verbose_name': 'Файл урока',
+                'verbose_name_plural': 'Файлы уроков',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['lesson', 'kind'], name='media_file_lesson_kind_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,56 @@
+# backend/media_files/models.py
+
+from django.conf import settings
+from django.db import models
+
+from courses.models import Lesson
+
+
+class MediaFile(models.Model):
+    """
+    Файл урока, хранящийся у нас: запись занятия или материалы Д/З.
+    Пока status = uploading, файл дописывается частями (received - сколько байт уже принято).
+    """
+    KIND_CHOICES = (
+        ('recording', 'Запись урока'),
+        ('homework', 'Домашнее задание'),
+    )
+    STATUS_CHOICES = (
+        ('uploading', 'Загружается'),
+        ('ready', 'Готов'),
+    )
+    lesson = models.ForeignKey(Lesson, on_delete=models.CASCADE, related_name='media_files', verbose_name='Урок')
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES, verbose_name='Тип')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='uploading', verbose_name='Статус')
+    file_name = models.CharField(max_length=255, verbose_name='Имя файла')
+    content_type = models.CharField(max_length=100, default='application/octet-stream', verbose_name='MIME-тип')
+    size = models.BigIntegerField(verbose_name='Размер, байт')
+    received = models.BigIntegerField(default=0, verbose_name='Принято, байт')
+    uploaded_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name='uploaded_media_files',
+        verbose_name='Кто загрузил'
+    )
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='Создан')
+    completed_at = models.DateTimeField(null=True, blank=True, verbose_name='Загружен')
+
+    class Meta:
+        verbose_name = 'Файл урока'
+        verbose_name_plural = 'Файлы уроков'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['lesson', 'kind'], name='media_file_lesson_kind_idx'),
+        ]
+
+    def __str__(self):
+        return self.file_name
+
+    @property
+    def relative_path(self):
+        return f'{self.pk}/{self.file_name}'
+
+    @property
+    def file_path(self):
+        return settings.MEDIA_FILES_ROOT / self.relative_path
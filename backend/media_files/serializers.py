@@ -0,0 +1,38 @@
+from django.core.exceptions import SuspiciousFileOperation
+from django.db.models import F
+from django.utils.text import get_valid_filename
+from rest_framework import serializers
+
+from courses.models import Lesson
+from .models import MediaFile
+from .storage import get_media_setting
+
+
+class MediaFileSerializer(serializers.ModelSerializer):
+    # ID преподавателя курса подтягивается тем же запросом, что и урок
+    lesson = serializers.PrimaryKeyRelatedField(
+        queryset=Lesson.objects.annotate(course_teacher_id=F('course__teacher_id'))
+    )
+    chunk_size = serializers.SerializerMethodField()
+
+    class Meta:
+        model = MediaFile
+        fields = (
+            'id', 'lesson', 'kind', 'status', 'file_name', 'content_type', 'size', 'received',
+            'chunk_size', 'uploaded_by', 'created_at', 'completed_at',
+        )
+        read_only_fields = ('status', 'received', 'uploaded_by', 'created_at', 'completed_at')
+
+    def get_chunk_size(self, obj):
+        return get_media_setting('CHUNK_SIZE')
+
+    def validate_file_name(self, value):
+        try:
+            return get_valid_filename(value)
+        except SuspiciousFileOperation:
+            raise serializers.ValidationError('Недопустимое имя файла.')
+
+    def validate_size(self, value):
+        if value <= 0 or value > get_media_setting('MAX_FILE_SIZE'):
+            raise serializers.ValidationError('Недопустимый размер файла.')
+        return value
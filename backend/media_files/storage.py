@@ -0,0 +1,165 @@
+# backend/media_files/storage.py
+"""
+Запись файлов частями и отдача с поддержкой Range.
+
+Тело запроса никогда не читается целиком: часть копируется из потока
+блоками по BLOCK_SIZE с подсчетом SHA-256, при несовпадении суммы файл
+обрезается обратно до начала части, и ее можно прислать повторно.
+
+Отдача: если настроен веб-сервер (MEDIA_FILES['SERVE_HEADER']), Django
+только проверяет права и отвечает заголовком X-Accel-Redirect/X-Sendfile,
+а файл и Range отдает nginx/Apache. Иначе полный файл уходит через
+FileResponse (wsgi.file_wrapper, у gunicorn это sendfile), а диапазон -
+потоковым итератором.
+"""
+
+import hashlib
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from rest_framework.exceptions import ValidationError
+
+BLOCK_SIZE = 64 * 1024
+
+DEFAULTS = {
+    'CHUNK_SIZE': 8 * 1024 * 1024,          # рекомендуемый размер части для клиента
+    'MAX_CHUNK_SIZE': 64 * 1024 * 1024,
+    'MAX_FILE_SIZE': 20 * 1024 * 1024 * 1024,
+    'SERVE_HEADER': None,                   # 'X-Accel-Redirect' | 'X-Sendfile' | None
+    'ACCEL_REDIRECT_PREFIX': '/protected-media/',
+}
+
+CONTENT_RANGE_RE = re.compile(r'^bytes (\d+)-(\d+)/(\d+)$')
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def get_media_setting(name):
+    return getattr(settings, 'MEDIA_FILES', {}).get(name, DEFAULTS[name])
+
+
+def parse_content_range(header):
+    """'bytes 0-1023/4096' -> (0, 1023, 4096) либо None."""
+    match = CONTENT_RANGE_RE.match(header or '')
+    if not match:
+        return None
+    start, end, total = map(int, match.groups())
+    return (start, end, total) if start <= end < total else None
+
+
+def write_chunk(path, offset, stream, length, expected_sha256):
+    """
+    Пишет length байт из stream в path начиная с offset.
+    Остаток файла за offset (недописанная прошлая попытка) отбрасывается.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    digest = hashlib.sha256()
+    with open(path, 'r+b' if path.exists() else 'wb') as output:
+        output.truncate(offset)
+        output.seek(offset)
+        remaining = length
+        while remaining:
+            block = stream.read(min(BLOCK_SIZE, remaining))
+            if not block:
+                break
+            digest.update(block)
+            output.write(block)
+            remaining -= len(block)
+
+        if remaining:
+            output.truncate(offset)
+            raise ValidationError({'detail': 'Тело запроса короче Content-Range.'})
+        if digest.hexdigest() != expected_sha256.lower():
+            output.truncate(offset)
+            raise ValidationError({'detail': 'Контрольная сумма части не совпала, отправьте ее повторно.'})
+
+
+def save_uploaded_file(uploaded_file, path):
+    """
+    Переносит загруженный файл (Django уже принял его потоком во временный
+    файл или память) в path частями, без чтения целиком. Возвращает (размер, sha256).
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    digest = hashlib.sha256()
+    size = 0
+    partial_path = path.with_name(path.name + '.part')
+    with open(partial_path, 'wb') as output:
+        for block in uploaded_file.chunks(BLOCK_SIZE):
+            digest.update(block)
+            output.write(block)
+            size += len(block)
+    os.replace(partial_path, path)
+    return size, digest.hexdigest()
+
+
+def parse_range(header, size):
+    """
+    Один диапазон из заголовка Range -> (start, end) включительно.
+    None - заголовка нет или он не поддерживается (отдаем файл целиком),
+    False - диапазон не пересекается с файлом (416).
+    """
+    match = RANGE_RE.match(header or '')
+    if not match or not size:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # bytes=-500: последние 500 байт; bytes=-0 - пустой суффикс, его удовлетворить нельзя
+        if int(last) == 0:
+            return False
+        return (max(size - int(last), 0), size - 1)
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size:
+        return False
+    return (start, end) if start <= end else None
+
+
+def _iter_range(path, start, length):
+    with open(path, 'rb') as source:
+        source.seek(start)
+        while length:
+            block = source.read(min(BLOCK_SIZE, length))
+            if not block:
+                break
+            length -= len(block)
+            yield block
+
+
+def serve_file(request, path, file_name, content_type=None, as_attachment=False):
+    content_type = content_type or mimetypes.guess_type(file_name)[0] or 'application/octet-stream'
+    disposition = '%s; filename*=UTF-8\'\'%s' % ('attachment' if as_attachment else 'inline', quote(file_name))
+
+    serve_header = get_media_setting('SERVE_HEADER')
+    if serve_header:
+        response = HttpResponse(content_type=content_type)
+        if serve_header == 'X-Accel-Redirect':
+            # internal-location в nginx смотрит на PRIVATE_MEDIA_ROOT
+            relative_path = path.relative_to(settings.PRIVATE_MEDIA_ROOT).as_posix()
+            response[serve_header] = get_media_setting('ACCEL_REDIRECT_PREFIX') + quote(relative_path)
+        else:
+            response[serve_header] = str(path)
+        response['Content-Disposition'] = disposition
+        return response
+
+    size = path.stat().st_size
+    byte_range = parse_range(request.headers.get('Range'), size)
+    if byte_range is False:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = 'bytes */%d' % size
+        return response
+
+    if byte_range is None:
+        response = FileResponse(open(path, 'rb'), content_type=content_type)
+    else:
+        start, end = byte_range
+        response = StreamingHttpResponse(_iter_range(path, start, end - start + 1), status=206, content_type=content_type)
+        response['Content-Range'] = 'bytes %d-%d/%d' % (start, end, size)
+        response['Content-Length'] = str(end - start + 1)
+    response['Accept-Ranges'] = 'bytes'
+    response['Content-Disposition'] = disposition
+    return response
@@ -0,0 +1,22 @@
+from django.test import SimpleTestCase
+
+from .storage import parse_range
+
+
+class ParseRangeTests(SimpleTestCase):
+    def test_ranges(self):
+        cases = [
+            ('bytes=0-99', (0, 99)),
+            ('bytes=900-', (900, 999)),
+            ('bytes=900-5000', (900, 999)),
+            ('bytes=-100', (900, 999)),
+            ('bytes=-5000', (0, 999)),
+            ('bytes=1000-', False),
+            # Пустой суффикс - 416 (RFC 9110, 14.1.2)
+            ('bytes=-0', False),
+            ('bytes=5-1', None),
+            ('items=0-1', None),
+            ('', None),
+        ]
+        for header, expected in cases:
+            self.assertEqual(parse_range(header, 1000), expected, header)
@@ -0,0 +1,115 @@
+# backend/media_files/views.py
+
+import shutil
+
+from django.db.models import Q
+from django.http import Http404
+from django.utils import timezone
+from rest_framework import mixins, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import PermissionDenied, ValidationError
+from rest_framework.permissions import IsAuthenticated, SAFE_METHODS
+from rest_framework.response import Response
+
+from backend.permissions import CourseAccessFilter, IsCourseTeacherOrReadOnly, IsTeacherOfCourseOrAdmin
+from .models import MediaFile
+from .serializers import MediaFileSerializer
+from .storage import get_media_setting, parse_content_range, serve_file, write_chunk
+
+
+class MediaFileViewSet(mixins.CreateModelMixin,
+                       mixins.RetrieveModelMixin,
+                       mixins.ListModelMixin,
+                       mixins.DestroyModelMixin,
+                       viewsets.GenericViewSet):
+    """
+    Файлы уроков. Загрузка по частям:
+
+    1. POST /api/media-files/ {lesson, kind, file_name, content_type, size} - начать загрузку;
+    2. PUT  /api/media-files/<id>/chunk/ с заголовками Content-Range: bytes <start>-<end>/<size>
+       и X-Chunk-SHA256, тело - байты части; start должен совпадать с received;
+    3. POST /api/media-files/<id>/complete/ - когда принят весь файл.
+
+    После обрыва клиент берет received из GET /api/media-files/<id>/ и продолжает с него.
+    Скачивание (GET .../download/) поддерживает Range и доступно участникам курса.
+    """
+    serializer_class = MediaFileSerializer
+    permission_classes = [IsAuthenticated, IsCourseTeacherOrReadOnly]
+    filter_backends = [CourseAccessFilter]
+    course_lookup = 'lesson__course'
+
+    def get_queryset(self):
+        files = MediaFile.objects.all()
+        lesson = self.request.query_params.get('lesson')
+        if lesson and lesson.isdigit():
+            files = files.filter(lesson_id=lesson)
+        user = self.request.user
+        if self.request.method in SAFE_METHODS and not user.is_staff:
+            # Недокачанные файлы видит только тот, кто их загружает
+            files = files.filter(Q(status='ready') | Q(uploaded_by_id=user.pk))
+        return files
+
+    def perform_create(self, serializer):
+        lesson = serializer.validated_data['lesson']
+        if not IsTeacherOfCourseOrAdmin().has_object_permission(self.request, self, lesson):
+            raise PermissionDenied('Загружать файлы может только преподаватель курса.')
+        serializer.save(uploaded_by=self.request.user)
+
+    def perform_destroy(self, instance):
+        shutil.rmtree(instance.file_path.parent, ignore_errors=True)
+        instance.delete()
+
+    @action(detail=True, methods=['put'])
+    def chunk(self, request, pk=None):
+        media_file = self.get_object()
+        if media_file.status != 'uploading':
+            raise ValidationError({'detail': 'Файл уже загружен.'})
+
+        content_range = parse_content_range(request.headers.get('Content-Range'))
+        checksum = request.headers.get('X-Chunk-SHA256')
+        if content_range is None or not checksum:
+            raise ValidationError({'detail': 'Нужны заголовки Content-Range и X-Chunk-SHA256.'})
+        start, end, total = content_range
+        length = end - start + 1
+        if total != media_file.size:
+            raise ValidationError({'detail': 'Размер в Content-Range не совпадает с размером файла.'})
+        if length > get_media_setting('MAX_CHUNK_SIZE'):
+            raise ValidationError({'detail': 'Часть больше MAX_CHUNK_SIZE.'})
+        if start != media_file.received:
+            return Response({'detail': 'Ожидается часть с позиции received.', 'received': media_file.received},
+                            status=status.HTTP_409_CONFLICT)
+
+        # Тело читается из потока блоками, request.data не трогаем
+        write_chunk(media_file.file_path, start, request.stream, length, checksum)
+
+        # received двигается, только если параллельный запрос не успел раньше
+        advanced = MediaFile.objects.filter(pk=media_file.pk, received=start).update(received=end + 1)
+        if not advanced:
+            media_file.refresh_from_db(fields=['received'])
+            return Response({'detail': 'Часть уже принята другим запросом.', 'received': media_file.received},
+                            status=status.HTTP_409_CONFLICT)
+        return Response({'received': end + 1, 'size': media_file.size})
+
+    @action(detail=True, methods=['post'])
+    def complete(self, request, pk=None):
+        media_file = self.get_object()
+        if media_file.status == 'uploading':
+            if media_file.received != media_file.size:
+                raise ValidationError({'detail': 'Файл принят не полностью.', 'received': media_file.received})
+            media_file.status = 'ready'
+            media_file.completed_at = timezone.now()
+            media_file.save(update_fields=['status', 'completed_at'])
+        return Response(self.get_serializer(media_file).data)
+
+    @action(detail=True, methods=['get'])
+    def download(self, request, pk=None):
+        media_file = self.get_object()
+        if media_file.status != 'ready' or not media_file.file_path.exists():
+            raise Http404('Файл еще не загружен.')
+        return serve_file(
+            request,
+            media_file.file_path,
+            media_file.file_name,
+            media_file.content_type,
+            as_attachment=media_file.kind == 'homework',
+        )
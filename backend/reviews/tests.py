@@ -1,3 +1,30 @@
 from django.test import TestCase
+from rest_framework.test import APIClient
 
-# Create your tests here.
+from backend.read_path import get_read_path
+from .models import Review
+from .serializers import ReviewSerializer
+
+
+class ReviewReadPathTests(TestCase):
+    """Быстрый путь чтения (FastListMixin) должен отдавать то же, что ReviewSerializer."""
+
+    @classmethod
+    def setUpTestData(cls):
+        Review.objects.create(author='Аня, 9 класс', text='Спасибо!', score_info='ЕГЭ 92', is_published=True)
+        Review.objects.create(author='Без оценок', text='', score_info='', is_published=True)
+        Review.objects.create(author='Скрытый', text='Не опубликован', score_info='-', is_published=False)
+
+    def test_read_path_matches_serializer(self):
+        queryset = Review.objects.order_by('-id')
+        self.assertEqual(
+            get_read_path(ReviewSerializer).serialize(queryset),
+            ReviewSerializer(queryset, many=True).data,
+        )
+
+    def test_list_endpoint_matches_serializer(self):
+        response = APIClient().get('/api/reviews/')
+        self.assertEqual(response.status_code, 200)
+        reference = ReviewSerializer(Review.objects.filter(is_published=True), many=True).data
+        by_id = lambda rows: sorted(rows, key=lambda row: row['id'])
+        self.assertEqual(by_id(response.data['results']), by_id(reference))
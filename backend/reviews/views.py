@@ -1,8 +1,9 @@
 from rest_framework import viewsets, permissions
 from .models import Review
 from .serializers import ReviewSerializer
+from backend.read_path import FastListMixin
 
-class ReviewViewSet(viewsets.ReadOnlyModelViewSet):
+class ReviewViewSet(FastListMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Review.objects.filter(is_published=True)
     serializer_class = ReviewSerializer
     permission_classes = [permissions.AllowAny] # Отзывы доступны всем
\ No newline at end of file
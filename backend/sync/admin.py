@@ -0,0 +1,7 @@
+from django.contrib import admin
+from .models import Change
+
+@admin.register(Change)
+class ChangeAdmin(admin.ModelAdmin):
+    list_display = ('id', 'model', 'object_id', 'course_id', 'user_id', 'deleted', 'created_at')
+    list_filter = ('model', 'deleted')
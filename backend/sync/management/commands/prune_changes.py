@@ -0,0 +1,20 @@
+import datetime
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from sync.models import Change
+
+
+class Command(BaseCommand):
+    help = 'Deletes change log entries older than --days days; clients with older tokens get 410 and reload'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=30)
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - datetime.timedelta(days=options['days'])
+        # Последняя строка остается всегда, иначе по пустому журналу нельзя отличить устаревший токен
+        last_id = Change.objects.order_by('-pk').values_list('pk', flat=True).first()
+        deleted, _ = Change.objects.filter(created_at__lt=cutoff).exclude(pk=last_id).delete()
+        self.stdout.write(f'Deleted {deleted} change log entries')
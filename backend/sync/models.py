@@ -0,0 +1,29 @@
+# backend/sync/models.py
+
+from django.db import models
+from django.utils import timezone
+
+
+class Change(models.Model):
+    """
+    Журнал изменений для дельта-синхронизации (GET /api/changes/?since=).
+    ID строки - монотонный номер изменения, клиент хранит последний полученный.
+    """
+    id = models.BigAutoField(primary_key=True)
+    # Ключ типа: courses, lessons, posts, applications, reviews или enrollments
+    model = models.CharField(max_length=20)
+    object_id = models.BigIntegerField()
+    # Курс урока или записи - по нему изменения отбираются для участников курса.
+    # Обычные числа, а не внешние ключи: строка журнала переживает удаление курса.
+    course_id = models.BigIntegerField(null=True, blank=True)
+    # Для enrollments - ученик (или преподаватель), которому курс стал доступен или недоступен
+    user_id = models.BigIntegerField(null=True, blank=True)
+    deleted = models.BooleanField(default=False)
+    created_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    class Meta:
+        verbose_name = 'Изменение'
+        verbose_name_plural = 'Журнал изменений'
+
+    def __str__(self):
+        return f'#{self.pk} {self.model}:{self.object_id}{" (удален)" if self.deleted else ""}'
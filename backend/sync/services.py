@@ -0,0 +1,172 @@
+# backend/sync/services.py
+"""
+Дельта-синхронизация: журнал изменений и выборка изменений с токена.
+
+Каждое сохранение и удаление курса, урока, поста, заявки и отзыва, а также
+запись на курс и отчисление добавляют строку в sync.Change в той же
+транзакции (см. sync/signals.py). Токен синхронизации - ID последней
+полученной строки журнала, выборка новых изменений идет по первичному ключу.
+
+ID выдаются при вставке, а видны после коммита, поэтому строка с меньшим ID
+может стать видна позже строки с большим. Токен не перескакивает такие
+пропуски: ответ заканчивается на последнем ID, перед которым нет пропуска
+моложе COMMIT_LAG секунд. Строки после пропуска все равно отдаются и придут
+повторно в следующем ответе; клиент применяет изменения идемпотентно.
+
+Ответ содержит текущее состояние изменившихся объектов, видимых
+пользователю, и ID удаленных или ставших невидимыми (tombstones).
+"""
+
+import datetime
+from collections import defaultdict
+
+from django.conf import settings
+from django.db.models import Min
+from django.utils import timezone
+
+from applications.models import Application
+from applications.serializers import ApplicationSerializer
+from backend.permissions import course_access_q
+from blog.models import Post
+from blog.serializers import PostSerializer
+from courses.models import Course, Lesson
+from courses.serializers import CourseCardSerializer, LessonSerializer
+from reviews.models import Review
+from reviews.serializers import ReviewSerializer
+from .models import Change
+
+DEFAULTS = {
+    # Сколько секунд транзакция может держать выданный ID до коммита
+    'COMMIT_LAG': 60,
+    'MAX_CHANGES': 1000,
+}
+
+ENROLLMENTS = 'enrollments'
+
+
+def get_sync_setting(name):
+    return getattr(settings, 'SYNC', {}).get(name, DEFAULTS[name])
+
+
+def record(model_key, object_ids, course_id=None, deleted=False):
+    """Пишет изменения объектов в журнал (в текущей транзакции)."""
+    Change.objects.bulk_create([
+        Change(model=model_key, object_id=object_id, course_id=course_id, deleted=deleted)
+        for object_id in object_ids
+    ])
+
+
+def record_lessons(lessons, deleted=False):
+    """lessons - пары (ID урока, ID курса)."""
+    Change.objects.bulk_create([
+        Change(model='lessons', object_id=lesson_id, course_id=course_id, deleted=deleted)
+        for lesson_id, course_id in lessons
+    ])
+
+
+def record_enrollments(pairs, removed=False):
+    """pairs - пары (ID пользователя, ID курса), курс стал ему доступен или недоступен."""
+    Change.objects.bulk_create([
+        Change(model=ENROLLMENTS, object_id=course_id, course_id=course_id, user_id=user_id, deleted=removed)
+        for user_id, course_id in pairs
+    ])
+
+
+def _courses(user):
+    return Course.objects.select_related('teacher__profile').prefetch_related('teacher__profile__enrolled_courses')
+
+
+def _lessons(user):
+    access = course_access_q(user, 'course')
+    return Lesson.objects.all() if access is None else Lesson.objects.filter(access)
+
+
+def _posts(user):
+    return Post.objects.select_related('category', 'author__profile').prefetch_related('author__profile__enrolled_courses')
+
+
+def _applications(user):
+    return Application.objects.all() if user.is_staff else Application.objects.none()
+
+
+def _reviews(user):
+    return Review.objects.filter(is_published=True)
+
+
+# Ключ типа -> (видимые пользователю объекты, сериализатор)
+TRACKED = {
+    'courses': (_courses, CourseCardSerializer),
+    'lessons': (_lessons, LessonSerializer),
+    'posts': (_posts, PostSerializer),
+    'applications': (_applications, ApplicationSerializer),
+    'reviews': (_reviews, ReviewSerializer),
+}
+
+
+class TokenExpired(Exception):
+    """Журнал с этого токена уже удален prune_changes: нужна полная загрузка."""
+
+
+def current_token():
+    return Change.objects.order_by('-pk').values_list('pk', flat=True).first() or 0
+
+
+def _safe_token(since, entries, now):
+    """Последний ID, до которого журнал не содержит пропусков моложе COMMIT_LAG."""
+    cutoff = now - datetime.timedelta(seconds=get_sync_setting('COMMIT_LAG'))
+    token = since
+    for entry in entries:
+        if entry.pk != token + 1 and entry.created_at > cutoff:
+            # Перед этой строкой может быть еще не закоммиченная транзакция
+            break
+        token = entry.pk
+    return token
+
+
+def changes_since(user, since, context=None):
+    """
+    Изменения после токена since для пользователя user.
+    Возвращает {'next', 'has_more', 'changes': {тип: [...]}, 'deleted': {тип: [ID]}}.
+    """
+    oldest = Change.objects.aggregate(oldest=Min('pk'))['oldest']
+    if oldest is not None and since < oldest - 1:
+        raise TokenExpired
+
+    limit = get_sync_setting('MAX_CHANGES')
+    now = timezone.now()
+    entries = list(Change.objects.filter(pk__gt=since).order_by('pk')[:limit])
+    token = _safe_token(since, entries, now)
+
+    staff = user.is_staff
+    course_ids = None
+    if not staff and any(entry.model == 'lessons' for entry in entries):
+        course_ids = set(Course.objects.filter(course_access_q(user)).values_list('pk', flat=True))
+
+    changed = defaultdict(set)
+    opened_courses = set()
+    for entry in entries:
+        if entry.model == ENROLLMENTS:
+            # Курс стал доступен или недоступен - его уроки появляются или становятся tombstones
+            if not staff and entry.user_id == user.pk:
+                opened_courses.add(entry.object_id)
+        elif entry.model == 'lessons' and not staff:
+            if entry.course_id in course_ids:
+                changed['lessons'].add(entry.object_id)
+        elif entry.model == 'applications' and not staff:
+            continue
+        else:
+            changed[entry.model].add(entry.object_id)
+    if opened_courses:
+        changed['lessons'].update(Lesson.objects.filter(course_id__in=opened_courses).values_list('pk', flat=True))
+        # Уроки, удаленные из этого курса в том же окне до отчисления, тоже нужны как tombstones
+        for entry in entries:
+            if entry.model == 'lessons' and entry.course_id in opened_courses:
+                changed['lessons'].add(entry.object_id)
+
+    result = {'next': str(token), 'has_more': len(entries) == limit, 'changes': {}, 'deleted': {}}
+    for model_key, ids in changed.items():
+        get_queryset, serializer_class = TRACKED[model_key]
+        objects = list(get_queryset(user).filter(pk__in=ids).order_by('pk'))
+        result['changes'][model_key] = serializer_class(objects, many=True, context=context or {}).data
+        result['deleted'][model_key] = sorted(ids - {obj.pk for obj in objects})
+    return result
@@ -0,0 +1,95 @@
+# backend/sync/signals.py
+"""Запись изменений отслеживаемых моделей в журнал дельта-синхронизации (sync/services.py)."""
+
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from applications.models import Application
+from backend.bulk import bulk_updated
+from blog.models import Post
+from courses.models import Course, Lesson
+from reviews.models import Review
+from users.models import Profile
+from .services import record, record_enrollments, record_lessons
+
+MODEL_KEYS = {
+    Course: 'courses',
+    Post: 'posts',
+    Application: 'applications',
+    Review: 'reviews',
+}
+
+
+@receiver(post_save, sender=Course)
+@receiver(post_save, sender=Post)
+@receiver(post_save, sender=Application)
+@receiver(post_save, sender=Review)
+def object_saved(sender, instance, **kwargs):
+    record(MODEL_KEYS[sender], [instance.pk])
+
+
+@receiver(post_delete, sender=Course)
+@receiver(post_delete, sender=Post)
+@receiver(post_delete, sender=Application)
+@receiver(post_delete, sender=Review)
+def object_deleted(sender, instance, **kwargs):
+    record(MODEL_KEYS[sender], [instance.pk], deleted=True)
+
+
+@receiver(post_save, sender=Course)
+def course_teacher_changed(sender, instance, created, **kwargs):
+    # Уроки курса видны его преподавателю: смена преподавателя - как запись и отчисление
+    loaded_teacher_id = getattr(instance, '_loaded_teacher_id', None)
+    if created or loaded_teacher_id == instance.teacher_id:
+        return
+    if instance.teacher_id:
+        record_enrollments([(instance.teacher_id, instance.pk)])
+    if loaded_teacher_id:
+        record_enrollments([(loaded_teacher_id, instance.pk)], removed=True)
+
+
+@receiver(post_save, sender=Lesson)
+def lesson_saved(sender, instance, **kwargs):
+    record_lessons([(instance.pk, instance.course_id)])
+
+
+@receiver(post_delete, sender=Lesson)
+def lesson_deleted(sender, instance, **kwargs):
+    record_lessons([(instance.pk, instance.course_id)], deleted=True)
+
+
+@receiver(bulk_updated, sender=Lesson)
+def lessons_bulk_updated(sender, pks, **kwargs):
+    record_lessons(Lesson.objects.filter(pk__in=pks).values_list('pk', 'course_id'))
+
+
+@receiver(bulk_updated, sender=Application)
+def applications_bulk_updated(sender, pks, **kwargs):
+    record('applications', pks)
+
+
+def _enrollment_pairs(sender, instance, reverse, pk_set):
+    """Пары (ID пользователя, ID курса) изменения связи; pk_set=None - все записи instance (до clear())."""
+    profiles = sender is Profile.enrolled_courses.through
+    if pk_set is None:
+        user_field = 'profile__user_id' if profiles else 'user_id'
+        own_field = 'course_id' if profiles == reverse else ('profile_id' if profiles else 'user_id')
+        return list(sender.objects.filter(**{own_field: instance.pk}).values_list(user_field, 'course_id'))
+    if profiles and reverse:
+        return [(user_id, instance.pk) for user_id in Profile.objects.filter(pk__in=pk_set).values_list('user_id', flat=True)]
+    if profiles:
+        return [(instance.user_id, course_id) for course_id in pk_set]
+    if reverse:
+        return [(instance.pk, course_id) for course_id in pk_set]
+    return [(user_id, instance.pk) for user_id in pk_set]
+
+
+@receiver(m2m_changed, sender=Profile.enrolled_courses.through)
+@receiver(m2m_changed, sender=Course.students.through)
+def enrollment_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == 'pre_clear':
+        instance._cleared_sync_enrollments = _enrollment_pairs(sender, instance, reverse, None)
+    elif action == 'post_clear':
+        record_enrollments(instance.__dict__.pop('_cleared_sync_enrollments', ()), removed=True)
+    elif action in ('post_add', 'post_remove') and pk_set:
+        record_enrollments(_enrollment_pairs(sender, instance, reverse, pk_set), removed=action == 'post_remove')
@@ -0,0 +1,38 @@
+import datetime
+
+from django.test import TestCase
+
+from courses.counters import refresh_course_counters
+from courses.enrollment import enroll
+from courses.models import Course, Lesson
+from users.models import Profile, User
+from .services import changes_since, current_token
+
+
+class CourseCounterSyncTests(TestCase):
+    """Счетчики карточки курса меняются без post_save, но должны попадать в дельту."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user('admin', password='pw', is_staff=True)
+        cls.student = User.objects.create_user('student', password='pw')
+        Profile.objects.create(user=cls.student)
+        cls.course = Course.objects.create(title='Математика', subject='math', price=1000, capacity=10)
+
+    def course_card(self, since):
+        courses = changes_since(self.admin, since)['changes'].get('courses', [])
+        self.assertEqual([card['id'] for card in courses], [self.course.pk])
+        return courses[0]
+
+    def test_enrollment_seat_update(self):
+        since = current_token()
+        enroll(self.student.pk, self.course.pk)
+        self.assertEqual(self.course_card(since)['students_count'], 1)
+
+    def test_counter_refresh(self):
+        lesson = Lesson.objects.create(course=self.course, title='Дроби', date=datetime.date(2026, 3, 2))
+        since = current_token()
+        # Как массовое изменение статуса: UPDATE без post_save, затем пересчет
+        Lesson.objects.filter(pk=lesson.pk).update(status=Lesson.LessonStatus.COMPLETED)
+        refresh_course_counters([self.course.pk])
+        self.assertEqual(self.course_card(since)['completed_lessons_count'], 1)
@@ -0,0 +1,28 @@
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from .services import TokenExpired, changes_since, current_token
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def changes_view(request):
+    """
+    GET /api/changes/?since=<токен> - изменения курсов, уроков, постов, заявок
+    и отзывов, видимых пользователю, после токена. Без since или с устаревшим
+    токеном - 410 и текущий токен: клиент загружает списки целиком и
+    синхронизируется дальше с этого токена.
+    """
+    since = request.query_params.get('since')
+    if since is None:
+        return Response({'detail': 'Нужна полная загрузка.', 'next': str(current_token())}, status=status.HTTP_410_GONE)
+    if not since.isdigit():
+        raise ValidationError({'since': ['Ожидается токен из поля next предыдущего ответа.']})
+    try:
+        return Response(changes_since(request.user, int(since), context={'request': request}))
+    except TokenExpired:
+        return Response({'detail': 'Токен устарел, нужна полная загрузка.', 'next': str(current_token())},
+                        status=status.HTTP_410_GONE)
@@ -0,0 +1,147 @@
+import gzip
+import json
+import random
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework.utils.encoders import JSONEncoder
+
+from backend.compact import Included, compact_data
+from blog.models import Post
+from blog.serializers import PostSerializer
+from courses.models import Course, Lesson
+from courses.serializers import CourseCardSerializer, CourseSerializer
+from blog.models import Category
+from users.models import Profile, User
+
+TARGETS = {
+    'courses': (CourseSerializer, lambda: Course.objects.select_related('teacher__profile').prefetch_related(
+        'teacher__profile__enrolled_courses', 'students__profile__enrolled_courses', 'lessons').order_by('id')),
+    'course-cards': (CourseCardSerializer, lambda: Course.objects.select_related('teacher__profile').prefetch_related(
+        'teacher__profile__enrolled_courses').order_by('id')),
+    'posts': (PostSerializer, lambda: Post.objects.select_related('category', 'author__profile').prefetch_related(
+        'author__profile__enrolled_courses').order_by('-id')),
+}
+
+
+def _expand(serializer_class, compact):
+    """Обратное преобразование: подставляет объекты из included на место ID."""
+    included = {type_name: {str(pk): data for pk, data in objects.items()}
+                for type_name, objects in compact['included'].items()}
+    expanded = []
+    for item in compact['data']:
+        item = dict(item)
+        for name, type_name in serializer_class.Meta.sideload.items():
+            value = item[name]
+            if isinstance(value, list):
+                item[name] = [included[type_name][str(pk)] for pk in value]
+            elif value is not None:
+                item[name] = included[type_name][str(value)]
+        expanded.append(item)
+    return expanded
+
+
+class Command(BaseCommand):
+    help = 'Compares payload size and serialization time of the regular and compact (side-loaded) formats'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=1000, help='Rows per target')
+        parser.add_argument('--students', type=int, default=0,
+                            help='Benchmark on a generated school of this size (rolled back afterwards) '
+                                 'instead of the current data')
+        parser.add_argument('targets', nargs='*', help='Targets: %s (default: all)' % ', '.join(TARGETS))
+
+    def handle(self, *args, **options):
+        unknown = set(options['targets']) - set(TARGETS)
+        if unknown:
+            raise CommandError('Unknown targets: %s' % ', '.join(sorted(unknown)))
+        if not options['students']:
+            return self.run(options)
+        with transaction.atomic():
+            self.generate_school(options['students'])
+            try:
+                self.run(options)
+            finally:
+                transaction.set_rollback(True)
+
+    def generate_school(self, students):
+        """
+        Школа на students учеников: учитель на 50 учеников, курс на 10,
+        каждый ученик на 4 курсах, по 8 уроков на курс, пост блога на 10 учеников.
+        Вставка через bulk_create, сигналы не срабатывают.
+        """
+        rng = random.Random(42)
+        tag = 'bench-%d' % int(time.time())
+        teachers = User.objects.bulk_create([
+            User(username='%s-t%d' % (tag, i), email='%s-t%d@example.com' % (tag, i), role='teacher',
+                 first_name='Учитель', last_name=str(i))
+            for i in range(max(1, students // 50))
+        ])
+        pupils = User.objects.bulk_create([
+            User(username='%s-s%d' % (tag, i), email='%s-s%d@example.com' % (tag, i), role='student',
+                 first_name='Ученик', last_name=str(i))
+            for i in range(students)
+        ])
+        profiles = Profile.objects.bulk_create([Profile(user=user, school='Школа №1') for user in teachers + pupils])
+        courses = Course.objects.bulk_create([
+            Course(title='Курс %d' % i, subject='Предмет %d' % (i % 12), price=100, teacher=rng.choice(teachers))
+            for i in range(max(1, students // 10))
+        ])
+        enrollments = []
+        for user, profile in zip(pupils, profiles[len(teachers):]):
+            for course in rng.sample(courses, min(4, len(courses))):
+                enrollments.append((user, profile, course))
+        Course.students.through.objects.bulk_create([
+            Course.students.through(course=course, user=user) for user, _, course in enrollments
+        ])
+        Profile.enrolled_courses.through.objects.bulk_create([
+            Profile.enrolled_courses.through(profile=profile, course=course) for _, profile, course in enrollments
+        ])
+        Lesson.objects.bulk_create([
+            Lesson(course=course, title='Урок %d' % i) for course in courses for i in range(8)
+        ])
+        categories = Category.objects.bulk_create([Category(name='%s-c%d' % (tag, i), slug='%s-c%d' % (tag, i)) for i in range(5)])
+        Post.objects.bulk_create([
+            Post(title='Пост %d' % i, slug='%s-p%d' % (tag, i), content='Текст ' * 100,
+                 author=rng.choice(teachers), category=rng.choice(categories))
+            for i in range(max(1, students // 10))
+        ])
+
+    def run(self, options):
+        failed = False
+        for name in options['targets'] or TARGETS:
+            serializer_class, get_queryset = TARGETS[name]
+            # Строки загружаются заранее, сравнивается только сериализация
+            rows = list(get_queryset()[:options['limit']])
+
+            started = time.perf_counter()
+            regular = json.dumps(serializer_class(rows, many=True).data, cls=JSONEncoder)
+            regular_time = time.perf_counter() - started
+
+            started = time.perf_counter()
+            context = {'included': Included()}
+            data = serializer_class(rows, many=True, context=context).data
+            compact = json.dumps(compact_data(data, context), cls=JSONEncoder)
+            compact_time = time.perf_counter() - started
+
+            # Компактный ответ должен разворачиваться ровно в обычный
+            equal = json.dumps(_expand(serializer_class, json.loads(compact)), cls=JSONEncoder) == regular
+            failed = failed or not equal
+            self.stdout.write(
+                '%-13s rows=%-6d json=%9d -> %9d bytes (%3.0f%%)  gzip=%8d -> %8d  time=%7.1f -> %7.1f ms  %s'
+                % (
+                    name,
+                    len(rows),
+                    len(regular.encode()),
+                    len(compact.encode()),
+                    100.0 * len(compact.encode()) / len(regular.encode()) if regular else 0,
+                    len(gzip.compress(regular.encode())),
+                    len(gzip.compress(compact.encode())),
+                    regular_time * 1000,
+                    compact_time * 1000,
+                    'OK' if equal else 'MISMATCH',
+                )
+            )
+        if failed:
+            raise CommandError('Compact output does not expand to the regular output.')
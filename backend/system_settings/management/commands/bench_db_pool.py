@@ -0,0 +1,75 @@
+import copy
+import statistics
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.backends.postgresql.base import DatabaseWrapper as PostgresDatabaseWrapper
+
+from backend.db_pool.base import DatabaseWrapper as PooledDatabaseWrapper
+from backend.db_pool.pool import close_pools
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class Command(BaseCommand):
+    help = 'Compares p50/p99 of a request-like DB cycle with and without connection pooling'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500, help='Requests per thread')
+        parser.add_argument('--threads', type=int, default=4, help='Concurrent threads')
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options):
+        settings_dict = copy.deepcopy(connections[options['database']].settings_dict)
+        settings_dict.setdefault('POOL', True)
+
+        direct_settings = copy.deepcopy(settings_dict)
+        direct_settings.pop('POOL')
+
+        for label, wrapper_class, wrapper_settings in (
+            ('direct', PostgresDatabaseWrapper, direct_settings),
+            ('pooled', PooledDatabaseWrapper, settings_dict),
+        ):
+            samples = self.run(wrapper_class, wrapper_settings, options['threads'], options['requests'])
+            self.stdout.write(
+                '%-7s requests=%d p50=%.2fms p99=%.2fms mean=%.2fms'
+                % (
+                    label,
+                    len(samples),
+                    percentile(samples, 50) * 1000,
+                    percentile(samples, 99) * 1000,
+                    statistics.mean(samples) * 1000,
+                )
+            )
+        close_pools()
+
+    def run(self, wrapper_class, settings_dict, threads, requests):
+        samples = []
+        lock = threading.Lock()
+
+        def worker():
+            # Как и в обычном запросе: соединение открывается (или берется из пула),
+            # выполняется запрос, в конце соединение закрывается (или возвращается).
+            wrapper = wrapper_class(copy.deepcopy(settings_dict), alias='bench')
+            local = []
+            for _ in range(requests):
+                started = time.perf_counter()
+                with wrapper.cursor() as cursor:
+                    cursor.execute('SELECT 1')
+                wrapper.close()
+                local.append(time.perf_counter() - started)
+            with lock:
+                samples.extend(local)
+
+        workers = [threading.Thread(target=worker) for _ in range(threads)]
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        return samples
@@ -0,0 +1,67 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.utils.encoders import JSONEncoder
+
+from applications.models import Application
+from applications.serializers import ApplicationSerializer
+from backend.read_path import ReadPath
+from courses.models import Lesson
+from courses.serializers import LessonSerializer
+from reviews.models import Review
+from reviews.serializers import ReviewSerializer
+from users.models import User
+from users.serializers import UserSerializer
+
+TARGETS = {
+    'lessons': (LessonSerializer, lambda: Lesson.objects.order_by('date', 'time', 'id')),
+    'reviews': (ReviewSerializer, lambda: Review.objects.order_by('-id')),
+    'applications': (ApplicationSerializer, lambda: Application.objects.order_by('-created_at', 'id')),
+    'users': (UserSerializer, lambda: User.objects.select_related('profile').prefetch_related('profile__enrolled_courses').order_by('id')),
+}
+
+
+class Command(BaseCommand):
+    help = 'Checks that ReadPath output equals the DRF serializers and compares rows per second'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=5000, help='Rows per target')
+        parser.add_argument('targets', nargs='*', help='Targets: %s (default: all)' % ', '.join(TARGETS))
+
+    def handle(self, *args, **options):
+        unknown = set(options['targets']) - set(TARGETS)
+        if unknown:
+            raise CommandError('Unknown targets: %s' % ', '.join(sorted(unknown)))
+
+        failed = False
+        for name in options['targets'] or TARGETS:
+            serializer_class, get_queryset = TARGETS[name]
+            queryset = get_queryset()[:options['limit']]
+
+            started = time.perf_counter()
+            reference = serializer_class(queryset, many=True).data
+            reference_time = time.perf_counter() - started
+
+            read_path = ReadPath(serializer_class)
+            started = time.perf_counter()
+            fast = read_path.serialize(queryset)
+            fast_time = time.perf_counter() - started
+
+            # Сравниваем то, что реально уйдет клиенту - JSON
+            equal = json.dumps(reference, cls=JSONEncoder) == json.dumps(fast, cls=JSONEncoder)
+            failed = failed or not equal
+            rows = len(fast)
+            self.stdout.write(
+                '%-13s rows=%-7d serializer=%9.0f rows/s  read_path=%9.0f rows/s  x%.1f  %s'
+                % (
+                    name,
+                    rows,
+                    rows / reference_time if reference_time else 0,
+                    rows / fast_time if fast_time else 0,
+                    reference_time / fast_time if fast_time else 0,
+                    'OK' if equal else 'MISMATCH',
+                )
+            )
+        if failed:
+            raise CommandError('ReadPath output differs from the reference serializers.')
@@ -0,0 +1,350 @@
+import http.client
+import json
+import random
+import subprocess
+import threading
+import time
+from collections import defaultdict
+from urllib.parse import urlencode, urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from blog.models import Post
+from courses.models import Course
+from users.models import User
+
+# Доли виртуальных пользователей по сценариям в каждом профиле нагрузки
+PROFILES = {
+    'mixed': {'anonymous': 60, 'student': 25, 'teacher': 10, 'admin': 5},
+    'landing': {'anonymous': 1},
+    'students': {'student': 1},
+    'teachers': {'teacher': 1},
+    'admin': {'admin': 1},
+}
+PERCENTILES = (50, 95, 99)
+
+
+def percentile(sorted_values, p):
+    """Процентиль методом ближайшего ранга по отсортированному списку."""
+    if not sorted_values:
+        return None
+    rank = max(1, -(-p * len(sorted_values) // 100))
+    return sorted_values[rank - 1]
+
+
+def summarize(latencies, errors, statuses, elapsed):
+    values = sorted(latencies)
+    summary = {
+        'count': len(values),
+        'errors': errors,
+        'rps': round(len(values) / elapsed, 2) if elapsed else 0,
+        'mean_ms': round(sum(values) / len(values), 2) if values else None,
+        'max_ms': round(values[-1], 2) if values else None,
+        'statuses': dict(sorted(statuses.items())),
+    }
+    for p in PERCENTILES:
+        value = percentile(values, p)
+        summary['p%d_ms' % p] = round(value, 2) if value is not None else None
+    return summary
+
+
+class Stats:
+    """Задержки по эндпоинтам (шаблон URL, а не конкретный путь), общие для всех потоков."""
+
+    def __init__(self, warmup_until):
+        self.warmup_until = warmup_until
+        self.lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.statuses = defaultdict(lambda: defaultdict(int))
+
+    def add(self, name, started, latency_ms, status):
+        if started < self.warmup_until:
+            return
+        with self.lock:
+            self.latencies[name].append(latency_ms)
+            self.statuses[name][str(status)] += 1
+            if not isinstance(status, int) or status >= 400:
+                self.errors[name] += 1
+
+    def report(self, elapsed):
+        endpoints = {
+            name: summarize(self.latencies[name], self.errors[name], self.statuses[name], elapsed)
+            for name in sorted(self.latencies)
+        }
+        total_statuses = defaultdict(int)
+        for statuses in self.statuses.values():
+            for status, count in statuses.items():
+                total_statuses[status] += count
+        everything = [value for values in self.latencies.values() for value in values]
+        return summarize(everything, sum(self.errors.values()), total_statuses, elapsed), endpoints
+
+
+class VirtualUser(threading.Thread):
+    """
+    Виртуальный пользователь: свое keep-alive соединение, при необходимости
+    вход через /api/token/, затем сценарий по кругу до конца теста.
+    """
+
+    def __init__(self, harness, index, scenario, account):
+        super().__init__(daemon=True)
+        self.harness = harness
+        self.scenario = scenario
+        self.account = account
+        self.rng = random.Random(harness.seed * 1000 + index)
+        self.connection = None
+        self.token = None
+
+    def request(self, method, name, path, body=None):
+        harness = self.harness
+        headers = {'Accept': 'application/json'}
+        if self.token:
+            headers['Authorization'] = 'Bearer ' + self.token
+        if body is not None:
+            body = json.dumps(body)
+            headers['Content-Type'] = 'application/json'
+        started = time.monotonic()
+        try:
+            if self.connection is None:
+                self.connection = harness.connection_class(harness.host, harness.port, timeout=harness.timeout)
+            self.connection.request(method, harness.prefix + path, body=body, headers=headers)
+            response = self.connection.getresponse()
+            payload = response.read()
+            status = response.status
+        except (OSError, http.client.HTTPException) as exc:
+            # Соединение пересоздается на следующем запросе
+            if self.connection is not None:
+                self.connection.close()
+                self.connection = None
+            payload, status = b'', type(exc).__name__
+        harness.stats.add('%s %s' % (method, name), started, (time.monotonic() - started) * 1000, status)
+        return status, payload
+
+    def login(self):
+        username, password = self.account
+        status, payload = self.request('POST', '/api/token/', '/api/token/', {'username': username, 'password': password})
+        try:
+            self.token = json.loads(payload)['access'] if status == 200 else None
+        except (ValueError, KeyError):
+            self.token = None
+        return self.token is not None
+
+    def get(self, name, path, **params):
+        if params:
+            path += '?' + urlencode(params)
+        status, _ = self.request('GET', name, path)
+        if status == 401 and self.account:
+            # Истек access-токен: входим заново, как это сделал бы клиент
+            self.login()
+
+    def run(self):
+        harness = self.harness
+        if self.account and not self.login():
+            return
+        scenario = getattr(self, 'scenario_' + self.scenario)
+        while time.monotonic() < harness.deadline:
+            scenario()
+            if harness.think:
+                time.sleep(self.rng.expovariate(1 / harness.think))
+        if self.connection is not None:
+            self.connection.close()
+
+    def scenario_anonymous(self):
+        # Посетитель лендинга: каталог, отзывы, преподаватели, блог и одна карточка
+        data = self.harness.data
+        self.get('/api/courses/', '/api/courses/', page=self.rng.randint(1, data['course_pages']))
+        self.get('/api/reviews/', '/api/reviews/')
+        self.get('/api/public-teachers/', '/api/public-teachers/')
+        self.get('/api/posts/', '/api/posts/')
+        if data['courses']:
+            self.get('/api/courses/{id}/', '/api/courses/%d/' % self.rng.choice(data['courses']))
+        if data['posts']:
+            self.get('/api/posts/{id}/', '/api/posts/%d/' % self.rng.choice(data['posts']))
+
+    def scenario_student(self):
+        self.get('/api/users/me/', '/api/users/me/')
+        self.get('/api/student-dashboard-summary/', '/api/student-dashboard-summary/')
+        self.get('/api/courses/my/', '/api/courses/my/')
+        self.get('/api/courses/upcoming-lessons/', '/api/courses/upcoming-lessons/')
+        self.get('/api/inbox/unread-count/', '/api/inbox/unread-count/')
+
+    def scenario_teacher(self):
+        # Составы групп: карточка своего курса с учениками, уроки, список учеников
+        courses = self.harness.data['teacher_courses'].get(self.account[0], [])
+        self.get('/api/teacher-dashboard-summary/', '/api/teacher-dashboard-summary/')
+        self.get('/api/courses/my-teaching/', '/api/courses/my-teaching/')
+        self.get('/api/teacher-students/', '/api/teacher-students/')
+        if courses:
+            course_id = self.rng.choice(courses)
+            self.get('/api/courses/{id}/', '/api/courses/%d/' % course_id)
+            self.get('/api/courses/{id}/lessons/', '/api/courses/%d/lessons/' % course_id)
+
+    def scenario_admin(self):
+        data = self.harness.data
+        term = self.rng.choice(data['search_terms'])
+        self.get('/api/admin-dashboard-summary/', '/api/admin-dashboard-summary/')
+        self.get('/api/users/', '/api/users/', role='student', page=self.rng.randint(1, data['student_pages']))
+        self.get('/api/users/?search=', '/api/users/', search=term)
+        self.get('/api/applications/', '/api/applications/', page=self.rng.randint(1, 20))
+        self.get('/api/courses/?search=', '/api/courses/', search=term)
+
+
+class Command(BaseCommand):
+    help = (
+        'Load test against a running server: concurrent virtual users run scenario scripts '
+        '(anonymous landing visitors, students, teachers, admins) and the command reports '
+        'throughput and p50/p95/p99 latency per endpoint. Accounts and IDs are taken from the '
+        'database the server uses, seeded with populate_db --scale.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000', help='Server base URL')
+        parser.add_argument('--profile', choices=sorted(PROFILES), default='mixed')
+        parser.add_argument('--users', type=int, default=50, help='Concurrent virtual users')
+        parser.add_argument('--duration', type=float, default=60, help='Seconds of load after ramp-up starts')
+        parser.add_argument('--ramp-up', type=float, default=10, help='Seconds over which users are started')
+        parser.add_argument('--warmup', type=float, default=5, help='Seconds at the start excluded from the report')
+        parser.add_argument('--think', type=float, default=1.0,
+                            help='Mean pause between scenario iterations, seconds (0 - closed loop without pauses)')
+        parser.add_argument('--timeout', type=float, default=30)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--prefix', default='gen', help='Username prefix of generated accounts')
+        parser.add_argument('--password', default='password', help='Password of generated accounts')
+        parser.add_argument('--admin', default='admin:admin', help='Admin credentials, username:password')
+        parser.add_argument('--output', help='Write the JSON report to this file')
+        parser.add_argument('--compare', help='Previous JSON report to compare with')
+
+    def handle(self, *args, **options):
+        url = urlsplit(options['url'])
+        if url.scheme not in ('http', 'https') or not url.hostname:
+            raise CommandError('--url must be an http(s) URL.')
+        self.connection_class = http.client.HTTPSConnection if url.scheme == 'https' else http.client.HTTPConnection
+        self.host, self.port = url.hostname, url.port
+        self.prefix = url.path.rstrip('/')
+        self.timeout = options['timeout']
+        self.think = options['think']
+        self.seed = options['seed']
+        rng = random.Random(self.seed)
+
+        self.data = self.load_data(options)
+        weights = PROFILES[options['profile']]
+        scenarios = rng.choices(list(weights), weights=list(weights.values()), k=options['users'])
+        accounts = {
+            'anonymous': [None],
+            'student': self.data['students'],
+            'teacher': self.data['teachers'],
+            'admin': [tuple(options['admin'].split(':', 1))],
+        }
+        for scenario in set(scenarios):
+            if not accounts[scenario]:
+                raise CommandError('No %s accounts with prefix "%s"; run populate_db --scale first.'
+                                   % (scenario, options['prefix']))
+
+        started = time.monotonic()
+        self.deadline = started + options['duration']
+        self.stats = Stats(started + options['warmup'])
+        users = [
+            VirtualUser(self, index, scenario, rng.choice(accounts[scenario]))
+            for index, scenario in enumerate(scenarios)
+        ]
+        self.stdout.write('%d users (%s), %ss against %s' % (
+            len(users), ', '.join('%s=%d' % (name, scenarios.count(name)) for name in sorted(set(scenarios))),
+            options['duration'], options['url']))
+        for index, user in enumerate(users):
+            # Пользователи подключаются равномерно за время разгона
+            time.sleep(max(0.0, started + options['ramp_up'] * index / len(users) - time.monotonic()))
+            user.start()
+        for user in users:
+            user.join()
+        elapsed = max(time.monotonic() - started - options['warmup'], 1e-9)
+
+        totals, endpoints = self.stats.report(elapsed)
+        report = {
+            'meta': {
+                'commit': self.git_commit(),
+                'started_at': timezone.now().isoformat(),
+                'url': options['url'],
+                'profile': options['profile'],
+                'users': options['users'],
+                'duration': options['duration'],
+                'ramp_up': options['ramp_up'],
+                'warmup': options['warmup'],
+                'think': options['think'],
+                'seed': self.seed,
+            },
+            'totals': totals,
+            'endpoints': endpoints,
+        }
+        self.print_report(report, self.read_report(options['compare']) if options['compare'] else None)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(report, f, indent=2, ensure_ascii=False)
+            self.stdout.write('Report written to %s' % options['output'])
+
+    def load_data(self, options):
+        """Учетные записи и ID для сценариев - из той же базы, что у сервера."""
+        rng = random.Random(self.seed)
+        prefix = options['prefix'] + '-'
+        generated = User.objects.filter(username__startswith=prefix, is_active=True)
+        students = list(
+            generated.filter(role='student', profile__enrolled_courses__isnull=False)
+            .distinct().order_by('pk').values_list('username', flat=True)[:2000]
+        )
+        teachers = list(
+            generated.filter(role='teacher', teaching_courses__isnull=False)
+            .distinct().order_by('pk').values_list('username', flat=True)[:500]
+        )
+        teacher_courses = defaultdict(list)
+        for username, course_id in Course.objects.filter(teacher__username__in=teachers).values_list('teacher__username', 'pk'):
+            teacher_courses[username].append(course_id)
+        course_ids = list(Course.objects.order_by('pk').values_list('pk', flat=True))
+        post_ids = list(Post.objects.order_by('pk').values_list('pk', flat=True))
+        last_names = sorted(set(generated.values_list('last_name', flat=True)[:1000])) or ['a']
+        page_size = 10
+        return {
+            'students': [(username, options['password']) for username in students],
+            'teachers': [(username, options['password']) for username in teachers],
+            'teacher_courses': dict(teacher_courses),
+            'courses': rng.sample(course_ids, min(1000, len(course_ids))),
+            'posts': rng.sample(post_ids, min(1000, len(post_ids))),
+            'course_pages': max(1, -(-len(course_ids) // page_size)),
+            'student_pages': max(1, -(-generated.filter(role='student').count() // page_size)),
+            'search_terms': last_names,
+        }
+
+    def git_commit(self):
+        try:
+            return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                  timeout=5).stdout.strip() or None
+        except OSError:
+            return None
+
+    def read_report(self, path):
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except (OSError, ValueError) as exc:
+            raise CommandError('Cannot read %s: %s' % (path, exc))
+
+    def print_report(self, report, baseline):
+        def fmt(value):
+            return '%8s' % ('-' if value is None else '%.1f' % value)
+
+        def delta(current, previous):
+            if current is None or not previous:
+                return '        '
+            return '%+7.0f%%' % (100.0 * (current - previous) / previous)
+
+        header = '%-40s %7s %6s %8s %8s %8s %8s' % ('endpoint', 'count', 'errors', 'rps', 'p50', 'p95', 'p99')
+        if baseline:
+            header += '  %8s %8s  (vs %s)' % ('d rps', 'd p99', baseline['meta'].get('commit'))
+        self.stdout.write(header)
+        rows = list(report['endpoints'].items()) + [('TOTAL', report['totals'])]
+        for name, row in rows:
+            line = '%-40s %7d %6d %s %s %s %s' % (
+                name[:40], row['count'], row['errors'], fmt(row['rps']), fmt(row['p50_ms']), fmt(row['p95_ms']), fmt(row['p99_ms']))
+            if baseline:
+                previous = baseline['totals'] if name == 'TOTAL' else baseline['endpoints'].get(name, {})
+                line += '  %s %s' % (delta(row['rps'], previous.get('rps')), delta(row['p99_ms'], previous.get('p99_ms')))
+            self.stdout.write(line)
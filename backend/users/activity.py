@@ -0,0 +1,177 @@
+# backend/users/activity.py
+"""
+"Последний визит" пользователя (User.last_login) с отложенной записью.
+
+UPDATE строки пользователя на каждый запрос превратил бы каждое чтение в
+запись и блокировки строк users_user. Вместо этого ActivityMiddleware и выдача
+токена (ActivityTokenObtainPairSerializer) только отмечают пользователя в
+памяти воркера: повторные отметки одного пользователя схлопываются в одну, а
+после записи следующая отметка принимается не раньше чем через MIN_INTERVAL.
+Фоновый поток раз в FLUSH_INTERVAL пишет накопленное одним запросом на пачку:
+
+    UPDATE users_user AS u SET last_login = v.seen
+    FROM (VALUES (%s, %s), ...) AS v(id, seen)
+    WHERE u.id = v.id AND (u.last_login IS NULL OR u.last_login < v.seen)
+
+Условие на last_login не дает воркеру с более старой отметкой затереть
+более новую. Строки обновляются в порядке ID, так что сбросы разных
+воркеров не взаимоблокируются. Точность last_login - MIN_INTERVAL плюс
+FLUSH_INTERVAL; при завершении процесса несохраненные отметки сбрасываются.
+"""
+
+import atexit
+import logging
+import os
+import threading
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+from django.utils.functional import SimpleLazyObject, empty
+
+from backend.metrics import set_queue_depth
+from .models import User
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'FLUSH_INTERVAL': 30,     # секунд между сбросами
+    'MIN_INTERVAL': 300,      # секунд: чаще last_login одного пользователя не пишется
+    'BATCH_SIZE': 1000,       # строк в одном UPDATE
+}
+
+
+def get_activity_setting(name):
+    return getattr(settings, 'USER_ACTIVITY', {}).get(name, DEFAULTS[name])
+
+
+def _write(rows):
+    """rows - [(user_id, время)] по возрастанию ID."""
+    if connection.vendor != 'postgresql':
+        # Без UPDATE ... FROM (VALUES ...): один UPDATE с CASE, без защиты от более старой отметки
+        User.objects.bulk_update([User(pk=pk, last_login=seen) for pk, seen in rows], ['last_login'])
+        return
+    quote = connection.ops.quote_name
+    sql = (
+        'UPDATE {table} AS u SET {column} = v.seen FROM (VALUES {values}) AS v(id, seen) '
+        'WHERE u.{pk} = v.id AND (u.{column} IS NULL OR u.{column} < v.seen)'
+    ).format(
+        table=quote(User._meta.db_table),
+        column=quote(User._meta.get_field('last_login').column),
+        pk=quote(User._meta.pk.column),
+        values=', '.join(['(%s::bigint, %s::timestamptz)'] * len(rows)),
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [value for row in rows for value in row])
+
+
+class ActivityTracker:
+    def __init__(self):
+        self._pending = {}
+        # Когда отметка пользователя последний раз ушла в БД (только за MIN_INTERVAL)
+        self._written = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._pid = None
+
+    def __len__(self):
+        return len(self._pending)
+
+    def touch(self, user_id, at=None):
+        at = at or timezone.now()
+        with self._lock:
+            written = self._written.get(user_id)
+            if written is not None and (at - written).total_seconds() < get_activity_setting('MIN_INTERVAL'):
+                return
+            if user_id not in self._pending or self._pending[user_id] < at:
+                self._pending[user_id] = at
+            self._ensure_thread()
+
+    def flush(self):
+        """Пишет накопленные отметки; возвращает число записанных пользователей."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        rows = sorted(pending.items())
+        batch_size = get_activity_setting('BATCH_SIZE')
+        written = {}
+        for start in range(0, len(rows), batch_size):
+            batch = rows[start:start + batch_size]
+            try:
+                _write(batch)
+            except Exception:
+                logger.exception('Не удалось записать last_login для %d пользователей', len(batch))
+                with self._lock:
+                    # Вернем в очередь до следующего сброса, если пользователя не отметили заново
+                    for user_id, seen in batch:
+                        self._pending.setdefault(user_id, seen)
+            else:
+                written.update(batch)
+
+        cutoff = timezone.now().timestamp() - get_activity_setting('MIN_INTERVAL')
+        with self._lock:
+            self._written.update(written)
+            self._written = {user_id: at for user_id, at in self._written.items() if at.timestamp() > cutoff}
+            depth = len(self._pending)
+        set_queue_depth('user_activity', depth)
+        return len(written)
+
+    def _ensure_thread(self):
+        # Поток не переживает fork, поэтому в каждом воркере запускаем свой
+        if self._thread is None or self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='user-activity', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(get_activity_setting('FLUSH_INTERVAL'))
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception('Сбой сброса отметок активности')
+            finally:
+                # Соединение этого потока возвращаем в пул между сбросами
+                connection.close()
+
+
+tracker = ActivityTracker()
+atexit.register(tracker.flush)
+
+
+def touch(user):
+    if user is not None and user.is_authenticated:
+        tracker.touch(user.pk)
+
+
+class ActivityMiddleware:
+    """
+    Отмечает пользователя, от имени которого выполнен запрос. DRF переносит
+    пользователя из JWT в request, поэтому отметка ставится после ответа.
+    Под ASGI работает без перехода в поток: touch() только отмечает в памяти.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        response = self.get_response(request)
+        touch(getattr(request, 'user', None))
+        return response
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        user = getattr(request, 'user', None)
+        if isinstance(user, SimpleLazyObject) and user._wrapped is empty:
+            # Пользователь сессии еще не загружен (не-DRF view): синхронная загрузка здесь запрещена
+            user = await request.auser()
+        touch(user)
+        return response
@@ -8,4 +8,8 @@ class UsersConfig(AppConfig):
 
     # Добавьте этот метод
     def ready(self):
-        import users.signals # noqa
\ No newline at end of file
+        import users.signals # noqa
+        from django.core import checks
+        from users.async_auth import check_throttle_cache, check_throttle_cache_deploy
+        checks.register(check_throttle_cache)
+        checks.register(check_throttle_cache_deploy, deploy=True)
\ No newline at end of file
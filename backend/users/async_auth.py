@@ -0,0 +1,269 @@
+# backend/users/async_auth.py
+"""
+Асинхронные эндпоинты входа и смены пароля: POST /api/token/ и
+POST /api/users/change-password/.
+
+Проверка пароля (PBKDF2) - сотни миллисекунд процессора. В синхронном view
+она занимает воркер целиком, и в утренний всплеск входов дешевые запросы
+ждут за ней в очереди. Здесь хеширование уходит в ограниченный пул потоков
+(hashlib считает PBKDF2 без GIL, так что потоки действительно параллельны),
+а цикл событий ASGI-воркера (backend/asgi.py) продолжает обслуживать
+остальные запросы.
+
+Перегрузка отсекается до хеширования, в порядке стоимости проверки:
+1. счетчики попыток в кэше - ведра токенов (backend/throttling.py) на IP
+   и на учетную запись (TOKEN_BUCKETS 'auth_ip' и 'auth_account');
+   ведра должны быть общими для воркеров, поэтому без общего кэша
+   manage.py check --deploy выдает ошибку users.E001;
+2. глубина очереди пула: если задач больше MAX_PENDING, сразу 429 с
+   Retry-After, а не ожидание в очереди.
+
+Проверяется пароль стандартной ModelBackend-логикой (пароль в строке
+пользователя и is_active); другие AUTHENTICATION_BACKENDS этот путь не
+использует. Ответы совпадают с прежними view simplejwt и DRF.
+"""
+
+import asyncio
+import functools
+import json
+import math
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import password_validation
+from django.contrib.auth.hashers import check_password, identify_hasher, make_password
+from django.core import checks
+from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+
+from backend.caches import is_shared
+from backend.metrics import set_queue_depth
+from backend.throttling import TokenBucketThrottle
+from .activity import touch
+from .models import User
+from .serializers import ActivityTokenObtainPairSerializer, ChangePasswordSerializer
+
+DEFAULTS = {
+    'WORKERS': None,        # потоков хеширования; None - по числу процессоров
+    'MAX_PENDING': None,    # задач в пуле (выполняются + ждут); None - WORKERS * 4
+}
+
+NO_ACCOUNT = 'No active account found with the given credentials'
+
+
+def get_auth_setting(name):
+    return getattr(settings, 'AUTH_HASHING', {}).get(name, DEFAULTS[name])
+
+
+class HashingSaturated(Exception):
+    pass
+
+
+class HashingPool:
+    """Пул потоков для хеширования паролей с ограничением очереди."""
+
+    def __init__(self):
+        self._executor = None
+        self._pid = None
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    @property
+    def workers(self):
+        return get_auth_setting('WORKERS') or os.cpu_count() or 1
+
+    @property
+    def max_pending(self):
+        return get_auth_setting('MAX_PENDING') or self.workers * 4
+
+    def _get_executor(self):
+        # Потоки пула не переживают fork, поэтому в каждом воркере свой пул
+        if self._executor is None or self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='password-hashing')
+        return self._executor
+
+    async def run(self, func, *args):
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise HashingSaturated
+            self._pending += 1
+            executor = self._get_executor()
+            set_queue_depth('password_hashing', self._pending)
+        try:
+            return await asyncio.get_running_loop().run_in_executor(executor, functools.partial(func, *args))
+        finally:
+            with self._lock:
+                self._pending -= 1
+                set_queue_depth('password_hashing', self._pending)
+
+
+hashing = HashingPool()
+
+
+class AuthIPThrottle(TokenBucketThrottle):
+    """Попытки входа и смены пароля с одного IP."""
+    scope = 'auth_ip'
+
+
+class AuthAccountThrottle(TokenBucketThrottle):
+    """Попытки входа в одну учетную запись с любых адресов - перебор пароля."""
+    scope = 'auth_account'
+
+
+def _throttle_cache_issues(level, issue_id):
+    if is_shared():
+        return []
+    return [level(
+        'Ограничение попыток входа (TOKEN_BUCKETS auth_ip, auth_account) требует общего кэша.',
+        hint='Укажите в CACHES["default"] общий для воркеров кэш, например Redis.',
+        id=issue_id,
+    )]
+
+
+def check_throttle_cache(app_configs=None, **kwargs):
+    """
+    Ведра в памяти процесса у каждого воркера свои: перебор пароля получает
+    capacity попыток на каждый воркер. Без общего кэша - предупреждение,
+    а в manage.py check --deploy - ошибка (check_throttle_cache_deploy).
+    Обе проверки регистрируются в UsersConfig.ready().
+    """
+    return _throttle_cache_issues(checks.Warning, 'users.W001')
+
+
+def check_throttle_cache_deploy(app_configs=None, **kwargs):
+    return _throttle_cache_issues(checks.Error, 'users.E001')
+
+
+def _shed(request, username):
+    """Секунды до повтора, если попытку нужно отклонить, иначе None."""
+    by_ip, by_account = AuthIPThrottle(), AuthAccountThrottle()
+    for throttle, key in ((by_ip, by_ip.get_ident(request)), (by_account, username.lower())):
+        if not throttle.consume('token-bucket:%s:%s' % (throttle.scope, key)):
+            return throttle.wait()
+    return None
+
+
+def _too_many(retry_after):
+    response = JsonResponse({'detail': 'Слишком много попыток, повторите позже.'}, status=429)
+    response['Retry-After'] = str(max(1, math.ceil(retry_after)))
+    return response
+
+
+def _method_not_allowed(request):
+    return JsonResponse({'detail': 'Method "%s" not allowed.' % request.method}, status=405)
+
+
+FORM_CONTENT_TYPES = ('application/x-www-form-urlencoded', 'multipart/form-data')
+
+
+def _request_data(request):
+    """Тело как у парсеров DRF по умолчанию: JSON или форма; None - JSON не разобрать."""
+    if request.content_type in FORM_CONTENT_TYPES:
+        return request.POST.dict()
+    try:
+        data = json.loads(request.body or b'{}')
+    except ValueError:
+        return None
+    return data if isinstance(data, dict) else None
+
+
+async def _verify(password, encoded):
+    """Проверка пароля в пуле; HashingSaturated - пул переполнен."""
+    if encoded is None:
+        # Нет такого пользователя: хешируем все равно, чтобы время ответа его не выдавало
+        await hashing.run(make_password, password)
+        return False
+    return await hashing.run(check_password, password, encoded)
+
+
+async def _upgrade_hash(user, password):
+    # Как User.check_password: хеш старым алгоритмом или с меньшим числом итераций пересчитывается
+    try:
+        must_update = identify_hasher(user.password).must_update(user.password)
+    except ValueError:
+        return
+    if must_update:
+        user.password = await hashing.run(make_password, password)
+        await user.asave(update_fields=['password'])
+
+
+@csrf_exempt
+async def token_obtain_view(request):
+    """POST /api/token/ {username, password} -> {refresh, access}."""
+    if request.method != 'POST':
+        return _method_not_allowed(request)
+    data = _request_data(request)
+    if data is None:
+        return JsonResponse({'detail': 'JSON parse error.'}, status=400)
+    username_field = User.USERNAME_FIELD
+    username, password = data.get(username_field), data.get('password')
+    errors = {
+        field: ['This field is required.']
+        for field, value in ((username_field, username), ('password', password))
+        if not isinstance(value, str) or not value
+    }
+    if errors:
+        return JsonResponse(errors, status=400)
+
+    retry_after = await sync_to_async(_shed, thread_sensitive=False)(request, username)
+    if retry_after is not None:
+        return _too_many(retry_after)
+
+    user = await User.objects.filter(**{username_field: username}).afirst()
+    try:
+        valid = await _verify(password, user.password if user is not None else None)
+        if valid and user.is_active:
+            await _upgrade_hash(user, password)
+    except HashingSaturated:
+        return _too_many(1)
+    if not valid or not user.is_active:
+        return JsonResponse({'detail': NO_ACCOUNT, 'code': 'no_active_account'}, status=401)
+
+    refresh = ActivityTokenObtainPairSerializer.get_token(user)
+    touch(user)
+    return JsonResponse({'refresh': str(refresh), 'access': str(refresh.access_token)})
+
+
+def _authenticate(request):
+    try:
+        result = JWTAuthentication().authenticate(request)
+    except (AuthenticationFailed, InvalidToken, TokenError):
+        return None
+    return result[0] if result else None
+
+
+@csrf_exempt
+async def change_password_view(request):
+    """POST /api/users/change-password/ {old_password, new_password}."""
+    if request.method != 'POST':
+        return _method_not_allowed(request)
+    user = await sync_to_async(_authenticate)(request)
+    if user is None or not user.is_active:
+        return JsonResponse({'detail': 'Authentication credentials were not provided.'}, status=401)
+    data = _request_data(request)
+    if data is None:
+        return JsonResponse({'detail': 'JSON parse error.'}, status=400)
+    serializer = ChangePasswordSerializer(data=data)
+    if not serializer.is_valid():
+        return JsonResponse(serializer.errors, status=400)
+
+    retry_after = await sync_to_async(_shed, thread_sensitive=False)(request, user.get_username())
+    if retry_after is not None:
+        return _too_many(retry_after)
+    try:
+        if not await _verify(serializer.validated_data['old_password'], user.password):
+            return JsonResponse({'old_password': ['Wrong password.']}, status=400)
+        user.password = await hashing.run(make_password, serializer.validated_data['new_password'])
+    except HashingSaturated:
+        return _too_many(1)
+    await user.asave(update_fields=['password'])
+    # Как User.set_password + save: валидаторы паролей узнают о смене (история паролей и т.п.)
+    await sync_to_async(password_validation.password_changed)(serializer.validated_data['new_password'], user)
+    return JsonResponse({'status': 'password set'})
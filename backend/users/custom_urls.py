@@ -1,13 +1,13 @@
 from django.urls import path
 from .views import (
     current_user_view, 
-    change_password_view, 
     admin_dashboard_summary_view, 
     enroll_student_to_courses,
     student_dashboard_summary_view,
     teacher_dashboard_summary_view,
     TeacherStudentsListView
 )
+from .async_auth import change_password_view
 
 # Здесь только те URL, которые не создаются роутером автоматически
 urlpatterns = [
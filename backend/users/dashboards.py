@@ -0,0 +1,108 @@
+# backend/users/dashboards.py
+"""
+Документы дашбордов ученика и преподавателя в кэше.
+
+Документ пользователя строится один раз и лежит в кэше под ключом
+dashboard:<id>. Рядом хранится поколение dashboard-generation:<id>:
+случайный токен, который меняется при каждом событии, затрагивающем
+пользователя (см. users/signals.py): изменения его записи на курсы, уроков
+его курсов, состава и отметок курсов преподавателя. Документ считается
+свежим, если он построен в том же поколении и в тот же день, поэтому
+чтение - один get_many к кэшу, а новые сутки не требуют никакой очистки.
+
+Поколение одно на все воркеры, поэтому кэш должен быть общим (Redis,
+Memcached). С кэшем в памяти процесса (LocMemCache по умолчанию) сброс в
+одном воркере не виден другим, и документы там не кэшируются вовсе:
+каждое чтение строит документ заново (backend/caches.py).
+
+Поколение меняется после коммита транзакции. Если документ строился
+параллельно с изменением, он помечен старым поколением и при следующем
+чтении будет перестроен; случайный токен (а не счетчик) не дает старому
+документу снова стать свежим, если кэш вытеснит ключ поколения.
+"""
+
+import uuid
+
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from backend.caches import is_shared
+from attendance.models import Attendance
+from attendance.services import attendance_summary
+from courses.models import Course, Lesson
+from courses.serializers import LessonSerializer
+
+DOCUMENT_TIMEOUT = 24 * 60 * 60
+UPCOMING_LESSONS_LIMIT = 5
+
+
+def _document_key(user_id):
+    return 'dashboard:%s' % user_id
+
+
+def _generation_key(user_id):
+    return 'dashboard-generation:%s' % user_id
+
+
+def build_student_dashboard(user):
+    enrolled_courses = Course.objects.filter(enrolled_student_profiles__user_id=user.pk)
+    upcoming_lessons = Lesson.objects.filter(
+        course__in=enrolled_courses,
+        date__gte=timezone.localdate(),
+    ).order_by('date', 'time')[:UPCOMING_LESSONS_LIMIT]
+    return {
+        'enrolledCoursesCount': enrolled_courses.count(),
+        'upcomingLessons': LessonSerializer(upcoming_lessons, many=True).data,
+    }
+
+
+def build_teacher_dashboard(user):
+    students = Course.students.through.objects.filter(course__teacher_id=user.pk)
+    # Один агрегат по отметкам всех курсов преподавателя
+    attendance = attendance_summary(Attendance.objects.filter(course__teacher_id=user.pk))
+    return {
+        'courseCount': Course.objects.filter(teacher_id=user.pk).count(),
+        'studentCount': students.values('user_id').distinct().count(),
+        'attendanceRate': attendance['rate'],
+    }
+
+
+BUILDERS = {
+    'student': build_student_dashboard,
+    'teacher': build_teacher_dashboard,
+}
+
+
+def get_dashboard(user, kind):
+    """Документ дашборда kind ('student' или 'teacher'): из кэша или построенный заново."""
+    if not is_shared():
+        return BUILDERS[kind](user)
+    document_key, generation_key = _document_key(user.pk), _generation_key(user.pk)
+    today = timezone.localdate().isoformat()
+    cached = cache.get_many([document_key, generation_key])
+    generation = cached.get(generation_key)
+    document = cached.get(document_key)
+    if (document is not None and generation is not None and document['generation'] == generation
+            and document['date'] == today and document['kind'] == kind):
+        return document['data']
+
+    if generation is None:
+        cache.add(generation_key, uuid.uuid4().hex, None)
+        generation = cache.get(generation_key)
+    data = BUILDERS[kind](user)
+    if generation is not None:
+        cache.set(document_key, {'kind': kind, 'date': today, 'generation': generation, 'data': data}, DOCUMENT_TIMEOUT)
+    return data
+
+
+def invalidate_dashboards(user_ids):
+    """Делает устаревшими документы пользователей после коммита текущей транзакции."""
+    user_ids = set(user_ids) - {None}
+    if not user_ids or not is_shared():
+        return
+
+    def bump():
+        cache.set_many({_generation_key(user_id): uuid.uuid4().hex for user_id in user_ids}, None)
+
+    transaction.on_commit(bump)
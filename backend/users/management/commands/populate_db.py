@@ -1,14 +1,172 @@
-from django.core.management.base import BaseCommand
+import datetime
+import io
+import itertools
+import random
+import time
+from contextlib import contextmanager
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
 from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+from applications.ingestion import get_ingestion_setting
+from applications.models import Application, normalize_phone
+from courses.counters import refresh_course_counters
 from courses.models import Course, Lesson
 from blog.models import Post, Category
+from reviews.models import Review
+from users.models import Profile
 
 User = get_user_model()
 
+# Объемы при --scale 1; уроков и записей на курс это не касается, они задаются на один курс/ученика
+SCALE_VOLUMES = {
+    'students': 100_000,
+    'teachers': 2_000,
+    'courses': 10_000,
+    'applications': 200_000,
+    'posts': 20_000,
+    'reviews': 5_000,
+}
+LESSONS_PER_COURSE = (150, 250)
+COURSES_PER_STUDENT = (1, 8)
+BATCH_SIZE = 20_000
+
+FIRST_NAMES = ['Алихан', 'Айгерим', 'Данияр', 'Мария', 'Нурлан', 'Анна', 'Тимур', 'Дана', 'Арман', 'Елена',
+               'Иван', 'Камила', 'Руслан', 'София', 'Ерлан', 'Алина', 'Максим', 'Жанна', 'Артем', 'Аружан']
+LAST_NAMES = ['Ахметов', 'Иванова', 'Садыков', 'Ким', 'Петров', 'Жумабаева', 'Смирнов', 'Нуртаева',
+              'Ли', 'Кузнецова', 'Омаров', 'Волкова', 'Сериков', 'Попова', 'Абдрахманов', 'Соколова']
+SUBJECTS = ['Математика', 'Физика', 'Химия', 'Биология', 'Информатика', 'История', 'География',
+            'Английский язык', 'Русский язык', 'Казахский язык', 'Литература', 'Экономика']
+LEVELS = ['базовый', 'продвинутый', 'олимпиадный', 'подготовка к ЕНТ', 'интенсив']
+CATEGORIES = ['Новости', 'Олимпиады', 'ЕНТ', 'Советы', 'Истории успеха', 'Расписание', 'Конкурсы', 'Полезное']
+LESSON_TIMES = [datetime.time(hour, minute) for hour in range(9, 20) for minute in (0, 30)]
+WORDS = ('урок задача решение пример формула тема проверка повторение ответ вопрос текст схема опыт '
+         'закон правило график таблица вывод конспект упражнение').split()
+
+
+def _chunks(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _copy_value(value):
+    # Текстовый формат COPY: NULL - \N, спецсимволы экранируются обратной косой чертой
+    if value is None:
+        return '\\N'
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    return str(value).replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n').replace('\r', '\\r')
+
+
+@contextmanager
+def _fixed_timestamps(*models):
+    """auto_now/auto_now_add перезаписали бы заданные генератором даты текущим временем."""
+    fields = [
+        field for model in models for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)
+    ]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class Writer:
+    """
+    Пишет объекты пачками: на Postgres через COPY, на остальных базах через bulk_create.
+    Сигналы и save() не вызываются. ID у объектов, на которые ссылаются другие
+    таблицы, генератор задает сам (next_id), последовательности сдвигаются в конце.
+    """
+
+    def __init__(self, stdout):
+        self.stdout = stdout
+        self.copy = connection.vendor == 'postgresql'
+        self.models = []
+
+    def next_id(self, model):
+        return (model.objects.aggregate(last=Max('pk'))['last'] or 0) + 1
+
+    def write(self, model, objects):
+        started = time.perf_counter()
+        total = 0
+        for chunk in _chunks(objects, BATCH_SIZE):
+            if self.copy:
+                self._copy(model, chunk)
+            else:
+                model.objects.bulk_create(chunk, batch_size=1000)
+            total += len(chunk)
+        self.models.append(model)
+        self.stdout.write('  %-28s %9d rows  %6.1fs' % (model._meta.db_table, total, time.perf_counter() - started))
+        return total
+
+    def _copy(self, model, chunk):
+        fields = [field for field in model._meta.concrete_fields if not (field.primary_key and chunk[0].pk is None)]
+        buffer = io.StringIO()
+        for obj in chunk:
+            values = (field.get_db_prep_save(getattr(obj, field.attname), connection) for field in fields)
+            buffer.write('\t'.join(_copy_value(value) for value in values))
+            buffer.write('\n')
+        buffer.seek(0)
+        quote = connection.ops.quote_name
+        sql = 'COPY %s (%s) FROM STDIN' % (quote(model._meta.db_table), ', '.join(quote(field.column) for field in fields))
+        with connection.cursor() as cursor:
+            cursor.cursor.copy_expert(sql, buffer)
+
+    def finish(self):
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(no_style(), self.models):
+                cursor.execute(sql)
+            if self.copy:
+                # Свежая статистика, иначе планировщик считает таблицы пустыми
+                for model in self.models:
+                    cursor.execute('ANALYZE %s' % connection.ops.quote_name(model._meta.db_table))
+
+
 class Command(BaseCommand):
-    help = 'Populates the database with test data'
+    help = (
+        'Populates the database with test data. With --scale generates a synthetic school '
+        '(--scale 1: 100k students, 2k teachers, 10k courses, ~2M lessons) deterministically for a given '
+        '--seed and --date'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', type=float, help='Volume multiplier for synthetic data (1 = 100k students)')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--date', type=datetime.date.fromisoformat,
+                            help='"Today" of the generated school, YYYY-MM-DD (default: today)')
+        parser.add_argument('--prefix', default='gen', help='Username prefix of generated users')
+        parser.add_argument('--password', default='password', help='Password of all generated users')
 
     def handle(self, *args, **options):
+        if options['scale'] is None:
+            return self.populate_demo()
+        if options['scale'] <= 0:
+            raise CommandError('--scale must be positive.')
+        if User.objects.filter(username__startswith=options['prefix'] + '-').exists():
+            raise CommandError('Users with prefix "%s" already exist; use another --prefix or a fresh database.'
+                               % options['prefix'])
+        today = options['date'] or timezone.localdate()
+        started = time.perf_counter()
+        self.stdout.write('Generating: --scale %s --seed %d --date %s' % (options['scale'], options['seed'], today))
+        with transaction.atomic(), _fixed_timestamps(Lesson, Application, Post):
+            SchoolGenerator(options, today, Writer(self.stdout)).run()
+        self.stdout.write(self.style.SUCCESS(
+            'Done in %.0fs. Users %s-student-N / %s-teacher-N, password "%s".'
+            % (time.perf_counter() - started, options['prefix'], options['prefix'], options['password'])))
+
+    def populate_demo(self):
         self.stdout.write('Populating database...')
 
         # Create users
@@ -29,8 +187,6 @@ class Command(BaseCommand):
         course2, _ = Course.objects.get_or_create(title='History 101', description='An introductory course to history.', subject='History', price=100, teacher=teacher1)
 
         # Create lessons
-        from django.utils import timezone
-
         Lesson.objects.get_or_create(title='Lesson 1', content='This is the first lesson.', course=course1, defaults={'date': timezone.now().date(), 'time': timezone.now().time()})
         Lesson.objects.get_or_create(title='Lesson 2', content='This is the second lesson.', course=course1, defaults={'date': timezone.now().date(), 'time': timezone.now().time()})
         Lesson.objects.get_or_create(title='Lesson 1', content='This is the first lesson.', course=course2, defaults={'date': timezone.now().date(), 'time': timezone.now().time()})
@@ -43,4 +199,210 @@ class Command(BaseCommand):
         Post.objects.get_or_create(title='Welcome to our blog!', content='This is our first blog post.', author=admin, category=category1)
         Post.objects.get_or_create(title='New course available!', content='We have a new course available.', author=admin, category=category2)
 
-        self.stdout.write(self.style.SUCCESS('Successfully populated database.'))
\ No newline at end of file
+        self.stdout.write(self.style.SUCCESS('Successfully populated database.'))
+
+
+class SchoolGenerator:
+    """
+    Синтетическая школа. Все значения берутся из random.Random(seed) в
+    фиксированном порядке, даты отсчитываются от --date, поэтому одинаковые
+    seed и date на одинаковой исходной базе дают одинаковые данные.
+    """
+
+    def __init__(self, options, today, writer):
+        self.rng = random.Random(options['seed'])
+        self.scale = options['scale']
+        self.prefix = options['prefix']
+        self.today = today
+        self.writer = writer
+        # Все пользователи получают один пароль: PBKDF2 считается один раз, а не на каждого из 100k
+        self.password = make_password(options['password'], salt='populate%d' % options['seed'])
+        # Учебный год начинается 1 сентября
+        year = today.year if today.month >= 9 else today.year - 1
+        self.school_year = datetime.date(year, 9, 1)
+
+    def volume(self, name):
+        return max(1, round(SCALE_VOLUMES[name] * self.scale))
+
+    def moment(self, day, minutes_range=(8 * 60, 21 * 60)):
+        minutes = self.rng.randrange(*minutes_range)
+        naive = datetime.datetime.combine(day, datetime.time(minutes // 60, minutes % 60))
+        return timezone.make_aware(naive)
+
+    def text(self, words):
+        return ' '.join(self.rng.choice(WORDS) for _ in range(words)).capitalize() + '.'
+
+    def run(self):
+        teachers, students = self.users()
+        courses = self.courses(teachers)
+        self.lessons(courses)
+        self.enrollments(students, courses)
+        self.applications()
+        self.posts(teachers)
+        self.reviews()
+        self.writer.finish()
+        # Счетчики курсов: bulk-вставка обходит сигналы courses.signals
+        for batch in _chunks(courses, 1000):
+            refresh_course_counters([course_id for course_id, _ in batch])
+
+    def users(self):
+        """Возвращает (ID преподавателей, [(ID ученика, ID профиля)])."""
+        rng = self.rng
+        next_user = self.writer.next_id(User)
+        next_profile = self.writer.next_id(Profile)
+        roles = [('teacher', self.volume('teachers')), ('student', self.volume('students'))]
+        people = [(role, index) for role, count in roles for index in range(1, count + 1)]
+        joined_from = self.school_year - datetime.timedelta(days=3 * 365)
+
+        def users():
+            for offset, (role, index) in enumerate(people):
+                username = '%s-%s-%06d' % (self.prefix, role, index)
+                yield User(
+                    pk=next_user + offset, username=username, email=username + '@example.com',
+                    password=self.password, role=role, is_active=True,
+                    first_name=rng.choice(FIRST_NAMES), last_name=rng.choice(LAST_NAMES),
+                    date_joined=self.moment(joined_from + datetime.timedelta(days=rng.randrange(3 * 365))),
+                )
+
+        def profiles():
+            for offset, (role, index) in enumerate(people):
+                student = role == 'student'
+                yield Profile(
+                    pk=next_profile + offset, user_id=next_user + offset,
+                    phone='+7 7%02d %07d' % (rng.randrange(100), rng.randrange(10_000_000)),
+                    school='Школа №%d' % rng.randint(1, 180) if student else None,
+                    student_class='%d класс' % rng.randint(5, 11) if student else None,
+                    parent_name='%s %s' % (rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)) if student else None,
+                    public_subjects=None if student else ', '.join(rng.sample(SUBJECTS, 2)),
+                    public_description=None if student else self.text(30),
+                )
+
+        self.writer.write(User, users())
+        self.writer.write(Profile, profiles())
+        teacher_count = roles[0][1]
+        teachers = [next_user + offset for offset in range(teacher_count)]
+        students = [(next_user + offset, next_profile + offset) for offset in range(teacher_count, len(people))]
+        return teachers, students
+
+    def courses(self, teachers):
+        """Возвращает [(ID курса, дата первого урока)]."""
+        rng = self.rng
+        next_course = self.writer.next_id(Course)
+        count = self.volume('courses')
+        starts = [
+            # Курсы запущены в разное время за два года до начала текущего учебного года и после него
+            self.school_year - datetime.timedelta(days=rng.randrange(-60, 2 * 365))
+            for _ in range(count)
+        ]
+
+        def courses():
+            for offset in range(count):
+                subject = rng.choice(SUBJECTS)
+                yield Course(
+                    pk=next_course + offset, title='%s: %s, группа %d' % (subject, rng.choice(LEVELS), offset + 1),
+                    description=self.text(40), subject=subject,
+                    price=rng.choice([15_000, 20_000, 25_000, 30_000, 40_000]), teacher_id=rng.choice(teachers),
+                )
+
+        self.writer.write(Course, courses())
+        return [(next_course + offset, start) for offset, start in enumerate(starts)]
+
+    def lessons(self, courses):
+        rng = self.rng
+
+        def lessons():
+            for course_id, start in courses:
+                # Три урока в неделю по фиксированным дням и времени курса
+                weekdays = sorted(rng.sample(range(6), 3))
+                lesson_time = rng.choice(LESSON_TIMES)
+                duration = rng.choice([60, 60, 90])
+                room = str(rng.randint(101, 420))
+                monday = start - datetime.timedelta(days=start.weekday())
+                for number in range(rng.randint(*LESSONS_PER_COURSE)):
+                    day = monday + datetime.timedelta(weeks=number // 3, days=weekdays[number % 3])
+                    if day < self.today:
+                        status = Lesson.LessonStatus.CANCELLED if rng.random() < 0.03 else Lesson.LessonStatus.COMPLETED
+                    else:
+                        status = Lesson.LessonStatus.CANCELLED if rng.random() < 0.01 else Lesson.LessonStatus.PLANNED
+                    lesson = Lesson(
+                        course_id=course_id, title='Урок %d' % (number + 1), content=self.text(12),
+                        date=day, time=lesson_time, duration=duration, room=room, status=status,
+                        homework_url='https://example.com/hw/%d/%d' % (course_id, number + 1) if rng.random() < 0.5 else None,
+                    )
+                    lesson.set_interval()
+                    yield lesson
+
+        self.writer.write(Lesson, lessons())
+
+    def enrollments(self, students, courses):
+        rng = self.rng
+        course_ids = [course_id for course_id, _ in courses]
+        # Популярность курсов неравномерна: вес курса убывает с его номером в случайном порядке
+        ranking = course_ids[:]
+        rng.shuffle(ranking)
+        cum_weights = list(itertools.accumulate(1 / (rank + 1) ** 0.7 for rank in range(len(ranking))))
+
+        def enrollments():
+            for _, profile_id in students:
+                wanted = rng.randint(*COURSES_PER_STUDENT)
+                chosen = set(rng.choices(ranking, cum_weights=cum_weights, k=wanted))
+                for course_id in sorted(chosen):
+                    yield Profile.enrolled_courses.through(profile_id=profile_id, course_id=course_id)
+
+        self.writer.write(Profile.enrolled_courses.through, enrollments())
+
+    def applications(self):
+        rng = self.rng
+        count = self.volume('applications')
+        window = get_ingestion_setting('DEDUP_WINDOW')
+        statuses = ['new', 'contacted', 'registered', 'archived']
+
+        def applications():
+            # Номера уникальны: шаг 7919 взаимно прост с 10^7, поэтому номера не повторяются
+            for index in range(count):
+                phone = '8 (7%02d) %07d' % (index // 10_000_000 % 100, index * 7919 % 10_000_000)
+                created_at = self.moment(self.today - datetime.timedelta(days=rng.randrange(365)))
+                yield Application(
+                    name='%s %s' % (rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)),
+                    phone=phone, phone_normalized=normalize_phone(phone),
+                    dedup_bucket=int(created_at.timestamp() // window),
+                    student_class='%d класс' % rng.randint(5, 11), subject=rng.choice(SUBJECTS),
+                    comment=self.text(8) if rng.random() < 0.3 else '',
+                    status=rng.choices(statuses, weights=[2, 2, 3, 3])[0], created_at=created_at,
+                )
+
+        self.writer.write(Application, applications())
+
+    def posts(self, teachers):
+        rng = self.rng
+        categories = []
+        for index, name in enumerate(CATEGORIES):
+            category, _ = Category.objects.get_or_create(name=name, defaults={'slug': 'category-%d' % (index + 1)})
+            categories.append(category.pk)
+
+        def posts():
+            for index in range(1, self.volume('posts') + 1):
+                created_at = self.moment(self.today - datetime.timedelta(days=rng.randrange(3 * 365)))
+                content = '\n\n'.join(self.text(rng.randint(40, 120)) for _ in range(rng.randint(2, 6)))
+                yield Post(
+                    title='%s %d' % (self.text(rng.randint(3, 7))[:-1], index),
+                    slug='%s-post-%d' % (self.prefix, index), content=content, excerpt=content[:300],
+                    author_id=rng.choice(teachers), category_id=rng.choice(categories),
+                    is_published=rng.random() < 0.9, createdAt=created_at, updatedAt=created_at,
+                )
+
+        self.writer.write(Post, posts())
+
+    def reviews(self):
+        rng = self.rng
+
+        def reviews():
+            for _ in range(self.volume('reviews')):
+                yield Review(
+                    author='%s %s., %d класс' % (rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)[0], rng.randint(9, 11)),
+                    text=self.text(rng.randint(20, 60)),
+                    score_info='ЕНТ: %d баллов' % rng.randint(80, 140),
+                    is_published=rng.random() < 0.7,
+                )
+
+        self.writer.write(Review, reviews())
@@ -1,6 +1,16 @@
 from rest_framework import serializers
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from .activity import touch
 from .models import User, Profile
 
+class ActivityTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """Вход отмечается в users.activity: last_login пишется пачкой, а не UPDATE в каждом запросе токена."""
+
+    def validate(self, attrs):
+        data = super().validate(attrs)
+        touch(self.user)
+        return data
+
 class ChangePasswordSerializer(serializers.Serializer):
     old_password = serializers.CharField(required=True)
     new_password = serializers.CharField(required=True)
@@ -1,2 +1,81 @@
-# Этот файл больше не используется, чтобы избежать дублирования сигналов.
-# Вся логика по созданию профиля перенесена в users/models.py.
\ No newline at end of file
+# Создание профиля по-прежнему в users/models.py, чтобы избежать дублирования сигналов.
+# Здесь - сброс документов дашбордов (users/dashboards.py) при событиях, которые их меняют.
+
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from backend.bulk import bulk_updated
+from courses.models import Course, Lesson
+from courses.scheduling import course_students
+from .dashboards import invalidate_dashboards
+from .models import Profile
+
+
+def invalidate_course_dashboards(course_ids):
+    """Дашборды учеников и преподавателей курсов."""
+    course_ids = set(course_ids)
+    if not course_ids:
+        return
+    user_ids = set(Course.objects.filter(pk__in=course_ids).values_list('teacher_id', flat=True))
+    for students in course_students(course_ids).values():
+        user_ids |= students
+    invalidate_dashboards(user_ids)
+
+
+@receiver(post_save, sender=Lesson)
+@receiver(post_delete, sender=Lesson)
+def lesson_changed(sender, instance, **kwargs):
+    invalidate_course_dashboards([instance.course_id])
+
+
+@receiver(bulk_updated, sender=Lesson)
+def lessons_bulk_updated(sender, pks, **kwargs):
+    invalidate_course_dashboards(Lesson.objects.filter(pk__in=pks).values_list('course_id', flat=True).distinct())
+
+
+@receiver(post_save, sender=Course)
+@receiver(post_delete, sender=Course)
+def course_changed(sender, instance, **kwargs):
+    # Смена преподавателя меняет дашборды прежнего и нового
+    invalidate_dashboards([instance.teacher_id, getattr(instance, '_loaded_teacher_id', None)])
+
+
+def _changed_enrollments(sender, instance, reverse, pk_set):
+    """
+    (ID учеников, ID курсов), затронутые изменением связи записи на курс.
+    pk_set=None - все записи instance (их читают до clear()).
+    """
+    profiles = sender is Profile.enrolled_courses.through
+    if pk_set is None:
+        user_field = 'profile__user_id' if profiles else 'user_id'
+        own_field = {(True, False): 'profile_id', (True, True): 'course_id',
+                     (False, False): 'course_id', (False, True): 'user_id'}[profiles, reverse]
+        rows = list(sender.objects.filter(**{own_field: instance.pk}).values_list(user_field, 'course_id'))
+        return {user_id for user_id, _ in rows}, {course_id for _, course_id in rows}
+    if profiles and reverse:
+        # course.enrolled_student_profiles: pk_set - ID профилей
+        return set(Profile.objects.filter(pk__in=pk_set).values_list('user_id', flat=True)), {instance.pk}
+    if profiles:
+        return {instance.user_id}, set(pk_set)
+    if reverse:
+        # user.enrolled_courses: pk_set - ID курсов
+        return {instance.pk}, set(pk_set)
+    return set(pk_set), {instance.pk}
+
+
+@receiver(m2m_changed, sender=Profile.enrolled_courses.through)
+@receiver(m2m_changed, sender=Course.students.through)
+def enrollment_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == 'pre_clear':
+        instance._cleared_enrollments = _changed_enrollments(sender, instance, reverse, None)
+        return
+    if action == 'post_clear':
+        changed = instance.__dict__.pop('_cleared_enrollments', None)
+    elif action in ('post_add', 'post_remove') and pk_set:
+        changed = _changed_enrollments(sender, instance, reverse, pk_set)
+    else:
+        return
+    if changed:
+        user_ids, course_ids = changed
+        teacher_ids = Course.objects.filter(pk__in=course_ids).values_list('teacher_id', flat=True)
+        invalidate_dashboards(user_ids | set(teacher_ids))
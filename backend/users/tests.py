@@ -1,3 +1,255 @@
-from django.test import TestCase
+import datetime
+import shutil
+import tempfile
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import caches
+from django.db import DatabaseError
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from backend.read_path import get_read_path
+from courses.enrollment import drop, enroll
+from courses.models import Course, Lesson
+from . import activity, dashboards
+from .async_auth import check_throttle_cache, check_throttle_cache_deploy
+from .models import Profile, User
+from .serializers import UserSerializer
+
+
+class UserReadPathTests(TestCase):
+    """Быстрый путь чтения (FastListMixin) должен отдавать то же, что UserSerializer."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user('admin', email='admin@example.com', password='pw', role='admin', is_staff=True)
+        Profile.objects.create(user=cls.admin)
+        math = Course.objects.create(title='Математика', subject='math', price=1000)
+        physics = Course.objects.create(title='Физика', subject='physics', price=1200)
+
+        student = User.objects.create_user(
+            'student', email='student@example.com', first_name='Аня', last_name='Иванова',
+            last_login=timezone.now(),
+        )
+        profile = Profile.objects.create(
+            user=student, avatar='https://example.com/a.png', phone='+77771234567',
+            school='Школа 1', student_class='9', parent_name='Мария', parent_phone='+77770000000',
+        )
+        profile.enrolled_courses.add(physics, math)
+        # Пустой профиль: все поля null, нет курсов; пользователь неактивен и не входил
+        inactive = User.objects.create_user('inactive', is_active=False)
+        Profile.objects.create(user=inactive)
+
+    def test_read_path_matches_serializer(self):
+        queryset = User.objects.order_by('id')
+        self.assertEqual(
+            get_read_path(UserSerializer).serialize(queryset),
+            UserSerializer(queryset, many=True).data,
+        )
+
+    def test_list_endpoint_matches_serializer(self):
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        response = client.get('/api/users/')
+        self.assertEqual(response.status_code, 200)
+        reference = UserSerializer(User.objects.all(), many=True).data
+        by_id = lambda rows: sorted(rows, key=lambda row: row['id'])
+        self.assertEqual(by_id(response.data['results']), by_id(reference))
+
+
+class DashboardCacheTests(TestCase):
+    """Документ дашборда из кэша совпадает с построенным заново после каждого изменения."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.teacher = User.objects.create_user('teacher', password='pw', role='teacher')
+        cls.student = User.objects.create_user('student', password='pw')
+        Profile.objects.create(user=cls.student)
+        cls.course = Course.objects.create(title='Математика', subject='math', price=1000, teacher=cls.teacher)
+        cls.lesson = Lesson.objects.create(
+            course=cls.course, title='Дроби', date=timezone.localdate() + datetime.timedelta(days=1),
+            time=datetime.time(15, 0),
+        )
+
+    def setUp(self):
+        # Файловый кэш - общий для "воркеров": каждое чтение идет через новый клиент кэша
+        location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, location, ignore_errors=True)
+        shared = override_settings(CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': location,
+        }})
+        shared.enable()
+        self.addCleanup(shared.disable)
+        self.teacher_client = APIClient()
+        self.teacher_client.force_authenticate(self.teacher)
+
+    def new_cache_client(self):
+        # Следующее обращение к кэшу создаст новый клиент, как в другом воркере
+        try:
+            del caches['default']
+        except AttributeError:
+            pass
+
+    def assertFresh(self):
+        for user, kind in ((self.student, 'student'), (self.teacher, 'teacher')):
+            self.new_cache_client()
+            self.assertEqual(dashboards.get_dashboard(user, kind), dashboards.BUILDERS[kind](user), kind)
+
+    def change(self, func, *args):
+        with self.captureOnCommitCallbacks(execute=True):
+            func(*args)
+
+    def test_documents_follow_changes(self):
+        self.assertFresh()
+        # Второе чтение - из кэша, без запросов к БД
+        self.new_cache_client()
+        with self.assertNumQueries(0):
+            dashboards.get_dashboard(self.student, 'student')
+
+        self.change(enroll, self.student.pk, self.course.pk)
+        self.new_cache_client()
+        self.assertEqual(dashboards.get_dashboard(self.student, 'student')['enrolledCoursesCount'], 1)
+        self.assertFresh()
+
+        def rename():
+            self.lesson.title = 'Десятичные дроби'
+            self.lesson.save()
+        self.change(rename)
+        self.new_cache_client()
+        self.assertEqual(dashboards.get_dashboard(self.student, 'student')['upcomingLessons'][0]['title'], 'Десятичные дроби')
+        self.assertFresh()
+
+        def cancel_all():
+            response = self.teacher_client.post(
+                '/api/courses/%d/lessons/bulk-update/' % self.course.pk,
+                {'ids': [self.lesson.pk], 'patch': {'status': 'cancelled'}}, format='json',
+            )
+            self.assertEqual(response.status_code, 200)
+        self.change(cancel_all)
+        self.new_cache_client()
+        self.assertEqual(dashboards.get_dashboard(self.student, 'student')['upcomingLessons'][0]['status'], 'cancelled')
+        self.assertFresh()
+
+        self.change(drop, self.student.pk, self.course.pk)
+        self.new_cache_client()
+        self.assertEqual(dashboards.get_dashboard(self.student, 'student')['enrolledCoursesCount'], 0)
+        self.assertFresh()
+
+    def test_process_local_cache_is_not_used(self):
+        with override_settings(CACHES={'default': {'BACKEND': 'backend.metrics.InstrumentedLocMemCache'}}):
+            dashboards.get_dashboard(self.student, 'student')
+            # Изменение в обход сигналов: другой воркер о нем не узнал бы, поэтому документ не кэшируется
+            Profile.objects.get(user=self.student).enrolled_courses.through.objects.create(
+                profile=self.student.profile, course=self.course,
+            )
+            self.assertEqual(dashboards.get_dashboard(self.student, 'student')['enrolledCoursesCount'], 1)
+
+
+@override_settings(USER_ACTIVITY={'MIN_INTERVAL': 300, 'BATCH_SIZE': 1000})
+class ActivityTrackerTests(TestCase):
+    """Отметки активности: схлопывание, MIN_INTERVAL и повтор после неудачного сброса."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.first = User.objects.create_user('first', password='pw')
+        cls.second = User.objects.create_user('second', password='pw')
+
+    def setUp(self):
+        # Фоновый поток не нужен: сброс вызывается из теста
+        patcher = mock.patch.object(activity.ActivityTracker, '_ensure_thread')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.tracker = activity.ActivityTracker()
+        self.now = timezone.now()
+
+    def last_login(self, user):
+        return User.objects.values_list('last_login', flat=True).get(pk=user.pk)
+
+    def test_touches_coalesce(self):
+        for seconds in (0, 20, 10):
+            self.tracker.touch(self.first.pk, self.now + datetime.timedelta(seconds=seconds))
+        self.tracker.touch(self.second.pk, self.now)
+        self.assertEqual(len(self.tracker), 2)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(self.tracker.flush(), 2)
+        self.assertEqual(len(self.tracker), 0)
+        self.assertEqual(self.last_login(self.first), self.now + datetime.timedelta(seconds=20))
+        self.assertEqual(self.last_login(self.second), self.now)
+
+    def test_min_interval_suppresses_touches(self):
+        self.tracker.touch(self.first.pk, self.now)
+        self.tracker.flush()
+
+        self.tracker.touch(self.first.pk, self.now + datetime.timedelta(seconds=299))
+        self.assertEqual(len(self.tracker), 0)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.tracker.flush(), 0)
+
+        later = self.now + datetime.timedelta(seconds=300)
+        self.tracker.touch(self.first.pk, later)
+        self.assertEqual(len(self.tracker), 1)
+        self.tracker.flush()
+        self.assertEqual(self.last_login(self.first), later)
+
+    def test_failed_flush_requeues(self):
+        self.tracker.touch(self.first.pk, self.now)
+        with mock.patch.object(activity, '_write', side_effect=DatabaseError), self.assertLogs(activity.logger):
+            self.assertEqual(self.tracker.flush(), 0)
+        self.assertEqual(len(self.tracker), 1)
+        self.assertIsNone(self.last_login(self.first))
+
+        # Отметка новее возвращенной в очередь заменяет ее
+        newer = self.now + datetime.timedelta(seconds=5)
+        self.tracker.touch(self.first.pk, newer)
+        self.assertEqual(self.tracker.flush(), 1)
+        self.assertEqual(self.last_login(self.first), newer)
+
+
+class ThrottleCacheCheckTests(SimpleTestCase):
+    """Ведра попыток входа в памяти процесса не пускаются в продакшен."""
+
+    LOCMEM = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+    SHARED = {'default': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': '/tmp/unused'}}
+
+    def test_process_local_cache(self):
+        with override_settings(CACHES=self.LOCMEM):
+            self.assertEqual([issue.id for issue in check_throttle_cache()], ['users.W001'])
+            self.assertEqual([issue.id for issue in check_throttle_cache_deploy()], ['users.E001'])
+
+    def test_shared_cache(self):
+        with override_settings(CACHES=self.SHARED):
+            self.assertEqual(check_throttle_cache(), [])
+            self.assertEqual(check_throttle_cache_deploy(), [])
+
+
+class AsyncAuthTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('student', password='old-secret-1')
+
+    def setUp(self):
+        # Ведра попыток входа живут в кэше
+        caches['default'].clear()
+
+    def test_token_accepts_json_and_form(self):
+        json_response = self.client.post(
+            '/api/token/', {'username': 'student', 'password': 'old-secret-1'}, content_type='application/json',
+        )
+        form_response = self.client.post('/api/token/', {'username': 'student', 'password': 'old-secret-1'})
+        self.assertEqual((json_response.status_code, form_response.status_code), (200, 200))
+        self.assertIn('access', form_response.json())
+
+    def test_change_password_notifies_validators(self):
+        token = self.client.post('/api/token/', {'username': 'student', 'password': 'old-secret-1'}).json()['access']
+        with mock.patch('django.contrib.auth.password_validation.password_changed') as password_changed:
+            response = self.client.post(
+                '/api/users/change-password/', {'old_password': 'old-secret-1', 'new_password': 'new-secret-2'},
+                content_type='application/json', HTTP_AUTHORIZATION='Bearer %s' % token,
+            )
+        self.assertEqual(response.status_code, 200)
+        password_changed.assert_called_once()
+        self.assertEqual(password_changed.call_args.args[0], 'new-secret-2')
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.check_password('new-secret-2'))
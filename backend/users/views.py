@@ -1,3 +1,4 @@
+from django.db.models import Q
 from django.shortcuts import get_object_or_404
 from rest_framework import viewsets, permissions, status, filters
 from rest_framework.permissions import AllowAny, IsAuthenticated
@@ -6,21 +7,36 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.pagination import PageNumberPagination
 
+from .dashboards import get_dashboard
 from .models import User
-from .serializers import UserSerializer, TeacherPublicSerializer, ChangePasswordSerializer
-from courses.models import Course, Lesson
+from .serializers import UserSerializer, TeacherPublicSerializer
+from courses.models import Course
+from courses.enrollment import set_enrollments
 from applications.models import Application
-from courses.serializers import CourseSerializer, LessonSerializer
+from courses.serializers import CourseSerializer
 from applications.serializers import ApplicationSerializer
 from backend.permissions import IsTeacher
-from django.utils import timezone
+from backend.read_path import FastListMixin
+from backend.bulk import BulkUpdateMixin
+from exports.services import export_response, USERS_EXPORT
+from idempotency.decorators import idempotent
 
-class UserViewSet(viewsets.ModelViewSet):
+class UserViewSet(FastListMixin, BulkUpdateMixin, viewsets.ModelViewSet):
     queryset = User.objects.all()
     serializer_class = UserSerializer
     permission_classes = [permissions.IsAdminUser]
     filter_backends = [filters.SearchFilter]
     search_fields = ['username', 'email', 'first_name', 'last_name']
+    bulk_update_fields = ('is_active',)
+    bulk_filter_fields = ('role', 'is_active')
+
+    def get_bulk_permission(self):
+        # Администратор не может массово изменить (например, деактивировать) сам себя
+        return ~Q(pk=self.request.user.pk)
+
+    @idempotent
+    def create(self, request, *args, **kwargs):
+        return super().create(request, *args, **kwargs)
 
     def get_queryset(self):
         queryset = super().get_queryset()
@@ -29,6 +45,11 @@ class UserViewSet(viewsets.ModelViewSet):
             queryset = queryset.filter(role=role)
         return queryset
 
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        # Те же фильтры, что и у списка: ?role=, ?search=
+        return export_response(request, USERS_EXPORT, self.filter_queryset(self.get_queryset()))
+
 class TeacherPublicViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = User.objects.filter(role='teacher', is_active=True)
     serializer_class = TeacherPublicSerializer
@@ -40,18 +61,6 @@ def current_user_view(request):
     serializer = UserSerializer(request.user)
     return Response(serializer.data)
 
-@api_view(['POST'])
-@permission_classes([IsAuthenticated])
-def change_password_view(request):
-    serializer = ChangePasswordSerializer(data=request.data)
-    if serializer.is_valid():
-        user = request.user
-        if not user.check_password(serializer.data.get("old_password")):
-            return Response({"old_password": ["Wrong password."]}, status=status.HTTP_400_BAD_REQUEST)
-        user.set_password(serializer.data.get("new_password"))
-        user.save()
-        return Response({"status": "password set"}, status=status.HTTP_200_OK)
-    return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
 @api_view(['GET'])
@@ -72,6 +81,7 @@ def admin_dashboard_summary_view(request):
 
 @api_view(['POST'])
 @permission_classes([permissions.IsAdminUser])
+@idempotent
 def enroll_student_to_courses(request, pk):
     try:
         user = User.objects.get(pk=pk, role='student')
@@ -82,49 +92,25 @@ def enroll_student_to_courses(request, pk):
     if not isinstance(course_ids, list):
         return Response({'error': 'Ожидается список ID курсов в "course_ids".'}, status=status.HTTP_400_BAD_REQUEST)
 
-    courses = Course.objects.filter(id__in=course_ids)
-    user.profile.enrolled_courses.set(courses)
-    
-    return Response({'status': f'Студент {user.username} обновлен в курсах.'}, status=status.HTTP_200_OK)
+    # Вместо set(): на курсы без мест ученик встает в очередь, освобожденные места получает очередь
+    results = set_enrollments(user.pk, course_ids)
+
+    return Response({'status': f'Студент {user.username} обновлен в курсах.', 'courses': results}, status=status.HTTP_200_OK)
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def student_dashboard_summary_view(request):
-    user = request.user
-    enrolled_courses = user.profile.enrolled_courses.all()
-    upcoming_lessons = Lesson.objects.filter(
-        course__in=enrolled_courses,
-        date__gte=timezone.now()
-    ).order_by('date', 'time')[:5]
-
-    summary_data = {
-        'enrolledCoursesCount': enrolled_courses.count(),
-        'upcomingLessons': LessonSerializer(upcoming_lessons, many=True).data,
-    }
-    return Response(summary_data)
+    return Response(get_dashboard(request.user, 'student'))
 
 @api_view(['GET'])
 @permission_classes([IsTeacher])
 def teacher_dashboard_summary_view(request):
-    teacher = request.user
-    courses_taught = Course.objects.filter(teacher=teacher)
-    course_count = courses_taught.count()
-
-    student_ids = set()
-    for course in courses_taught:
-        student_ids.update(course.students.values_list('id', flat=True))
-    
-    student_count = len(student_ids)
-
-    return Response({
-        'courseCount': course_count,
-        'studentCount': student_count,
-    })
+    return Response(get_dashboard(request.user, 'teacher'))
 
 
 from rest_framework import generics
 
-class TeacherStudentsListView(generics.ListAPIView):
+class TeacherStudentsListView(FastListMixin, generics.ListAPIView):
     """
     Returns a paginated list of unique students taught by the logged-in teacher.
     Supports search on first_name, last_name, and email.
@@ -5,11 +5,40 @@ const apiClient = axios.create({
   baseURL: import.meta.env.VITE_API_BASE_URL || 'http://127.0.0.1:8000/api',
 });
 
+// POST-эндпоинты с @idempotent на бэкенде (idempotency/decorators.py)
+const IDEMPOTENT_ENDPOINTS = [
+  /^\/?users\/$/,
+  /^\/?users\/students\/\d+\/enroll\/$/,
+  /^\/?courses\/\d+\/lessons\/(series\/)?$/,
+  /^\/?applications\/$/,
+];
+
+// crypto.randomUUID есть только в защищенном контексте (HTTPS или localhost),
+// а приложение открывают и по http://10.0.0.50:5173 - там UUID v4 собираем сами
+const uuid4 = (): string => {
+  if (typeof crypto.randomUUID === 'function') {
+    return crypto.randomUUID();
+  }
+  const bytes = crypto.getRandomValues(new Uint8Array(16));
+  bytes[6] = (bytes[6] & 0x0f) | 0x40;
+  bytes[8] = (bytes[8] & 0x3f) | 0x80;
+  const hex = Array.from(bytes, (byte) => byte.toString(16).padStart(2, '0')).join('');
+  return `${hex.slice(0, 8)}-${hex.slice(8, 12)}-${hex.slice(12, 16)}-${hex.slice(16, 20)}-${hex.slice(20)}`;
+};
+
 apiClient.interceptors.request.use((config) => {
   const token = localStorage.getItem('accessToken');
   if (token) {
     config.headers.Authorization = `Bearer ${token}`;
   }
+  // Ключ идемпотентности: повтор этого же запроса (тот же config) получит сохраненный ответ, а не дубликат
+  if (
+    config.method === 'post'
+    && !config.headers['Idempotency-Key']
+    && IDEMPOTENT_ENDPOINTS.some((pattern) => pattern.test(config.url ?? ''))
+  ) {
+    config.headers['Idempotency-Key'] = uuid4();
+  }
   return config;
 });
 